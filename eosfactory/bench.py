@@ -0,0 +1,302 @@
+import os
+import json
+import time
+import math
+import argparse
+import importlib.util
+
+import eosfactory.core.errors as errors
+import eosfactory.core.logger as logger
+import eosfactory.core.manager as manager
+import eosfactory.core.teos as teos
+import eosfactory.shell.account as account
+import eosfactory.shell.contract as contract
+
+RUNS = 20
+WARMUP = 3
+# The expiration time, in seconds, of the transaction of the first run; see
+# :func:`.run_scenario`. With the number of runs added, it cannot exceed the
+# maximum transaction lifetime of the node.
+EXPIRATION_SEC = 30
+MAX_TRANSACTION_LIFETIME = 3600
+
+# Two-sided 95% critical values of the Student's t-distribution, indexed with
+# degrees of freedom; the normal value is used above the table.
+T_95 = [None, 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262,
+        2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093,
+        2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045,
+        2.042]
+Z_95 = 1.960
+
+
+def load_scenarios(scenario_file):
+    '''Load a scenario file.
+
+    The file is a Python module that defines the list *SCENARIOS*. Each
+    scenario is a dictionary with the keys:
+
+        - *name*: the name of the scenario, defaults to the action name,
+        - *action*: the name of the action,
+        - *data*: the action data, or a function of the run number returning
+          it,
+        - *permission*: optional, the permission, or a function of the run
+          number returning it; defaults to the contract account.
+
+    The module may define the function *setup(host, master)*, called after
+    the contract is deployed to the *host* account, for example to create
+    test accounts.
+    '''
+    spec = importlib.util.spec_from_file_location(
+                "eosfactory_bench_scenario", os.path.abspath(scenario_file))
+    if spec is None:
+        raise errors.Error('''
+        Cannot load the scenario file ``{}``.
+        '''.format(scenario_file))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    if not hasattr(module, "SCENARIOS"):
+        raise errors.Error('''
+        The scenario file ``{}`` does not define the ``SCENARIOS`` list.
+        '''.format(scenario_file))
+    return module
+
+
+def confidence_interval(values):
+    '''Return the mean of the values, and the half-width of its 95% confidence
+    interval.
+    '''
+    count = len(values)
+    mean = sum(values) / count
+    if count < 2:
+        return mean, 0.0
+    variance = sum([(value - mean) ** 2 for value in values]) / (count - 1)
+    critical = T_95[count - 1] if count - 1 < len(T_95) else Z_95
+    return mean, critical * math.sqrt(variance / count)
+
+
+def statistics(values):
+    mean, ci95 = confidence_interval(values)
+    ordered = sorted(values)
+    return {
+        "mean": mean,
+        "ci95": ci95,
+        "min": ordered[0],
+        "p50": ordered[(len(ordered) - 1) // 2],
+        "max": ordered[-1]
+    }
+
+
+def deploy(contract_dir, module):
+    '''Deploy a contract to a new account of a running local node, and call 
+    the *setup* function of the scenario module, if any.
+
+    Returns:
+        tuple: The *host* account, and the :class:`.shell.contract.Contract` 
+        object.
+    '''
+    master = account.create_master_account("BENCH_MASTER")
+    host = account.create_account("BENCH_HOST", master)
+    smart = contract.Contract(host, contract_dir)
+    if not smart.is_built():
+        smart.build()
+    smart.deploy()
+
+    if hasattr(module, "setup"):
+        module.setup(host, master)
+    return host, smart
+
+
+def action_args(scenario, run):
+    '''Return the action, data and permission of a scenario for a run.
+    '''
+    def value(argument):
+        return argument(run) if callable(argument) else argument
+
+    data = value(scenario.get("data", "{}"))
+    if not isinstance(data, str):
+        data = json.dumps(data)
+    return scenario["action"], data, value(scenario.get("permission"))
+
+
+def run_scenario(host, scenario, runs=RUNS, warmup=WARMUP):
+    '''Push the action of a scenario *warmup* plus *runs* times.
+
+    Identical pushes would be rejected as duplicate transactions. The
+    *force_unique* option is not used, as its nonce action adds to the
+    measured CPU and NET. Instead, the expiration time of each run is one
+    second later than that of the previous run, which makes the transactions
+    distinct.
+
+    The transactions per second are derived from the latency, as 
+    *1000 / latency*, with one transaction pending at a time. They are not a
+    measured throughput; see :mod:`.load` for that.
+
+    Returns:
+        dict: The statistics of client latency, in milliseconds, on-chain CPU,
+        in microseconds, NET, in bytes, and transactions per second, of the
+        measured runs.
+    '''
+    latencies = []
+    cpu = []
+    net = []
+    for run in range(warmup + runs):
+        action, data, permission = action_args(scenario, run)
+
+        start = time.perf_counter()
+        host.push_action(
+            action, data, permission, expiration_sec=EXPIRATION_SEC + run)
+        latency = time.perf_counter() - start
+
+        if run < warmup:
+            continue
+        receipt = host.action.json["processed"]["receipt"]
+        latencies.append(latency * 1000)
+        cpu.append(receipt["cpu_usage_us"])
+        net.append(receipt["net_usage_words"] * 8)
+
+    latency = statistics(latencies)
+    low = latency["mean"] - latency["ci95"]
+    return {
+        "runs": runs,
+        "latency_ms": latency,
+        "cpu_us": statistics(cpu),
+        "net_bytes": statistics(net),
+        "tps": {
+            "mean": 1000 / latency["mean"],
+            "low": 1000 / (latency["mean"] + latency["ci95"]),
+            "high": 1000 / low if low > 0 else None
+        }
+    }
+
+
+def bench(
+        contract_dir, scenario_file, runs=RUNS, warmup=WARMUP, output=None,
+        silent=True, profile=None):
+    '''Benchmark the actions of a contract on a clean local node.
+
+    See :func:`.main`.
+
+    Returns:
+        dict: The results.
+    '''
+    module = load_scenarios(scenario_file)
+    if silent:
+        logger.verbosity([logger.Verbosity.ERROR])
+
+    manager.reset(profile=profile)
+    try:
+        host, smart = deploy(contract_dir, module)
+        results = {
+            "contract_dir": os.path.abspath(smart.contract_dir),
+            "scenario_file": os.path.abspath(scenario_file),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "runs": runs,
+            "warmup": warmup,
+            "profile": profile,
+            "scenarios": {}
+        }
+        for scenario in module.SCENARIOS:
+            name = scenario.get("name", scenario["action"])
+            results["scenarios"][name] = run_scenario(
+                                                host, scenario, runs, warmup)
+    finally:
+        manager.stop()
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+    return results
+
+
+def report(results):
+    '''Return the results as a table.
+    '''
+    lines = ["{:20}{:>24}{:>24}{:>12}{:>26}".format(
+        "scenario", "latency [ms]", "cpu [us]", "net [B]",
+        "1000/latency [tps]")]
+    for name, result in sorted(results["scenarios"].items()):
+        latency = result["latency_ms"]
+        cpu = result["cpu_us"]
+        tps = result["tps"]
+        lines.append("{:20}{:>24}{:>24}{:>12.0f}{:>26}".format(
+            name,
+            "{:.2f} +/- {:.2f}".format(latency["mean"], latency["ci95"]),
+            "{:.0f} +/- {:.0f}".format(cpu["mean"], cpu["ci95"]),
+            result["net_bytes"]["mean"],
+            "{:.1f} [{:.1f}, {}]".format(
+                tps["mean"], tps["low"],
+                "{:.1f}".format(tps["high"]) if tps["high"] else "inf")))
+    return "\n".join(lines)
+
+
+def main():
+    '''
+    usage: python3 -m eosfactory.bench [-h] [--runs RUNS] [--warmup WARMUP]
+                                        [--output OUTPUT] [--profile PROFILE]
+                                        [--verbose]
+                                        contract_dir scenario
+
+    Benchmark the actions of a contract.
+
+    A clean local node is started, the contract is built, if needed, and
+    deployed, then each scenario of the scenario file is run *warmup* times
+    without measurement, and *runs* times with. For each scenario, the mean
+    values, with 95% confidence intervals, of client latency, on-chain CPU,
+    and transactions per second, are printed. The transactions per second are
+    *1000 / latency*, not a measured throughput. The results can be saved as
+    a JSON file, to be compared across commits.
+
+    See :func:`.load_scenarios` for the format of the scenario file.
+
+    Args:
+        contract_dir: Contract name or directory.
+        scenario: Scenario file.
+        --runs: The number of measured runs of each scenario, default is 20.
+        --warmup: The number of warm-up runs of each scenario, default is 3.
+        --output: JSON file to save the results to.
+        --profile: The profile of the local node, for example *bench*, see
+            :func:`.core.config.nodeos_profile`.
+        --verbose: Print info.
+        -h: Show help message and exit
+    '''
+    parser = argparse.ArgumentParser(description='''
+    Benchmark the actions of a contract.
+
+    A clean local node is started, the contract is built, if needed, and
+    deployed, then each scenario of the scenario file is run *warmup* times
+    without measurement, and *runs* times with. For each scenario, the mean
+    values, with 95% confidence intervals, of client latency, on-chain CPU,
+    and transactions per second, are printed. The transactions per second are
+    *1000 / latency*, not a measured throughput. The results can be saved as
+    a JSON file, to be compared across commits.
+    ''')
+
+    parser.add_argument("contract_dir", help="Contract name or directory.")
+    parser.add_argument("scenario", help="Scenario file.")
+    parser.add_argument(
+        "--runs", help="The number of measured runs.", type=int, default=RUNS)
+    parser.add_argument(
+        "--warmup", help="The number of warm-up runs.", type=int,
+        default=WARMUP)
+    parser.add_argument("--output", help="JSON file to save the results to.")
+    parser.add_argument(
+        "--profile", help="The profile of the local node.",
+        choices=sorted(teos.PROFILES))
+    parser.add_argument("--verbose", help="Print info.", action="store_true")
+
+    args = parser.parse_args()
+    if args.runs < 1:
+        parser.error("The number of runs has to be positive.")
+    if EXPIRATION_SEC + args.warmup + args.runs > MAX_TRANSACTION_LIFETIME:
+        parser.error(
+            "The transactions of the last runs would expire too late.")
+
+    results = bench(
+        args.contract_dir, args.scenario, args.runs, args.warmup, args.output,
+        not args.verbose, args.profile)
+    print(report(results))
+
+
+if __name__ == '__main__':
+    main()
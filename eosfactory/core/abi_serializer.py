@@ -0,0 +1,413 @@
+'''Binary serialization of data, as defined with an EOSIO ABI.
+
+The binary form of action data, table rows and the messages of the state
+history plugin of *nodeos* is decoded to the form that *cleos* prints, and
+the other way::
+
+    serializer = abi_serializer.AbiSerializer(abi)
+    row = serializer.decode("account", data)
+    data = serializer.encode("account", row)
+
+Values of the type *bytes* are given as hexadecimal strings.
+'''
+import struct
+import hashlib
+import calendar
+import time
+
+import eosfactory.core.errors as errors
+
+NAME_CHARACTERS = ".12345abcdefghijklmnopqrstuvwxyz"
+BASE58_CHARACTERS = \
+            "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+# Milliseconds since the epoch at the epoch of block timestamps:
+BLOCK_TIMESTAMP_EPOCH_MS = 946684800000
+KEY_TYPES = ["K1", "R1"]
+PUBLIC_KEY_SIZE = 33
+SIGNATURE_SIZE = 65
+
+FIXED = {
+    "int8": "<b", "uint8": "<B", "int16": "<h", "uint16": "<H",
+    "int32": "<i", "uint32": "<I", "int64": "<q", "uint64": "<Q",
+    "float32": "<f", "float64": "<d"
+}
+CHECKSUMS = {"checksum160": 20, "checksum256": 32, "checksum512": 64}
+
+
+def name_to_int(name):
+    '''Return the *uint64* value of an EOSIO name.
+    '''
+    value = 0
+    for i in range(13):
+        c = NAME_CHARACTERS.find(name[i]) if i < len(name) else 0
+        if c < 0:
+            c = 0
+        if i < 12:
+            value |= (c & 0x1f) << (64 - 5 * (i + 1))
+        else:
+            value |= c & 0x0f
+    return value
+
+
+def int_to_name(value):
+    '''Return the EOSIO name of a *uint64* value.
+    '''
+    characters = ["."] * 13
+    for i in range(13):
+        if i == 0:
+            characters[12] = NAME_CHARACTERS[value & 0x0f]
+            value >>= 4
+        else:
+            characters[12 - i] = NAME_CHARACTERS[value & 0x1f]
+            value >>= 5
+    return "".join(characters).rstrip(".")
+
+
+def base58(data):
+    number = int.from_bytes(data, "big")
+    result = ""
+    while number:
+        number, digit = divmod(number, 58)
+        result = BASE58_CHARACTERS[digit] + result
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + result
+
+
+def ripemd160(data):
+    try:
+        return hashlib.new("ripemd160", data).digest()
+    except ValueError:
+        raise errors.Error('''
+        The *ripemd160* hash is not available with the *hashlib* module,
+        hence keys and signatures cannot be decoded.
+        ''')
+
+
+def key_string(prefix, key_type, data):
+    if key_type == 0 and prefix == "PUB":
+        return "EOS" + base58(data + ripemd160(data)[:4])
+    if key_type >= len(KEY_TYPES):
+        raise errors.Error('''
+        The key type ``{}`` is not supported.
+        '''.format(key_type))
+    suffix = KEY_TYPES[key_type]
+    return "{}_{}_{}".format(prefix, suffix, base58(
+                            data + ripemd160(data + suffix.encode())[:4]))
+
+
+def time_string(seconds, milliseconds=None):
+    result = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+    if milliseconds is not None:
+        result = result + ".{:03d}".format(milliseconds)
+    return result
+
+
+def time_seconds(value):
+    '''Return the seconds since the epoch, and the milliseconds, of a time
+    string.
+    '''
+    seconds, _, fraction = value.rstrip("Z").partition(".")
+    return calendar.timegm(time.strptime(seconds, "%Y-%m-%dT%H:%M:%S")), \
+                                        int((fraction + "000")[:3])
+
+
+def symbol_code_string(value):
+    result = ""
+    while value:
+        result = result + chr(value & 0xff)
+        value >>= 8
+    return result
+
+
+def symbol_code_int(code):
+    value = 0
+    for c in reversed(code):
+        value = (value << 8) | ord(c)
+    return value
+
+
+class Reader():
+    '''Sequential reader of binary data.
+    '''
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def remaining(self):
+        return len(self.data) - self.pos
+
+    def read(self, size):
+        if self.remaining() < size:
+            raise errors.Error('''
+            The binary data ends unexpectedly.
+            ''')
+        self.pos += size
+        return self.data[self.pos - size:self.pos]
+
+    def unpack(self, format_):
+        return struct.unpack(format_, self.read(struct.calcsize(format_)))[0]
+
+    def varuint32(self):
+        value = 0
+        shift = 0
+        while True:
+            byte = self.read(1)[0]
+            value |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value
+
+
+def varuint32(value):
+    result = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            result.append(byte | 0x80)
+        else:
+            result.append(byte)
+            return bytes(result)
+
+
+def read_varint32(reader):
+    value = reader.varuint32()
+    return (value >> 1) ^ -(value & 1)
+
+
+def read_bytes(reader):
+    return reader.read(reader.varuint32()).hex()
+
+
+def read_string(reader):
+    return reader.read(reader.varuint32()).decode("utf-8", "replace")
+
+
+def read_symbol(reader):
+    value = reader.unpack("<Q")
+    return "{},{}".format(value & 0xff, symbol_code_string(value >> 8))
+
+
+def read_asset(reader):
+    amount = reader.unpack("<q")
+    precision, code = read_symbol(reader).split(",")
+    precision = int(precision)
+    sign = "-" if amount < 0 else ""
+    amount = abs(amount)
+    if precision:
+        number = "{}.{}".format(
+            amount // 10 ** precision,
+            str(amount % 10 ** precision).rjust(precision, "0"))
+    else:
+        number = str(amount)
+    return "{}{} {}".format(sign, number, code)
+
+
+def read_time_point(reader):
+    microseconds = reader.unpack("<q")
+    return time_string(
+        microseconds // 1000000, (microseconds // 1000) % 1000)
+
+
+def read_block_timestamp(reader):
+    milliseconds = reader.unpack("<I") * 500 + BLOCK_TIMESTAMP_EPOCH_MS
+    return time_string(milliseconds // 1000, milliseconds % 1000)
+
+
+def write_bytes(value):
+    data = bytes.fromhex(value) if isinstance(value, str) else bytes(value)
+    return varuint32(len(data)) + data
+
+
+def write_string(value):
+    data = value.encode("utf-8")
+    return varuint32(len(data)) + data
+
+
+def write_symbol(value):
+    precision, code = value.split(",")
+    return struct.pack("<Q", int(precision) | symbol_code_int(code) << 8)
+
+
+def write_asset(value):
+    number, code = value.split()
+    integer, _, fraction = number.partition(".")
+    amount = int(integer + fraction)
+    return struct.pack("<q", amount) \
+                            + write_symbol("{},{}".format(len(fraction), code))
+
+
+def write_time_point(value):
+    seconds, milliseconds = time_seconds(value)
+    return struct.pack("<q", (seconds * 1000 + milliseconds) * 1000)
+
+
+def write_block_timestamp(value):
+    seconds, milliseconds = time_seconds(value)
+    return struct.pack("<I", (seconds * 1000 + milliseconds \
+                                        - BLOCK_TIMESTAMP_EPOCH_MS) // 500)
+
+
+# The built-in types: the reader and the writer, if any, of each.
+BUILTINS = {
+    "bool": (lambda reader: reader.read(1)[0] != 0,
+                lambda value: b"\1" if value else b"\0"),
+    "varuint32": (lambda reader: reader.varuint32(), varuint32),
+    "varint32": (read_varint32,
+                lambda value: varuint32((value << 1) ^ (value >> 31))),
+    "int128": (lambda reader: int.from_bytes(reader.read(16), "little",
+                signed=True),
+                lambda value: int(value).to_bytes(16, "little", signed=True)),
+    "uint128": (lambda reader: int.from_bytes(reader.read(16), "little"),
+                lambda value: int(value).to_bytes(16, "little")),
+    "float128": (lambda reader: reader.read(16).hex(), bytes.fromhex),
+    "name": (lambda reader: int_to_name(reader.unpack("<Q")),
+                lambda value: struct.pack("<Q", name_to_int(str(value)))),
+    "bytes": (read_bytes, write_bytes),
+    "string": (read_string, write_string),
+    "time_point": (read_time_point, write_time_point),
+    "time_point_sec": (lambda reader: time_string(reader.unpack("<I")),
+                lambda value: struct.pack("<I", time_seconds(value)[0])),
+    "block_timestamp_type": (read_block_timestamp, write_block_timestamp),
+    "symbol": (read_symbol, write_symbol),
+    "symbol_code": (lambda reader: symbol_code_string(reader.unpack("<Q")),
+                lambda value: struct.pack("<Q", symbol_code_int(value))),
+    "asset": (read_asset, write_asset),
+    "public_key": (lambda reader: key_string(
+                "PUB", reader.read(1)[0], reader.read(PUBLIC_KEY_SIZE)), None),
+    "signature": (lambda reader: key_string(
+                "SIG", reader.read(1)[0], reader.read(SIGNATURE_SIZE)), None),
+}
+for type_, format_ in FIXED.items():
+    BUILTINS[type_] = (
+        lambda reader, format_=format_: reader.unpack(format_),
+        lambda value, format_=format_: struct.pack(format_, value))
+for type_, size in CHECKSUMS.items():
+    BUILTINS[type_] = (
+        lambda reader, size=size: reader.read(size).hex(), bytes.fromhex)
+
+
+class AbiSerializer():
+    '''Serializer of the types defined with an ABI.
+
+    Args:
+        abi (dict): The ABI, as returned by the *get abi* command.
+    '''
+    def __init__(self, abi):
+        self.abi = abi
+        self.aliases = {item["new_type_name"]: item["type"] \
+                                            for item in abi.get("types", [])}
+        self.structs = {item["name"]: item for item in abi.get("structs", [])}
+        self.variants = {
+                    item["name"]: item for item in abi.get("variants", [])}
+        self.actions = {
+                    item["name"]: item["type"] for item in abi.get("actions", [])}
+        self.tables = {
+                    item["name"]: item["type"] for item in abi.get("tables", [])}
+
+    def resolve(self, type_):
+        while type_ in self.aliases:
+            type_ = self.aliases[type_]
+        return type_
+
+    def action_type(self, action):
+        '''Return the type of the data of an action, or *None* if the ABI does
+        not define the action.
+        '''
+        return self.actions.get(action)
+
+    def table_type(self, table):
+        '''Return the type of the rows of a table, or *None* if the ABI does
+        not define the table.
+        '''
+        return self.tables.get(table)
+
+    def fields(self, type_):
+        struct_ = self.structs[type_]
+        fields = struct_["fields"]
+        if struct_.get("base"):
+            fields = self.fields(self.resolve(struct_["base"])) + fields
+        return fields
+
+    def unknown(self, type_):
+        return errors.Error('''
+        The type ``{}`` is not defined with the ABI.
+        '''.format(type_))
+
+    def decode(self, type_, data):
+        '''Return the value of the given type, decoded from binary data.
+
+        Args:
+            type_ (str): The type, as named with the ABI.
+            data (bytes or str): The data, or its hexadecimal representation.
+        '''
+        if isinstance(data, str):
+            data = bytes.fromhex(data)
+        return self.read(Reader(data), type_)
+
+    def read(self, reader, type_):
+        type_ = self.resolve(type_)
+        if type_.endswith("$"):
+            return self.read(reader, type_[:-1]) if reader.remaining() \
+                                                                    else None
+        if type_.endswith("?"):
+            return self.read(reader, type_[:-1]) if reader.read(1)[0] \
+                                                                    else None
+        if type_.endswith("[]"):
+            return [self.read(reader, type_[:-2]) \
+                                    for i in range(reader.varuint32())]
+        if type_ in self.variants:
+            types = self.variants[type_]["types"]
+            index = reader.varuint32()
+            if index >= len(types):
+                raise errors.Error('''
+                The index {} is out of the types of the variant ``{}``.
+                '''.format(index, type_))
+            return [types[index], self.read(reader, types[index])]
+        if type_ in self.structs:
+            value = {}
+            for field in self.fields(type_):
+                if field["type"].endswith("$") and not reader.remaining():
+                    break
+                value[field["name"]] = self.read(reader, field["type"])
+            return value
+        if type_ in BUILTINS:
+            return BUILTINS[type_][0](reader)
+        raise self.unknown(type_)
+
+    def encode(self, type_, value):
+        '''Return the binary data of a value of the given type.
+
+        Keys and signatures cannot be encoded.
+
+        Args:
+            type_ (str): The type, as named with the ABI.
+            value: The value, as returned by :func:`decode`.
+        '''
+        type_ = self.resolve(type_)
+        if type_.endswith("$"):
+            return b"" if value is None else self.encode(type_[:-1], value)
+        if type_.endswith("?"):
+            return b"\0" if value is None \
+                            else b"\1" + self.encode(type_[:-1], value)
+        if type_.endswith("[]"):
+            return varuint32(len(value)) + b"".join(
+                        [self.encode(type_[:-2], item) for item in value])
+        if type_ in self.variants:
+            name, item = value
+            return varuint32(self.variants[type_]["types"].index(name)) \
+                                                    + self.encode(name, item)
+        if type_ in self.structs:
+            data = b""
+            for field in self.fields(type_):
+                if field["type"].endswith("$") \
+                                        and value.get(field["name"]) is None:
+                    break
+                data = data + self.encode(field["type"], value[field["name"]])
+            return data
+        if type_ in BUILTINS and BUILTINS[type_][1]:
+            return BUILTINS[type_][1](value)
+        if type_ in BUILTINS:
+            raise errors.Error('''
+            The values of the type ``{}`` cannot be encoded.
+            '''.format(type_))
+        raise self.unknown(type_)
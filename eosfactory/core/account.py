@@ -91,8 +91,9 @@ class GetAccount(cleos.GetAccount):
 
 
 class RestoreAccount(cleos.RestoreAccount):
-    def __init__(self, name):
-        cleos.RestoreAccount.__init__(self, name, is_verbose=False)
+    def __init__(self, name, account_json=None):
+        cleos.RestoreAccount.__init__(
+                        self, name, is_verbose=False, account_json=account_json)
 
 
 class CreateAccount(cleos.CreateAccount):
@@ -107,12 +108,13 @@ class CreateAccount(cleos.CreateAccount):
             max_cpu_usage=0,
             max_net_usage=0,
             ref_block=None,
-            delay_sec=0):
+            delay_sec=0,
+            verify=True):
         cleos.CreateAccount.__init__(
             self, creator, name, owner_key, active_key, permission,
             expiration_sec, skip_sign, dont_broadcast, force_unique,
             max_cpu_usage, max_net_usage,
-            ref_block, delay_sec, is_verbose=False
+            ref_block, delay_sec, is_verbose=False, verify=verify
             )
 
 
@@ -0,0 +1,250 @@
+'''Record and replay of *cleos* commands.
+
+A :class:`.Cassette` object records each *cleos* command executed, with the
+stdout and stderr responses, to a cassette file. A later run replays the
+cassette, without any node, so that reruns of unchanged tests are fast and
+deterministic::
+
+    cassette = cassette.Cassette("tests/cassettes/hello_world.json.gz")
+    cassette.install() # replays if the file exists, otherwise records
+    reset()
+    ...
+    stop()
+    cassette.uninstall() # saves the recording
+
+Requests are matched by their arguments, with random values, that are
+account names, keys, wallet passwords and transaction ids, replaced with
+canonical names, like *<account:2>*, numbered in the order the values
+appear. Hence, an account created with a new random name, in the replay,
+matches the one created in the recording. Random values appearing in
+responses, like new keys, are replayed as recorded.
+
+If the same request is made many times, its responses are replayed in the
+order of the recording; the last one repeats.
+'''
+import os
+import re
+import gzip
+import json
+
+import eosfactory.core.errors as errors
+import eosfactory.core.setup as setup
+
+RECORD = "record"
+REPLAY = "replay"
+VERSION = 1
+NAME_BOUNDARY = r"[\w\.]"
+PLACEHOLDER = re.compile(r"<(account|key|password|trx):\d+>")
+# Values introduced with requests, by command, as the indices of positionals:
+INTRODUCED_ARGS = {
+    ("create", "account"): [1],
+    ("system", "newaccount"): [1]
+}
+# Values introduced with responses:
+INTRODUCED = [
+    ("key", re.compile(r"Private key: (\S+)")),
+    ("key", re.compile(r"Public key: (\S+)")),
+    ("password", re.compile(r'^"(\S+)"$', re.MULTILINE)),
+    ("trx", re.compile(r'"transaction_id": "(\w+)"')),
+    ("trx", re.compile(r"executed transaction: (\w+)"))
+]
+# Option values matched with any value:
+WILDCARDS = ["--password"]
+
+
+class Canon():
+    '''Mapping between random values and their canonical names.
+    '''
+    def __init__(self):
+        self.names = {}
+        self.values = {}
+        self.counts = {}
+        self.pattern = None
+
+    def introduce(self, kind, value):
+        if value in self.names or PLACEHOLDER.match(value):
+            return self.names.get(value, value)
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        name = "<{}:{}>".format(kind, self.counts[kind])
+        self.names[value] = name
+        self.values[name] = value
+        self.pattern = None
+        return name
+
+    def canonical(self, text):
+        '''Replace known values with their canonical names.
+        '''
+        if not self.names:
+            return text
+        if self.pattern is None:
+            self.pattern = re.compile(
+                "(?<!{0})({1})(?!{0})".format(
+                    NAME_BOUNDARY,
+                    "|".join([re.escape(value) for value in sorted(
+                                        self.names, key=len, reverse=True)])))
+        return self.pattern.sub(lambda m: self.names[m.group(1)], text)
+
+    def actual(self, text, recorded_values):
+        '''Replace canonical names with values. Names not known yet take
+        the recorded values.
+        '''
+        def value(match):
+            name = match.group(0)
+            if not name in self.values:
+                recorded = recorded_values.get(name, name)
+                self.names[recorded] = name
+                self.values[name] = recorded
+                self.counts[match.group(1)] = max(
+                    self.counts.get(match.group(1), 0), int(name[1:-1].split(
+                                                                ":")[1]))
+                self.pattern = None
+            return self.values[name]
+        return PLACEHOLDER.sub(value, text)
+
+
+class Cassette():
+    '''Recording of *cleos* commands.
+
+    Args:
+        path (str): The cassette file. If it ends with *.gz*, the file is
+            compressed.
+        mode (str): *record* or *replay*. If not set, the cassette is
+            replayed if the file exists, otherwise it is recorded.
+
+    Attributes:
+        interactions (list): The *[command group, command, canonical args,
+            stdout, stderr]* records.
+    '''
+    def __init__(self, path, mode=None):
+        self.path = path
+        self.mode = mode if mode else (
+                                    REPLAY if os.path.exists(path) else RECORD)
+        if not self.mode in [RECORD, REPLAY]:
+            raise errors.Error('''
+            The cassette mode is either ``{}`` or ``{}``, not ``{}``.
+            '''.format(RECORD, REPLAY, self.mode))
+
+        self.canon = Canon()
+        self.interactions = []
+        self.recorded_values = {}
+        self.queues = {}
+        self.previous = None
+        if self.mode == REPLAY:
+            self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            raise errors.Error('''
+            The cassette file does not exist:
+            {}
+            '''.format(self.path))
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(self.path, "rt") as f:
+            cassette = json.load(f)
+        self.recorded_values = cassette["values"]
+        self.interactions = cassette["interactions"]
+        for command_group, command, args, out, err in self.interactions:
+            self.queues.setdefault(
+                key(command_group, command, args), []).append((out, err))
+
+    def save(self):
+        '''Write the recording to the cassette file.
+        '''
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(self.path, "wt") as f:
+            json.dump({
+                "version": VERSION,
+                "values": self.canon.values,
+                "interactions": self.interactions
+            }, f, separators=(",", ":"))
+
+    def canonical_args(self, command_group, command, args):
+        for index in INTRODUCED_ARGS.get((command_group, command), []):
+            if index < len(args):
+                self.canon.introduce("account", args[index])
+        result = []
+        for i, arg in enumerate(args):
+            if i and args[i - 1] in WILDCARDS:
+                arg = "*"
+            result.append(self.canon.canonical(arg))
+        return result
+
+    def record(self, command_group, command, args, out, err):
+        '''Record a command with its responses; see
+        :func:`.core.cleos.set_recorder`.
+        '''
+        args = self.canonical_args(command_group, command, args)
+        for text in [out, err]:
+            for kind, pattern in INTRODUCED:
+                for value in pattern.findall(text):
+                    self.canon.introduce(kind, value)
+        self.interactions.append([
+            command_group, command, args,
+            self.canon.canonical(out), self.canon.canonical(err)])
+
+    def execute(self, command_group, command, args):
+        '''Replay the responses to a command; see
+        :func:`.core.cleos.set_backend`.
+        '''
+        args = self.canonical_args(command_group, command, args)
+        queue = self.queues.get(key(command_group, command, args))
+        if not queue:
+            return "", "ERROR: The cassette has no record of ``{} {} {}``.\n"\
+                                .format(command_group, command, " ".join(args))
+        out, err = queue.pop(0) if len(queue) > 1 else queue[0]
+        return self.canon.actual(out, self.recorded_values), \
+                                self.canon.actual(err, self.recorded_values)
+
+    def reset(self):
+        pass
+
+    def remove_wallets(self, prefix):
+        pass
+
+    def install(self):
+        '''Start recording or replaying.
+
+        The chain cache, see :mod:`.core.chain_cache`, is disabled, so that
+        all the commands are recorded.
+        '''
+        import eosfactory.core.cleos as cleos
+        import eosfactory.core.mock_chain as mock_chain
+
+        if self.previous is not None:
+            return self
+        self.previous = (cleos.backend(), setup.is_chain_cache)
+        setup.is_chain_cache = False
+        if self.mode == RECORD:
+            cleos.set_recorder(self)
+        else:
+            mock_chain.make_wallet_dir()
+            cleos.set_backend(self)
+        return self
+
+    def uninstall(self):
+        '''Stop recording or replaying; save the recording.
+        '''
+        import eosfactory.core.cleos as cleos
+
+        if self.previous is None:
+            return
+        backend, setup.is_chain_cache = self.previous
+        self.previous = None
+        if self.mode == RECORD:
+            cleos.set_recorder(None)
+            self.save()
+        else:
+            cleos.set_backend(backend)
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, type, value, traceback):
+        self.uninstall()
+
+
+def key(command_group, command, args):
+    return json.dumps([command_group, command, args])
@@ -0,0 +1,282 @@
+'''On-disk cache of irreversible blocks and transactions.
+
+Blocks, and transactions, below the last irreversible block never change.
+They are stored in a *sqlite* file, one per chain id, in the directory given
+with :func:`.core.config.chain_cache_dir`, indexed with block numbers, block
+ids and transaction ids. When the size of the cache exceeds the limit given
+with :func:`.core.config.chain_cache_size_mb`, the least recently used
+entries are removed.
+
+The cache is used by :class:`.core.cleos_get.GetBlock` and
+:class:`.core.cleos.GetTransaction` if the flag *setup.is_chain_cache* is set.
+'''
+import os
+import time
+import zlib
+import threading
+
+import eosfactory.core.logger as logger
+import eosfactory.core.config as config
+import eosfactory.core.setup as setup
+
+EVICTION_RATIO = 0.9
+EVICTION_BATCH = 256
+# The interval between the requests for the last irreversible block, in
+# seconds, the block interval:
+LIB_REFRESH_INTERVAL = 0.5
+
+
+class ChainCache():
+    '''A store of irreversible blocks and transactions of one chain.
+
+    Args:
+        path (str): The path to the *sqlite* file of the store. Its directory
+            is made, if it does not exist.
+        size_limit (int): The size limit of the stored data, in bytes.
+    '''
+    def __init__(self, path, size_limit):
+        self.path = path
+        self.size_limit = size_limit
+        self.lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        import sqlite3
+        self.connection = sqlite3.connect(
+                        path, check_same_thread=False, isolation_level=None)
+        self.connection.executescript(\
+'''
+PRAGMA journal_mode=WAL;
+CREATE TABLE IF NOT EXISTS blocks (
+    num INTEGER PRIMARY KEY, id TEXT, data BLOB, size INTEGER, accessed REAL);
+CREATE INDEX IF NOT EXISTS blocks_id ON blocks (id);
+CREATE INDEX IF NOT EXISTS blocks_accessed ON blocks (accessed);
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY, block_num INTEGER, data BLOB, size INTEGER,
+    accessed REAL);
+CREATE INDEX IF NOT EXISTS transactions_accessed ON transactions (accessed);
+''')
+        self.size = self.connection.execute(
+            "SELECT (SELECT IFNULL(SUM(size), 0) FROM blocks)"
+            " + (SELECT IFNULL(SUM(size), 0) FROM transactions)").fetchone()[0]
+
+    def block(self, block_num=None, block_id=None):
+        '''Return the *cleos* response text of a block, or *None*.
+        '''
+        if block_id:
+            return self.get("blocks", "id", block_id)
+        return self.get("blocks", "num", int(block_num))
+
+    def transaction(self, transaction_id):
+        '''Return the *cleos* response text of a transaction, or *None*.
+        '''
+        return self.get("transactions", "id", transaction_id)
+
+    def put_block(self, block_num, block_id, text):
+        self.put("blocks", "num", (int(block_num), block_id), text)
+
+    def put_transaction(self, transaction_id, block_num, text):
+        self.put("transactions", "id", (transaction_id, int(block_num)), text)
+
+    def get(self, table, column, key):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT rowid, data FROM {} WHERE {} = ?".format(table, column),
+                (key,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE {} SET accessed = ? WHERE rowid = ?".format(table),
+                (time.time(), row[0]))
+        return zlib.decompress(row[1]).decode("ISO-8859-1")
+
+    def put(self, table, column, keys, text):
+        data = zlib.compress(text.encode("ISO-8859-1"))
+        with self.lock:
+            # A replaced entry does not count any more:
+            row = self.connection.execute(
+                "SELECT size FROM {} WHERE {} = ?".format(table, column),
+                (keys[0],)).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO {} VALUES (?, ?, ?, ?, ?)".format(table),
+                keys + (data, len(data), time.time()))
+            self.size += len(data) - (row[0] if row else 0)
+            if self.size > self.size_limit:
+                self.evict()
+
+    def evict(self):
+        '''Remove the least recently used entries, until the size of the
+        cache is reduced below the given fraction of the limit.
+        '''
+        while self.size > self.size_limit * EVICTION_RATIO:
+            rows = self.connection.execute(
+                "SELECT 'blocks', rowid, size, accessed FROM blocks UNION ALL"
+                " SELECT 'transactions', rowid, size, accessed FROM transactions"
+                " ORDER BY accessed LIMIT ?", (EVICTION_BATCH,)).fetchall()
+            if not rows:
+                self.size = 0
+                break
+            for table, rowid, size, _ in rows:
+                self.connection.execute(
+                    "DELETE FROM {} WHERE rowid = ?".format(table), (rowid,))
+                self.size -= size
+                if self.size <= self.size_limit * EVICTION_RATIO:
+                    break
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+__stores = {}
+__last_irreversible_block_num = {}
+__last_irreversible_refreshed = {}
+__lock = threading.Lock()
+
+
+def store():
+    '''Return the :class:`.ChainCache` object of the current node, or *None*
+    if the cache is not available.
+    '''
+    if not setup.is_chain_cache:
+        return None
+
+    address = setup.nodeos_address()
+    with __lock:
+        if address in __stores:
+            return __stores[address]
+
+        import eosfactory.core.cleos_get as cleos_get
+        try:
+            info = cleos_get.GetInfo(is_verbose=False)
+            __last_irreversible_block_num[address] \
+                                            = info.last_irreversible_block_num
+            __last_irreversible_refreshed[address] = time.time()
+            path = os.path.join(
+                config.chain_cache_dir(), "{}{}.sqlite".format(
+                    setup.url_prefix(address), info.json["chain_id"][:16]))
+            __stores[address] = ChainCache(
+                            path, config.chain_cache_size_mb() * 1024 * 1024)
+        except Exception as e:
+            logger.TRACE('''
+            The chain cache is not available:
+            {}
+            '''.format(str(e)), translate=False)
+            __stores[address] = None
+
+        return __stores[address]
+
+
+def is_irreversible(block_num):
+    '''Check whether the given block is irreversible in the current node.
+
+    The number of the last irreversible block is requested at most once in
+    the interval *LIB_REFRESH_INTERVAL*.
+    '''
+    address = setup.nodeos_address()
+    if block_num <= __last_irreversible_block_num.get(address, 0):
+        return True
+    if time.time() - __last_irreversible_refreshed.get(address, 0) \
+                                                    < LIB_REFRESH_INTERVAL:
+        return False
+
+    import eosfactory.core.cleos_get as cleos_get
+    __last_irreversible_refreshed[address] = time.time()
+    __last_irreversible_block_num[address] = cleos_get.GetInfo(
+                                is_verbose=False).last_irreversible_block_num
+    return block_num <= __last_irreversible_block_num[address]
+
+
+def block(block_num=None, block_id=None):
+    '''Return the cached *cleos* response text of a block, or *None*.
+    '''
+    cache = store()
+    if cache is None:
+        return None
+    import sqlite3
+    try:
+        return cache.block(block_num, block_id)
+    except sqlite3.Error:
+        return None
+
+
+def put_block(block_json, text):
+    '''Store the given block, if it is irreversible.
+
+    Args:
+        block_json (dict): The block JSON.
+        text (str): The *cleos* response text of the block.
+    '''
+    cache = store()
+    if cache is None or not is_irreversible(block_json["block_num"]):
+        return
+    import sqlite3
+    try:
+        cache.put_block(block_json["block_num"], block_json["id"], text)
+    except sqlite3.Error:
+        pass
+
+
+def transaction(transaction_id):
+    '''Return the cached *cleos* response text of a transaction, or *None*.
+    '''
+    cache = store()
+    if cache is None:
+        return None
+    import sqlite3
+    try:
+        return cache.transaction(transaction_id)
+    except sqlite3.Error:
+        return None
+
+
+def put_transaction(transaction_json, text):
+    '''Store the given transaction, if its block is irreversible.
+
+    Args:
+        transaction_json (dict): The transaction JSON.
+        text (str): The *cleos* response text of the transaction.
+    '''
+    cache = store()
+    if cache is None or not "block_num" in transaction_json \
+                    or not is_irreversible(transaction_json["block_num"]):
+        return
+    import sqlite3
+    try:
+        cache.put_transaction(
+            transaction_json["id"], transaction_json["block_num"], text)
+    except sqlite3.Error:
+        pass
+
+
+def remove(address=None):
+    '''Close and delete the stores of the given node.
+
+    Args:
+        address (str): The URL of the node. If not set, the current node.
+    '''
+    if address is None:
+        address = setup.nodeos_address()
+    if not address:
+        return
+
+    with __lock:
+        cache = __stores.pop(address, None)
+        __last_irreversible_block_num.pop(address, None)
+        __last_irreversible_refreshed.pop(address, None)
+        if cache:
+            cache.close()
+
+    try:
+        cache_dir = config.chain_cache_dir()
+        if not os.path.exists(cache_dir):
+            return
+        prefix = setup.url_prefix(address)
+        for file in os.listdir(cache_dir):
+            if file.startswith(prefix):
+                os.remove(os.path.join(cache_dir, file))
+    except Exception as e:
+        logger.TRACE('''
+        Cannot remove the chain cache:
+        {}
+        '''.format(str(e)), translate=False)
@@ -2,7 +2,6 @@
 '''
 import sys
 import json
-import argparse
 import eosfactory.core.utils as utils
 import eosfactory.core.config as config
 
@@ -431,6 +430,8 @@ Default workspace is not set, or it does not exist.{}
             and version1.split(".")[1] == version2.split(".")[1]
 
 def main():
+    import argparse
+
     parser = argparse.ArgumentParser(description='''
     Check whether installation conditions are fulfilled.
     ''')
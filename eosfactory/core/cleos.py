@@ -1,7 +1,5 @@
 import subprocess
 import json
-import pathlib
-import random
 import os
 import re
 
@@ -10,15 +8,89 @@ import eosfactory.core.logger as logger
 import eosfactory.core.config as config
 import eosfactory.core.setup as setup
 import eosfactory.core.interface as interface
+import eosfactory.core.chain_cache as chain_cache
+import eosfactory.core.read_cache as read_cache
+import eosfactory.core.traces as traces
+import eosfactory.core.resources as resources
+import eosfactory.core.spans as spans
 
 
 def set_local_nodeos_address_if_none():
     if not setup.nodeos_address():
         setup.set_nodeos_address(
             "http://" + config.http_server_address())
-        setup.is_local_address = True
+        setup.session().is_local_address = True
 
-    return setup.is_local_address
+    return setup.session().is_local_address
+
+
+__backend = None
+__recorder = None
+
+
+def set_backend(backend):
+    '''Replace *EOSIO cleos* with a backend object, or restore it.
+
+    The backend has the method *execute(command_group, command, args)*,
+    returning the texts of the stdout and stderr streams, as *EOSIO cleos*
+    would print them. Also, it has the methods *reset()*, called instead of
+    a clean start of the local node, and *remove_wallets(prefix)*, called
+    when wallet files of a testnet are removed. Optionally, it has the method
+    *head_block_num()*, used by the follower of the read cache, see
+    :mod:`.core.read_cache`. See :class:`.core.mock_chain.MockChain`.
+
+    Args:
+        backend: The backend, or *None* to restore *EOSIO cleos*.
+    '''
+    global __backend
+    __backend = backend
+
+
+def backend():
+    '''Return the backend set with :func:`.set_backend`, or *None*.
+    '''
+    return __backend
+
+
+def set_recorder(recorder):
+    '''Set an object observing all the executed *cleos* commands, or unset
+    it.
+
+    The recorder has the method 
+    *record(command_group, command, args, stdout, stderr)*. See 
+    :class:`.core.cassette.Cassette`.
+
+    Args:
+        recorder: The recorder, or *None*.
+    '''
+    global __recorder
+    __recorder = recorder
+
+
+def execute(command_line, command_group, command, args):
+    '''Execute a *cleos* command, with the backend if set, otherwise with 
+    *EOSIO cleos*.
+
+    Returns:
+        tuple: The texts of the stdout and stderr streams.
+    '''
+    backend_ = __backend
+    if backend_ is not None:
+        out, err = backend_.execute(command_group, command, args)
+    else:
+        process = subprocess.run(
+            command_line,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            # A bare executable name, found on the PATH, has no directory:
+            cwd=os.path.dirname(config.cli_exe()) or None)
+        out = process.stdout.decode("ISO-8859-1")
+        err = process.stderr.decode("ISO-8859-1")
+
+    recorder = __recorder
+    if recorder is not None:
+        recorder.record(command_group, command, args, out, err)
+    return out, err
 
 
 # http://www.sphinx-doc.org/domains.html#info-field-lists
@@ -50,7 +122,7 @@ class Cleos():
         self.is_verbose = is_verbose
         self.args = args
 
-        cl = [config.cli_exe()]
+        cl = [config.cli_exe() if backend() is None else "cleos"]
         set_local_nodeos_address_if_none()
         cl.extend(["--url", setup.nodeos_address()])
 
@@ -60,7 +132,8 @@ class Cleos():
             cl.append("--print-response")
 
         cl.append(command_group)
-        cl.extend(re.sub(re.compile(r'\s+'), ' ', command.strip()).split(" "))
+        command = re.sub(re.compile(r'\s+'), ' ', command.strip())
+        cl.extend(command.split(" "))
         cl.extend(args)
 
         if setup.is_save_command_lines:
@@ -70,28 +143,40 @@ class Cleos():
             print(" ".join(cl))
             print("")
             
-        while True:
-            process = subprocess.run(
-                cl,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                cwd=str(pathlib.Path(config.cli_exe()).parent)) 
-
-            self.out_msg = process.stdout.decode("ISO-8859-1")
-            self.out_msg_details = process.stderr.decode("ISO-8859-1")
-            self.err_msg = None
-            error_key_words = ["ERROR", "Error", "error", "Failed"]
-            for word in error_key_words:
-                if word in self.out_msg_details:
-                    self.err_msg = self.out_msg_details
-                    self.out_msg_details = None
+        span = spans.span(
+                    "{} {}".format(command_group, command), command_group)
+        cached = read_cache.lookup(command_group, command, args)
+        if cached:
+            self.out_msg, self.out_msg_details = cached
+            span.set(cached=True)
+            span.end()
+        else:
+            head_block = read_cache.head_block()
+            while True:
+                self.out_msg, self.out_msg_details = execute(
+                                                cl, command_group, command, args)
+                self.err_msg = None
+                error_key_words = ["ERROR", "Error", "error", "Failed"]
+                for word in error_key_words:
+                    if word in self.out_msg_details:
+                        self.err_msg = self.out_msg_details
+                        self.out_msg_details = None
+                        break
+
+                if not self.err_msg or self.err_msg and \
+                        not "Transaction took too long" in self.err_msg:
                     break
 
-            if not self.err_msg or self.err_msg and \
-                    not "Transaction took too long" in self.err_msg:
-                break
-
-        errors.validate(self)
+            span.set(
+                bytes_in=len(" ".join(cl)), 
+                bytes_out=len(self.out_msg) + len(self.err_msg \
+                            if self.err_msg else self.out_msg_details))
+            span.end(spans.ERROR if self.err_msg else None)
+            read_cache.on_command(command_group, command)
+            errors.validate(self)
+            read_cache.store(
+                command_group, command, args, head_block, 
+                self.out_msg, self.out_msg_details)
         
         if not self.err_msg \
                     and (setup.is_print_request or setup.is_print_response):
@@ -108,6 +193,25 @@ class Cleos():
         except:
             pass        
 
+    def set_response(self, args, out_msg, is_verbose=True):
+        '''Set the object as if *EOSIO cleos* responded with the given 
+        message, for example, a cached one.
+
+        Args:
+            args (list): List of *EOSIO cleos* positionals and options.
+            out_msg (str): Responce received via the stdout stream.
+            is_verbose (bool): If set, a message is printed.
+        '''
+        self.out_msg = out_msg
+        self.out_msg_details = None
+        self.err_msg = None
+        self.is_verbose = is_verbose
+        self.args = args
+        try:
+            self.json = json.loads(out_msg)
+        except:
+            self.json = {}
+
     def printself(self, is_verbose=False):
         '''Print a message.
 
@@ -181,6 +285,22 @@ def common_parameters(
     pass
 
 
+def permission_keys(account_json):
+    '''Return the *owner* and *active* public keys, or *None*, of the given 
+    *get account* response.
+    '''
+    owner_key = None
+    active_key = None
+    for permission in account_json["permissions"]:
+        if permission["required_auth"]["keys"]:
+            key = permission["required_auth"]["keys"][0]["key"]
+            if permission["perm_name"] == "owner":
+                owner_key = key
+            if permission["perm_name"] == "active":
+                active_key = key
+    return owner_key, active_key
+
+
 class GetAccount(interface.Account, Cleos):
     '''Retrieve an account from the blockchain.
 
@@ -204,14 +324,7 @@ class GetAccount(interface.Account, Cleos):
         self.active_key = None
         try:
             if not is_info:
-                permissions = self.json["permissions"]
-                for permission in permissions:
-                    if permission["required_auth"]["keys"]:
-                        key = permission["required_auth"]["keys"][0]["key"]
-                        if permission["perm_name"] == "owner":
-                            self.owner_key = key
-                        if permission["perm_name"] == "active":
-                            self.active_key = key                   
+                self.owner_key, self.active_key = permission_keys(self.json)
             else:
                 owner = re.search(r'owner\s+1\:\s+1\s(.*)\n', self.out_msg)
                 active = re.search(r'active\s+1\:\s+1\s(.*)\n', self.out_msg)
@@ -245,8 +358,13 @@ class GetTransaction(Cleos):
         args = [transaction_id]
         if block_hint:
             args.extend(["--block-hint", str(block_hint)])
-        Cleos.__init__(
-            self, args, "get", "transaction", is_verbose)
+        text = chain_cache.transaction(transaction_id)
+        if text:
+            Cleos.set_response(self, args, text, is_verbose)
+        else:
+            Cleos.__init__(
+                self, args, "get", "transaction", is_verbose)
+            chain_cache.put_transaction(self.json, self.out_msg)
 
         self.printself()
 
@@ -505,9 +623,21 @@ class CreateKey(interface.Key, Cleos):
 
 
 class RestoreAccount(GetAccount):
+    '''Retrieve an existing account.
 
-    def __init__(self, account, is_verbose=True):
-        GetAccount.__init__(self, account, is_verbose=False, is_info=False)
+    Args:
+        account (str or .interface.Account): The account to retrieve.
+        is_verbose (bool): If *False* do not print. Default is *True*.
+        account_json (dict): If set, the *get account* response already
+            retrieved, then the blockchain is not queried.
+    '''
+    def __init__(self, account, is_verbose=True, account_json=None):
+        if account_json is None:
+            GetAccount.__init__(self, account, is_verbose=False, is_info=False)
+        else:
+            interface.Account.__init__(self, interface.account_arg(account))
+            Cleos.set_response(
+                self, [self.name, "--json"], json.dumps(account_json), False)
 
         self.name = self.json["account_name"]
         self.owner_key = ""
@@ -528,6 +658,10 @@ class CreateAccount(interface.Account, Cleos):
             otherwise random.
         active_key (str): If set, the active public key for the new account, 
             otherwise random.
+        verify (bool): If set, the account is retrieved from the blockchain
+            after creation, and the *json* attribute is the *get account*
+            response. Otherwise, it is the transaction response. Default is
+            *True*.
 
     See definitions of the remaining parameters: \
     :func:`.cleos.common_parameters`.
@@ -544,7 +678,8 @@ class CreateAccount(interface.Account, Cleos):
             max_net_usage=0,
             ref_block=None,
             delay_sec=0,
-            is_verbose=True
+            is_verbose=True,
+            verify=True
             ):
 
         if name is None: 
@@ -593,7 +728,9 @@ class CreateAccount(interface.Account, Cleos):
         Cleos.__init__(
             self, args, "create", "account", is_verbose)
             
-        self.json = GetAccount(self.name, is_verbose=False, is_info=False).json
+        if verify:
+            self.json = GetAccount(
+                            self.name, is_verbose=False, is_info=False).json
         self.printself()
             
     def __str__(self):
@@ -603,6 +740,7 @@ class CreateAccount(interface.Account, Cleos):
 def account_name():
     '''Get a random EOSIO account name.
     '''
+    import random
     letters = "abcdefghijklmnopqrstuvwxyz12345"
     name = ""
     for i in range(0, 12):
@@ -664,6 +802,12 @@ class PushAction(Cleos):
             components of EOSIO cleos responce.
         act (str): Summary of all actions, like \
             *eosio.null::nonce <= 5d0a572c49880500*.
+        traces (.core.traces.TraceTree): The trace tree of the transaction, 
+            if broadcast. Both *console* and *act* are rendered from the tree 
+            when first read.
+        transaction_id (str): The ID of the transaction, if broadcast.
+        block_num (int): The number of the block the transaction was executed
+            in by the node, if broadcast.
     '''
     def __init__(
             self, account, action, data,
@@ -704,31 +848,59 @@ class PushAction(Cleos):
                         
         Cleos.__init__(self, args, "push", "action", is_verbose)
 
-        self.console = ""
-        self.act = ""
+        self.traces = None
+        self.transaction_id = None
+        self.block_num = None
         if not dont_broadcast:
-            
-            for act in self.json["processed"]["action_traces"]:
-                self.console += gather_console_output(act)
-
-            for trace in self.json["processed"]["action_traces"]:
-                if trace["act"]["data"]:
-                    if self.act:
-                        self.act += "\n"
-                    self.act += "{} <= {}::{} {}".format( 
-                                                        trace["act"]["account"], 
-                                                        trace["act"]["account"],
-                                                        trace["act"]["name"],
-                                                        trace["act"]["data"])
+            self.traces = traces.TraceTree(
+                                    self.json["processed"]["action_traces"])
+            self.transaction_id = self.json["transaction_id"]
+            self.block_num = self.json["processed"]["block_num"]
+            resources.record(
+                            self.account_name, action, self.json["processed"])
+
         self.printself()
 
+    @property
+    def console(self):
+        return self.traces.console if self.traces else ""
+
+    @property
+    def act(self):
+        return self.traces.act if self.traces else ""
+
+    def wait(self, irreversible=False, timeout=None):
+        '''Wait until the transaction is included in a block.
+
+        Args:
+            irreversible (bool): If set, wait until the block is irreversible.
+            timeout (float): If set, the deadline in seconds, otherwise 
+                the default of :func:`.cleos_get.wait_for_transaction`.
+
+        Returns:
+            int: The number of the block including the transaction.
+
+        Raises:
+            .core.errors.WaitTimeoutError: If the deadline is exceeded.
+        '''
+        import eosfactory.core.cleos_get as cleos_get
+
+        if not self.transaction_id:
+            raise errors.Error('''
+            The transaction has not been broadcast.
+            ''')
+        if timeout is None:
+            timeout = cleos_get.WAIT_TIMEOUT
+        if irreversible:
+            return cleos_get.wait_for_irreversible(
+                                self.transaction_id, self.block_num, timeout)
+        return cleos_get.wait_for_transaction(
+                                self.transaction_id, self.block_num, timeout)
+
 def gather_console_output(act, padding=""):
-    PADDING = "  "
-    console = ""
-    if len(act["console"]) > 0:
-        console += padding + act["act"]["account"] + "@" + act["act"]["name"] + ":\n"
-        console += padding + act["console"].replace("\n", "\n" + padding) + "\n"
-
-    for inline in act["inline_traces"]:
-        console += gather_console_output(inline, padding + PADDING)
-    return (console + "\n").rstrip()
+    '''Render the console output of an action trace and its inline actions.
+
+    See :func:`.core.traces.render_console`.
+    '''
+    return traces.render_console(
+            [traces.ActionTrace(act, depth=len(padding) // len(traces.PADDING))])
@@ -1,9 +1,16 @@
 
 import json
+import time
 
+import eosfactory.core.errors as errors
 import eosfactory.core.logger as logger
+import eosfactory.core.utils as utils
 import eosfactory.core.interface as interface
 import eosfactory.core.cleos as cleos
+import eosfactory.core.chain_cache as chain_cache
+
+WAIT_POLL_INTERVAL = 0.05
+WAIT_TIMEOUT = 30
 
 
 class GetInfo(cleos.Cleos):
@@ -79,9 +86,14 @@ class GetBlock(cleos.Cleos):
     :return: A :class:`eosfactory.core.cleos.Cleos` object.
     '''
     def __init__(self, block_number, block_id=None, is_verbose=True):
-        cleos.Cleos.__init__(
-                        self, [block_id] if block_id else [str(block_number)], 
-                        "get", "block", is_verbose)
+        args = [block_id] if block_id else [str(block_number)]
+        text = chain_cache.block(block_number, block_id)
+        if text:
+            cleos.Cleos.set_response(self, args, text, is_verbose)
+        else:
+            cleos.Cleos.__init__(self, args, "get", "block", is_verbose)
+            chain_cache.put_block(self.json, self.out_msg)
+
         self.printself()
 
     def __str__(self):
@@ -106,6 +118,69 @@ def get_block_trx_count(block_num):
     return len(trxs)
 
 
+def blocks(start, end, concurrency=8):
+    '''Iterate over a range of blocks.
+
+    The blocks are requested in parallel, with at most *concurrency* requests 
+    pending at a time, while they are yielded in the order of block numbers.
+
+    Args:
+        start (int): The number of the first block.
+        end (int): The number of the last block, inclusive.
+        concurrency (int): The number of pending requests. Default is 8.
+
+    Yields:
+        dict: The JSON of a block.
+    '''
+    def get_block(block_num):
+        return GetBlock(block_num, is_verbose=False).json
+
+    return utils.ordered_map(get_block, range(start, end + 1), concurrency)
+
+
+def trx_count(block):
+    '''Return the number of transactions in the given block JSON.
+    '''
+    return len(block["transactions"])
+
+
+def action_count(block):
+    '''Return the number of actions in the given block JSON.
+
+    Transactions represented in the block with their ID only, as deferred 
+    ones are, are not counted.
+    '''
+    count = 0
+    for trx in block["transactions"]:
+        if isinstance(trx["trx"], dict):
+            transaction = trx["trx"]["transaction"]
+            count += len(transaction["actions"]) \
+                + len(transaction.get("context_free_actions", []))
+    return count
+
+
+def block_trx_counts(start, end, concurrency=8):
+    '''List the numbers of transactions in a range of blocks.
+
+    See :func:`.blocks`.
+
+    Returns:
+        list: The numbers of transactions, one item per block.
+    '''
+    return [trx_count(block) for block in blocks(start, end, concurrency)]
+
+
+def block_action_counts(start, end, concurrency=8):
+    '''List the numbers of actions in a range of blocks.
+
+    See :func:`.blocks` and :func:`.action_count`.
+
+    Returns:
+        list: The numbers of actions, one item per block.
+    '''
+    return [action_count(block) for block in blocks(start, end, concurrency)]
+
+
 class GetAccounts(cleos.Cleos):
     '''Retrieve accounts associated with a public key.
 
@@ -161,6 +236,27 @@ class GetCode(cleos.Cleos):
         self.printself()
 
 
+class GetAbi(cleos.Cleos):
+    '''Retrieve the ABI of a contract.
+
+    Args:
+        account (str or .interface.Account): The account of the contract.
+        is_verbose (bool): If *False* do not print. Default is *True*.
+
+    Attributes:
+        abi (dict): The ABI, empty if the account has no contract.
+    '''
+    def __init__(self, account, is_verbose=True):
+        cleos.Cleos.__init__(
+            self, [interface.account_arg(account)], "get", "abi", is_verbose)
+
+        self.abi = self.json
+        self.printself()
+
+    def __str__(self):
+        return json.dumps(self.json, sort_keys=True, indent=4)
+
+
 class GetTable(cleos.Cleos):
     '''Retrieve the contents of a database table
 
@@ -200,7 +296,7 @@ class GetTable(cleos.Cleos):
         args = [interface.account_arg(account)]
 
         if not scope:
-            scope=account
+            scope_name = interface.account_arg(account)
         else:
             try:
                 scope_name = scope.name
@@ -232,3 +328,295 @@ class GetTable(cleos.Cleos):
         cleos.Cleos.__init__(self, args, "get", "table", is_verbose)
 
         self.printself()
+
+
+def table_pages(
+        account, table, scope,
+        page_size=100, lower="", upper="", index="",
+        key_type="", encode_type="", reverse=False, show_payer=False):
+    '''Iterate over a database table, page by page.
+
+    Follow the *more* / *next_key* continuation of the *get table* response.
+    The next page is requested in the background while the caller consumes 
+    the current one, hence at most two pages are kept in memory.
+
+    Args:
+        page_size (int): The maximum number of rows in a page. Default is 100.
+
+    See definitions of the remaining parameters: :class:`.GetTable`.
+
+    Yields:
+        :class:`.GetTable`: One page of the table, rows are in 
+        *json["rows"]*.
+
+    Raises:
+        .core.errors.Error: If the node reports that there are more rows, 
+            but it does not report the *next_key*.
+    '''
+    def get_page(lower, upper):
+        return GetTable(
+                    account, table, scope,
+                    False, 
+                    page_size, lower, upper, index,
+                    key_type, encode_type, reverse, show_payer,
+                    is_verbose=False)
+
+    import concurrent.futures
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(
+                                utils.bind_context(get_page), lower, upper)
+        while future:
+            page = future.result()
+            future = None
+
+            if page.json.get("more"):
+                next_key = page.json.get("next_key")
+                if not next_key:
+                    raise errors.Error('''
+        The node reports more rows in the table ``{}``, but it does not report 
+        the ``next_key`` continuation.
+                    '''.format(table))
+                if reverse:
+                    upper = next_key
+                else:
+                    lower = next_key
+                future = executor.submit(
+                                utils.bind_context(get_page), lower, upper)
+
+            yield page
+
+
+def table_rows(
+        account, table, scope,
+        page_size=100, lower="", upper="", index="",
+        key_type="", encode_type="", reverse=False, show_payer=False):
+    '''Iterate over the rows of a database table.
+
+    See :func:`.table_pages`.
+
+    Yields:
+        dict: A row of the table.
+    '''
+    for page in table_pages(
+            account, table, scope,
+            page_size, lower, upper, index,
+            key_type, encode_type, reverse, show_payer):
+        for row in page.json["rows"]:
+            yield row
+
+
+class GetScope(cleos.Cleos):
+    '''Retrieve a list of scopes and tables owned by a contract.
+
+    Args:
+        contract (str or .interface.Account): The contract who owns the table.
+        table (str): If set, the table name to filter.
+        limit (int): The maximum number of rows to return. Default is 10.
+        lower (str): If set, the lower bound of scope, defaults to first.
+        upper (str): If set, the upper bound of scope, defaults to last.
+        reverse (bool): Iterate in reverse order.
+        is_verbose (bool): If *False* do not print. Default is *True*.
+
+    Attributes:
+        rows (list): The retrieved list of *code, scope, table, payer, count* 
+            records.
+        more (str): If set, the lower bound of the next page of scopes.
+    '''
+    def __init__(
+            self, contract, table="", limit=10, lower="", upper="", 
+            reverse=False, is_verbose=True):
+        args = [interface.account_arg(contract)]
+
+        if table:
+            args.extend(["--table", table])
+        if limit:
+            args.extend(["--limit", str(limit)])
+        if lower:
+            args.extend(["--lower", lower])
+        if upper:
+            args.extend(["--upper", upper])
+        if reverse:
+            args.append("--reverse")
+
+        cleos.Cleos.__init__(self, args, "get", "scope", is_verbose)
+
+        self.rows = self.json["rows"]
+        self.more = self.json.get("more")
+        self.printself()
+
+    def __str__(self):
+        return json.dumps(self.json, sort_keys=True, indent=4)
+
+
+def scopes(code, table="", page_size=100, lower=""):
+    '''Iterate over the scopes of a contract table.
+
+    Args:
+        code (str or .interface.Account): The contract who owns the table.
+        table (str): If set, the table name to filter.
+        page_size (int): The maximum number of scopes fetched with a single 
+            request. Default is 100.
+        lower (str): If set, the first scope, defaults to first.
+
+    Yields:
+        str: A scope name.
+    '''
+    while True:
+        page = GetScope(code, table, page_size, lower, is_verbose=False)
+        for row in page.rows:
+            yield row["scope"]
+
+        if not page.more or page.more == lower:
+            break
+        lower = page.more
+
+
+def scan_all_scopes(code, table, concurrency=4, page_size=100):
+    '''Iterate over the rows of a contract table, in all its scopes.
+
+    The scopes are enumerated with :func:`.scopes`, and the rows of at most
+    *concurrency* scopes are fetched at a time, in parallel.
+
+    Args:
+        code (str or .interface.Account): The contract who owns the table.
+        table (str): The name of the table.
+        concurrency (int): The number of scopes fetched in parallel. Default 
+            is 4.
+        page_size (int): The maximum number of rows fetched with a single 
+            request. Default is 100.
+
+    Yields:
+        (str, dict): A scope name and a row of the table in this scope.
+    '''
+    return scan_scopes(
+                code, table, scopes(code, table, page_size), concurrency, 
+                page_size)
+
+
+def scan_scopes(code, table, scopes, concurrency=4, page_size=100):
+    '''Iterate over the rows of a contract table, in the given scopes.
+
+    The rows of at most *concurrency* scopes are fetched at a time, in 
+    parallel.
+
+    Args:
+        code (str or .interface.Account): The contract who owns the table.
+        table (str): The name of the table.
+        scopes (iterable): The scope names.
+
+    See definitions of the remaining parameters: :func:`.scan_all_scopes`.
+
+    Yields:
+        (str, dict): A scope name and a row of the table in this scope.
+    '''
+    def get_rows(scope):
+        return (scope, list(table_rows(code, table, scope, page_size)))
+
+    for scope, rows in utils.ordered_map(get_rows, scopes, concurrency):
+        for row in rows:
+            yield (scope, row)
+
+
+def wait_for_block(block_num, timeout=WAIT_TIMEOUT, irreversible=False):
+    '''Wait until the head block of the node reaches the given block.
+
+    Args:
+        block_num (int): The number of the block.
+        timeout (float): The deadline, in seconds. Default is 30.
+        irreversible (bool): If set, wait until the last irreversible block 
+            reaches the given block.
+
+    Returns:
+        :class:`.GetInfo`: The node information received last.
+
+    Raises:
+        .core.errors.WaitTimeoutError: If the deadline is exceeded.
+    '''
+    deadline = time.time() + timeout
+    while True:
+        info = GetInfo(is_verbose=False)
+        if (info.last_irreversible_block_num if irreversible \
+                                    else info.head_block) >= block_num:
+            return info
+
+        if time.time() > deadline:
+            raise errors.WaitTimeoutError('''
+            The {} block has not reached the block {} in {} seconds.
+            '''.format(
+                "last irreversible" if irreversible else "head", 
+                block_num, timeout))
+        time.sleep(WAIT_POLL_INTERVAL)
+
+
+def is_transaction_in_block(transaction_id, block):
+    '''Check whether the given block JSON contains the given transaction.
+    '''
+    for trx in block["transactions"]:
+        trx_id = trx["trx"]["id"] if isinstance(trx["trx"], dict) \
+                                                                else trx["trx"]
+        if trx_id == transaction_id:
+            return True
+    return False
+
+
+def wait_for_transaction(
+        transaction_id, block_num=None, timeout=WAIT_TIMEOUT):
+    '''Wait until the given transaction is included in a block.
+
+    Blocks are scanned as soon as they are produced, starting with the given 
+    block.
+
+    Args:
+        transaction_id (str): The ID of the transaction.
+        block_num (int): The block this transaction may be in, for example
+            *["processed"]["block_num"]* of a *push* response. If not set, 
+            scanning starts with the block following the last irreversible 
+            one.
+        timeout (float): The deadline, in seconds. Default is 30.
+
+    Returns:
+        int: The number of the block including the transaction.
+
+    Raises:
+        .core.errors.WaitTimeoutError: If the deadline is exceeded.
+    '''
+    deadline = time.time() + timeout
+    if block_num is None:
+        block_num = GetInfo(is_verbose=False).last_irreversible_block_num + 1
+
+    while True:
+        info = wait_for_block(block_num, max(0, deadline - time.time()))
+        for block in blocks(block_num, info.head_block):
+            if is_transaction_in_block(transaction_id, block):
+                return block["block_num"]
+        block_num = info.head_block + 1
+
+        if time.time() > deadline:
+            raise errors.WaitTimeoutError('''
+            The transaction {} has not been included in a block in {} seconds.
+            '''.format(transaction_id, timeout))
+
+
+def wait_for_irreversible(
+        transaction_id, block_num=None, timeout=WAIT_TIMEOUT):
+    '''Wait until the given transaction is included in an irreversible block.
+
+    See :func:`.wait_for_transaction`.
+
+    Returns:
+        int: The number of the irreversible block including the transaction.
+
+    Raises:
+        .core.errors.WaitTimeoutError: If the deadline is exceeded.
+    '''
+    deadline = time.time() + timeout
+    while True:
+        block_num = wait_for_transaction(
+            transaction_id, block_num, max(0, deadline - time.time()))
+        wait_for_block(
+            block_num, max(0, deadline - time.time()), irreversible=True)
+
+        # The block could have been forked out in the meantime:
+        if is_transaction_in_block(
+                transaction_id, GetBlock(block_num, is_verbose=False).json):
+            return block_num
@@ -1,6 +1,5 @@
 import os
 import stat
-import argparse
 import json
 import re
 import subprocess
@@ -42,17 +41,22 @@ eosfactory_data_ = ("EOSFACTORY_DATA_DIR",
             [])
 node_address_ = ("LOCAL_NODE_ADDRESS", [LOCALHOST_HTTP_ADDRESS])
 wallet_address_ = ("WALLET_MANAGER_ADDRESS", [LOCALHOST_HTTP_ADDRESS])
+state_history_endpoint_ = ("STATE_HISTORY_ENDPOINT", ["127.0.0.1:8080"])
 
 genesis_json_ = ("EOSIO_GENESIS_JSON", [None])
 nodeos_config_dir_ = ("NODEOS_CONFIG_DIR", [None])
 nodeos_data_dir_ = ("NODEOS_DATA_DIR", [None])
 nodeos_options_ = ("NODEOS_OPTIONS", [])
+nodeos_profile_ = ("NODEOS_PROFILE", ["default"])
+nodeos_ramdisk_dir_ = ("NODEOS_RAMDISK_DIR", ["/dev/shm/eosfactory/"])
 
 keosd_wallet_dir_ = ("KEOSD_WALLET_DIR", ["${HOME}/eosio-wallet/"])
 chain_state_db_size_mb_ = ("EOSIO_SHARED_MEMORY_SIZE_MB", ["300"])
 
 wsl_root_ = ("WSL_ROOT", [None])
 nodeos_stdout_ = ("NODEOS_STDOUT", [None])
+chain_cache_dir_ = ("CHAIN_CACHE_DIR", [None])
+chain_cache_size_mb_ = ("CHAIN_CACHE_SIZE_MB", ["100"])
 includes_ = ("INCLUDE", "includes")
 libs_ = ("LIBS", "libs")
 
@@ -456,6 +460,40 @@ def nodeos_stdout():
     return config_value(nodeos_stdout_)
 
 
+def chain_cache_dir():
+    '''The directory of the on-disk cache of irreversible blocks and 
+    transactions.
+
+    If not set, it is the *cache* subdirectory of the data directory, see
+    :func:`.eosfactory_data`, or the *cache* subdirectory of 
+    `.config.TMP`, if the data directory is not writable.
+
+    It may be changed with 
+    *CHAIN_CACHE_DIR* entry in the *config.json* file, 
+    see :func:`.current_config`.
+
+    The directory is made when the cache is first opened, see 
+    :class:`.core.chain_cache.ChainCache`.
+    '''
+    path = config_value(chain_cache_dir_)
+    if not path:
+        path = os.path.join(eosfactory_data(), "cache")
+        if not os.access(eosfactory_data(), os.W_OK):
+            path = os.path.join(TMP, "cache")
+    return path
+
+
+def chain_cache_size_mb():
+    '''The size limit of the on-disk cache of irreversible blocks and 
+    transactions.
+
+    It may be changed with 
+    *CHAIN_CACHE_SIZE_MB* entry in the *config.json* file, 
+    see :func:`.current_config`.
+    '''
+    return int(config_value_checked(chain_cache_size_mb_))
+
+
 def http_server_address():
     '''The http/https URL where local *nodeos* is running.
 
@@ -466,6 +504,17 @@ def http_server_address():
     return config_value_checked(node_address_)
 
 
+def state_history_endpoint():
+    '''The address where the state history plugin of the local *nodeos*
+    listens to websocket connections.
+
+    The setting may be changed with 
+    *STATE_HISTORY_ENDPOINT* entry in the *config.json* file, 
+    see :func:`.current_config`.
+    '''
+    return config_value_checked(state_history_endpoint_)
+
+
 def http_wallet_address():
     '''The http/https URL where keosd is running.
 
@@ -844,7 +893,7 @@ def nodeos_data_dir():
     *NODEOS_DATA_DIR* entry in the *config.json* file, 
     see :func:`.current_config`.
     '''
-    return nodeos_data_dir_[1][0]
+    return config_value(nodeos_data_dir_)
     
 
 def nodeos_config_dir():
@@ -854,13 +903,48 @@ def nodeos_config_dir():
     *NODEOS_CONFIG_DIR* entry in the *config.json* file, 
     see :func:`.current_config`.
     '''
-    return nodeos_config_dir_[1][0]
+    return config_value(nodeos_config_dir_)
 
 
 def nodeos_options():
+    '''The list of options added to the command line of the local *nodeos*.
+
+    It may be changed with 
+    *NODEOS_OPTIONS* entry in the *config.json* file, 
+    see :func:`.current_config`. The entry is a list of options, or a string
+    of options, taken as one item.
     '''
+    options = config_value(nodeos_options_) or []
+    if isinstance(options, str):
+        return [options]
+    return list(options)
+
+
+def nodeos_profile():
+    '''The name of the profile of the command line of the local *nodeos*.
+
+    The profiles are listed in :attr:`.core.teos.PROFILES`: *default*,
+    *bench*, with a minimal overhead for throughput measurement, *debug*, with
+    verbose errors and the history of actions, and *ramdisk*, with the node
+    data on *tmpfs*.
+
+    It may be changed with 
+    *NODEOS_PROFILE* entry in the *config.json* file, 
+    see :func:`.current_config`. The *profile* argument of 
+    :func:`.core.manager.reset` prevails.
     '''
-    return nodeos_options_[1]
+    return config_value_checked(nodeos_profile_)
+
+
+def nodeos_ramdisk_dir():
+    '''The *tmpfs* directory of the data of the local *nodeos*, if the
+    *ramdisk* profile is set, see :func:`.nodeos_profile`.
+
+    It may be changed with 
+    *NODEOS_RAMDISK_DIR* entry in the *config.json* file, 
+    see :func:`.current_config`.
+    '''
+    return config_value_checked(nodeos_ramdisk_dir_)
 
 
 def genesis_json():
@@ -1122,6 +1206,10 @@ def current_config(contract_dir=None, dont_set_workspace=False):
         map[chain_state_db_size_mb_[0]] = chain_state_db_size_mb()
     except:
         map[chain_state_db_size_mb_[0]] = None
+    try:
+        map[state_history_endpoint_[0]] = state_history_endpoint()
+    except:
+        map[state_history_endpoint_[0]] = None
     try:
         map[contract_workspace_dir_[0]] = contract_workspace_dir(
                                                             dont_set_workspace)
@@ -1176,11 +1264,18 @@ def current_config(contract_dir=None, dont_set_workspace=False):
     map[nodeos_config_dir_[0]] = nodeos_config_dir()
     map[nodeos_data_dir_[0]] = nodeos_data_dir()
     map[nodeos_options_[0]] = nodeos_options()
+    map[nodeos_profile_[0]] = nodeos_profile()
+    map[nodeos_ramdisk_dir_[0]] = nodeos_ramdisk_dir()
 
     map["EOSIO_VERSION"] = eosio_version()
     map["EOSIO_CDT_VERSION"] = eosio_cdt_version()
 
     map[nodeos_stdout_[0]] = nodeos_stdout()
+    try:
+        map[chain_cache_dir_[0]] = chain_cache_dir()
+    except:
+        map[chain_cache_dir_[0]] = None
+    map[chain_cache_size_mb_[0]] = chain_cache_size_mb()
     
     if contract_dir:
         contract_dir = contract_dir(contract_dir)
@@ -1258,6 +1353,7 @@ def main():
         --json                  Bare config JSON and exit.
         --workspace WORKSPACE   Set contract workspace and exit.
     '''
+    import argparse
 
     parser = argparse.ArgumentParser(description='''
     Show the configuration of EOSFactory or set contract workspace.
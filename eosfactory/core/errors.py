@@ -32,6 +32,8 @@ def validate(omittable):
         raise MissingRequiredAuthorityError(err_msg)
     elif "Duplicate transaction" in err_msg:
         raise DuplicateTransactionError(err_msg)
+    elif "Expired Transaction" in err_msg or "expired_tx_exception" in err_msg:
+        raise ExpiredTransactionError(err_msg)
     
     #######################################################################
     # NOT ERRORS
@@ -61,9 +63,8 @@ class Error(Exception):
         else:
             sys.excepthook = excepthook
             sys.tracebacklimit = 0
-            from inspect import getframeinfo, stack
-            frameinfo = getframeinfo(stack()[stack_frame][0])
-            details = " {} {}".format(frameinfo.filename, frameinfo.lineno) 
+            frame = sys._getframe(stack_frame)
+            details = " {} {}".format(frame.f_code.co_filename, frame.f_lineno) 
             self.message = logger.error(message, translate, details=details)
             Exception.__init__(self, self.message)
 
@@ -141,4 +142,31 @@ class MissingRequiredAuthorityError(Error):
 class DuplicateTransactionError(Error):
     def __init__(self, message):
         Error.__init__(
-            self, message, True)
\ No newline at end of file
+            self, message, True)
+
+
+class ExpiredTransactionError(Error):
+    def __init__(self, message):
+        Error.__init__(
+            self, message, True)
+
+
+class WaitTimeoutError(Error):
+    def __init__(self, message):
+        Error.__init__(
+            self, message, True)
+
+
+class CostRegressionError(Error):
+    '''Costs of actions regressed, see :func:`.core.resources.check`.
+
+    Attributes:
+        regressions ([str]): The regressions.
+    '''
+    def __init__(self, regressions, threshold):
+        self.regressions = regressions
+        Error.__init__(
+            self, 
+            "Action costs regressed by more than {:.0%}:\n{}"
+            .format(threshold, "\n".join(regressions)), 
+            False)
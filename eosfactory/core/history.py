@@ -0,0 +1,168 @@
+'''Crawler of the action history of an account.
+
+The history is fetched in windows of *get actions* requests, issued
+concurrently, and the actions are yielded as a stream, in the order of their
+account sequence numbers, with overlapping windows deduplicated::
+
+    for action in history.crawl(host, checkpoint="host.checkpoint"):
+        ...
+
+With a checkpoint file, the progress is saved after each window, so that an
+interrupted crawl resumes with the first window not completed: the actions of
+this window yielded before the interruption are yielded again. The checkpoint
+file is deleted when the crawl completes.
+
+Note that the node has to keep the history, see the *debug* profile of the
+local node, :func:`.core.config.nodeos_profile`.
+'''
+import eosfactory.core.errors as errors
+import eosfactory.core.utils as utils
+import eosfactory.core.interface as interface
+import eosfactory.core.cleos_get as cleos_get
+
+WINDOW = 100
+CONCURRENCY = 4
+
+
+def get_actions(account, pos, offset):
+    return cleos_get.GetActions(
+                        account, pos, offset, json=True, is_verbose=False).json
+
+
+def last_sequence(account):
+    '''Return the account sequence number of the last action of the account,
+    or -1 if there is not any.
+    '''
+    actions = get_actions(account, -1, -1)["actions"]
+    return max([action["account_action_seq"] for action in actions]) \
+                                                            if actions else -1
+
+
+def decode(action):
+    '''Return a flat view of an action, as returned by the *get actions*
+    command.
+
+    Returns:
+        dict: The account sequence number, *seq*, the global sequence number,
+        *global_seq*, *block_num*, *block_time*, *receiver*, *account*, *name*,
+        *authorization*, as a list of *actor@permission* strings, *data*,
+        decoded with the ABI if the node could, *trx_id*, and *console*.
+    '''
+    trace = action["action_trace"]
+    act = trace["act"]
+    receipt = trace.get("receipt") or {}
+    return {
+        "seq": action["account_action_seq"],
+        "global_seq": action["global_action_seq"],
+        "block_num": action["block_num"],
+        "block_time": action["block_time"],
+        "receiver": receipt.get("receiver", trace.get("receiver")),
+        "account": act["account"],
+        "name": act["name"],
+        "authorization": ["{}@{}".format(
+                                item["actor"], item["permission"]) \
+                                    for item in act.get("authorization", [])],
+        "data": act.get("data"),
+        "trx_id": trace.get("trx_id"),
+        "console": trace.get("console", "")
+    }
+
+
+class HistoryCrawler():
+    '''Crawler of the action history of an account.
+
+    Args:
+        account (str or .interface.Account): The account.
+        window (int): The number of actions fetched with a single request.
+            Default is 100.
+        concurrency (int): The number of requests issued in parallel. Default
+            is 4.
+        checkpoint (str): If set, the file the progress is saved to, and
+            resumed from.
+        start (int): The account sequence number of the first action. Default
+            is 0.
+        end (int): If set, the account sequence number of the last action,
+            otherwise the last action at the start of the crawl.
+        is_decoded (bool): If set, the actions are yielded as returned by
+            :func:`.decode`, otherwise as returned by the node. Default is
+            *True*.
+
+    Attributes:
+        next (int): The account sequence number of the next action.
+        count (int): The number of actions yielded.
+        duplicates (int): The number of duplicates dropped.
+    '''
+    def __init__(
+            self, account, window=WINDOW, concurrency=CONCURRENCY,
+            checkpoint=None, start=0, end=None, is_decoded=True):
+        self.account = interface.account_arg(account)
+        self.window = max(1, int(window))
+        self.concurrency = concurrency
+        self.checkpoint = utils.Checkpoint(checkpoint) if checkpoint else None
+        self.next = start
+        self.end = end
+        self.is_decoded = is_decoded
+        self.count = 0
+        self.duplicates = 0
+
+        state = self.checkpoint.load() if self.checkpoint else None
+        if state:
+            if not state["account"] == self.account:
+                raise errors.Error('''
+                The checkpoint file
+                    {}
+                is of the history of the account ``{}``, not ``{}``.
+                '''.format(self.checkpoint.path, state["account"],
+                                                                self.account))
+            self.next = state["next"]
+            self.end = state["end"]
+
+    def windows(self):
+        for pos in range(self.next, self.end + 1, self.window):
+            yield pos, min(self.window, self.end + 1 - pos) - 1
+
+    def __iter__(self):
+        if self.end is None:
+            self.end = last_sequence(self.account)
+
+        for (pos, offset), response in zip(
+                self.windows(), utils.ordered_map(
+                    lambda window: get_actions(self.account, *window),
+                    self.windows(), self.concurrency)):
+            actions = sorted(
+                response["actions"],
+                key=lambda action: action["account_action_seq"])
+            for action in actions:
+                seq = action["account_action_seq"]
+                if seq < self.next or seq > pos + offset:
+                    # Overlaps of the windows:
+                    self.duplicates += 1
+                    continue
+                self.next = seq + 1
+                self.count += 1
+                yield decode(action) if self.is_decoded else action
+
+            self.next = max(self.next, pos + offset + 1)
+            if self.checkpoint:
+                self.checkpoint.save({
+                    "account": self.account,
+                    "next": self.next,
+                    "end": self.end
+                })
+
+        if self.checkpoint:
+            self.checkpoint.remove()
+
+
+def crawl(
+        account, window=WINDOW, concurrency=CONCURRENCY, checkpoint=None,
+        start=0, end=None, is_decoded=True):
+    '''Iterate over the action history of an account.
+
+    See :class:`.HistoryCrawler` for the arguments.
+
+    Yields:
+        dict: An action.
+    '''
+    return iter(HistoryCrawler(
+        account, window, concurrency, checkpoint, start, end, is_decoded))
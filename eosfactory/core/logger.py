@@ -1,6 +1,6 @@
 import enum
 import re
-import inspect
+import sys
 from textwrap import dedent
 
 
@@ -37,9 +37,21 @@ def verbosity(set_verbosity):
     __verbosity = set_verbosity
 
 
+def is_verbose(verbosity, set_verbosity=None):
+    '''Check whether messages of the given verbosity are printed.
+
+    Args:
+        verbosity (.core.logger.Verbosity): The verbosity of messages.
+        set_verbosity ([.core.logger.Verbosity]): If set, the verbosity list
+            to check, otherwise the value set with the function 
+            :func:`.core.logger.verbosity`.
+    '''
+    return verbosity in \
+                (set_verbosity if not set_verbosity is None else __verbosity)
+
+
 def COMMENT(msg):
-    frame = inspect.stack()[1][0]
-    test_name = inspect.getframeinfo(frame).function
+    test_name = sys._getframe(1).f_code.co_name
     color = Verbosity.COMMENT.value
     cprint(
         "\n###  " + test_name + ":\n" + condition(msg) + "\n",
@@ -13,6 +13,7 @@ import eosfactory.core.setup as setup
 import eosfactory.core.teos as teos
 import eosfactory.core.cleos as cleos
 import eosfactory.core.cleos_get as cleos_get
+import eosfactory.core.chain_cache as chain_cache
 
 
 def reboot():
@@ -33,7 +34,11 @@ def clear_testnet_cache():
     Removing testnet cache for prefix `{}`
     '''.format(setup.file_prefix()))
 
-    teos.kill_keosd() # otherwise the manager may protects the wallet files
+    backend = cleos.backend()
+    if backend is None:
+        teos.kill_keosd() # otherwise the manager may protects the wallet files
+    else:
+        backend.remove_wallets(setup.file_prefix())
     wallet_dir = config.keosd_wallet_dir()
     files = os.listdir(wallet_dir)
     try:
@@ -111,16 +116,24 @@ class Transaction():
 
 def is_local_testnet():
     cleos.set_local_nodeos_address_if_none()
-    return setup.is_local_address
+    return setup.session().is_local_address
+
 
+def node_start(
+        clear=False, nodeos_stdout=None, state_history=False, profile=None):
+    # An in-process chain, see :mod:`.core.mock_chain`, replaces the node:
+    backend = cleos.backend()
+    if backend is not None:
+        if clear:
+            backend.reset()
+        return
 
-def node_start(clear=False, nodeos_stdout=None):
     WAIT_TIME = 0.6
     try_count = 3
 
     while(True):
         try:
-            teos.node_start(clear, nodeos_stdout)
+            teos.node_start(clear, nodeos_stdout, state_history, profile)
             teos.node_probe()
             return
         except Exception as e:
@@ -132,10 +145,10 @@ def node_start(clear=False, nodeos_stdout=None):
 
             time.sleep(WAIT_TIME)
                     
-    teos.on_nodeos_error(clear)
+    teos.on_nodeos_error(clear, state_history, profile)
 
 
-def reset(nodeos_stdout=None):
+def reset(nodeos_stdout=None, state_history=False, profile=None):
     ''' Start clean the local EOSIO node.
 
     The procedure addresses problems with instabilities of EOSIO *nodeos* 
@@ -180,6 +193,12 @@ def reset(nodeos_stdout=None):
             the configuration of EOSFactory, see :func:`.core.config.nodeos_stdout`.
             If the file is set with the configuration, and in the same time 
             it is set with this argument, the argument setting prevails. 
+        state_history (bool): If set, the state history plugin of the node is
+            enabled, so that table deltas and traces can be streamed, see
+            :mod:`.core.state_history`.
+        profile (str): If set, the profile of the command line of the node,
+            *default*, *bench*, *debug* or *ramdisk*, see
+            :func:`.core.config.nodeos_profile`.
     '''
     import eosfactory.shell.account as account
     account.reboot()
@@ -190,10 +209,14 @@ def reset(nodeos_stdout=None):
         '''.format(setup.nodeos_address()))
 
     clear_testnet_cache()
-    node_start(clear=True, nodeos_stdout=nodeos_stdout)
+    # A clean local node has the same chain id, but different blocks:
+    chain_cache.remove()
+    node_start(
+        clear=True, nodeos_stdout=nodeos_stdout, state_history=state_history,
+        profile=profile)
 
 
-def resume(nodeos_stdout=None):
+def resume(nodeos_stdout=None, state_history=False, profile=None):
     ''' Resume the local EOSIO node.
 
     Args:
@@ -202,13 +225,21 @@ def resume(nodeos_stdout=None):
             the configuration of EOSFactory, see :func:`.core.config.nodeos_stdout`.
             If the file is set with the configuration, and in the same time 
             it is set with this argument, the argument setting prevails. 
+        state_history (bool): If set, the state history plugin of the node is
+            enabled, so that table deltas and traces can be streamed, see
+            :mod:`.core.state_history`.
+        profile (str): If set, the profile of the command line of the node,
+            *default*, *bench*, *debug* or *ramdisk*, see
+            :func:`.core.config.nodeos_profile`.
     ''' 
     if not cleos.set_local_nodeos_address_if_none():   
         logger.INFO('''
             Not local nodeos is set: {}
         '''.format(setup.nodeos_address()))
 
-    node_start(nodeos_stdout=nodeos_stdout)
+    node_start(
+        nodeos_stdout=nodeos_stdout, state_history=state_history,
+        profile=profile)
     
 
 
@@ -220,7 +251,8 @@ def stop():
     except:
         pass
     
-    teos.node_stop()
+    if cleos.backend() is None:
+        teos.node_stop()
 
 
 def status():
@@ -278,7 +310,7 @@ editor. Return ``None`` if the the offer is rejected.
     if not wallet_dir_:
         return {}
     
-    path = os.path.join(wallet_dir_, setup.account_map)
+    path = os.path.join(wallet_dir_, setup.session().account_map)
     while True:
         try: # whether the setup map file exists:
             with open(path, "r") as input_file:
@@ -308,11 +340,11 @@ editor. Return ``None`` if the the offer is rejected.
 
 
 def save_account_map(map_):
-    save_map(map_, setup.account_map)
+    save_map(map_, setup.session().account_map)
 
 
 def edit_account_map():
-    edit_map(setup.account_map)
+    edit_map(setup.session().account_map)
 
 
 def save_map(map_, file_name):
@@ -0,0 +1,1332 @@
+'''In-process emulation of a local node and its wallet manager.
+
+A :class:`.MockChain` object replaces *EOSIO cleos*, with the function
+:func:`.core.cleos.set_backend`, so that scripts and tests run unchanged,
+without *nodeos* and *keosd* processes, and each command takes microseconds.
+
+The emulation covers wallets and keys, accounts and their permissions, code
+and ABI storage, and multi-index tables, with rows kept in the order of
+primary keys. Contracts are not executed: their actions are implemented with
+Python functions, registered with the name of the contract, that is the name
+of its WASM file::
+
+    chain = mock_chain.MockChain()
+
+    @chain.action("hello_world", "hi")
+    def hi(context, data):
+        context.require_auth(data["user"])
+        context.print("Hello, ", data["user"])
+
+    chain.install()
+    reset()
+    ...
+    stop()
+    chain.uninstall()
+
+Actions without handler succeed doing nothing, if their contract is set.
+
+A contract directory, with the ABI of the contract and a stub WASM file, can
+be written with the function :func:`.contract_dir`::
+
+    Contract(host, mock_chain.contract_dir("hello_world", abi)).deploy()
+
+A transaction is atomic: if an action fails, changes made to tables by the
+actions of the transaction are reverted. Each transaction is included in a
+new block, that is irreversible at once. CPU and NET usage are synthetic.
+
+Secondary indices of tables are not emulated, while *get table* queries
+the primary index only.
+'''
+import os
+import re
+import json
+import time
+import tempfile
+import copy
+import bisect
+import hashlib
+import threading
+import traceback
+
+import eosfactory.core.config as config
+import eosfactory.core.setup as setup
+import eosfactory.core.abi_serializer as abi_serializer
+
+SYSTEM_ACCOUNTS = ["eosio", "eosio.null", "eosio.prods"]
+CHAIN_ID = hashlib.sha256(b"eosfactory mock chain").hexdigest()
+SERVER_VERSION = "mock"
+CPU_BASE_US = 100
+NET_BASE_WORDS = 12
+RAM_BASE_BYTES = 2996
+EMPTY_HASH = "0" * 64
+EXECUTED = "warning: transaction executed locally, but may not be "\
+                                        "confirmed by the network yet"
+
+
+def primary_key(key):
+    '''Return the *uint64* value of a primary key, given as a number, a
+    string of digits, or an EOSIO name.
+    '''
+    if isinstance(key, int):
+        return key
+    key = str(key)
+    if re.match(r"^\d+$", key):
+        return int(key)
+    return abi_serializer.name_to_int(key)
+
+
+def digest(*items):
+    return hashlib.sha256(
+                    json.dumps(items, sort_keys=True).encode()).hexdigest()
+
+
+def timestamp(seconds):
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) \
+                            + ".{:03d}".format(int(seconds * 1000) % 1000)
+
+
+def make_wallet_dir():
+    '''Create the wallet directory, if it does not exist, as *keosd* does.
+    '''
+    path = config.config_values(config.keosd_wallet_dir_)[0]
+    path = path.replace("${HOME}", os.environ.get("HOME", ""))
+    if not os.path.exists(path):
+        os.makedirs(path)
+    return path
+
+
+def contract_dir(name, abi, path=None):
+    '''Write the directory of a contract implemented with Python functions:
+    a stub source file, the ABI and a stub WASM file, named with the name of
+    the contract, see :meth:`.MockChain.action`.
+
+    Args:
+        name (str): The name of the contract.
+        abi (dict): The ABI of the contract.
+        path (str): If set, the directory, otherwise a new temporary one.
+
+    Returns:
+        str: The directory.
+    '''
+    if path is None:
+        path = tempfile.mkdtemp()
+    for directory in ["src", "build"]:
+        os.makedirs(os.path.join(path, directory), exist_ok=True)
+    with open(os.path.join(path, "src", name + ".cpp"), "w") as f:
+        f.write("// Actions implemented in Python.\n")
+    with open(os.path.join(path, "build", name + ".abi"), "w") as f:
+        json.dump(abi, f)
+    with open(os.path.join(path, "build", name + ".wasm"), "wb") as f:
+        f.write(b"\0asm\1\0\0\0")
+    return path
+
+
+class ActionError(Exception):
+    '''Failure of an action, reported as *EOSIO cleos* reports it.
+
+    Args:
+        message (str): The error message.
+    '''
+    def __init__(self, message):
+        Exception.__init__(self, message)
+        self.message = message
+
+
+def assertion_failure(message):
+    return ActionError('''Error 3050003: eosio_assert_message assertion failure
+Error Details:
+assertion failure with message: {}
+'''.format(message))
+
+
+def missing_authority(account):
+    return ActionError('''Error 3090004: Missing required authority
+Ensure that you have the related authority inside your transaction!;
+If you are currently using 'cleos push action' command, try to add the relevant authority using -p option.
+Error Details:
+missing authority of {}
+'''.format(account))
+
+
+def unsatisfied_authorization(authorization):
+    return ActionError('''Error 3090003: Provided keys, permissions, and delays do not satisfy declared authorizations
+Ensure that you have the related private keys inside your wallet and your wallet is unlocked.
+Error Details:
+transaction declares authority '{}', but does not have signatures for it.
+'''.format(json.dumps(authorization)))
+
+
+def unknown_account(name):
+    return ActionError('''Error 3010001: Invalid name
+Error Details:
+error unknown key (eosio::chain::name): {}
+'''.format(name))
+
+
+class Table():
+    '''A multi-index table, with rows ordered with primary keys.
+
+    Objects of the class are returned with :func:`.ActionContext.table`.
+    Primary keys can be given as numbers, strings of digits, or EOSIO names.
+    Rows are dictionaries; they are copied both ways.
+
+    Args:
+        chain (.MockChain): The chain.
+        code (str): The account of the contract owning the table.
+        scope (str): The scope of the table.
+        name (str): The name of the table.
+        writable (bool): If set, rows can be changed.
+    '''
+    def __init__(self, chain, code, scope, name, writable=True):
+        self.chain = chain
+        self.code = code
+        self.scope = scope
+        self.name = name
+        self.writable = writable
+        self.state = chain.tables.setdefault(
+                                (code, scope, name), {"keys": [], "rows": {}})
+
+    def check_writable(self):
+        if not self.writable:
+            raise ActionError('''Error 3050003: eosio_assert_message assertion failure
+Error Details:
+db access violation: table ``{}`` of ``{}`` is read-only
+'''.format(self.name, self.code))
+
+    def get(self, key, default=None):
+        '''Return a copy of the row with the given primary key, or the default
+        value.
+        '''
+        entry = self.state["rows"].get(primary_key(key))
+        return copy.deepcopy(entry[0]) if entry else default
+
+    def __contains__(self, key):
+        return primary_key(key) in self.state["rows"]
+
+    def emplace(self, key, row, payer=None):
+        '''Insert a new row.
+
+        Args:
+            key: The primary key.
+            row (dict): The row.
+            payer (str): The account paying for RAM, defaults to the code.
+        '''
+        self.check_writable()
+        key = primary_key(key)
+        if key in self.state["rows"]:
+            raise assertion_failure(
+                            "could not insert object, most likely a uniqueness "
+                            "constraint was violated")
+        bisect.insort(self.state["keys"], key)
+        self.state["rows"][key] = (copy.deepcopy(row), payer or self.code)
+        self.chain.journal.append(lambda: self.undo(key, None))
+
+    def modify(self, key, row, payer=None):
+        '''Replace an existing row.
+
+        Args:
+            key: The primary key.
+            row (dict): The new row.
+            payer (str): If set, the new payer.
+        '''
+        self.check_writable()
+        key = primary_key(key)
+        old = self.state["rows"].get(key)
+        if old is None:
+            raise assertion_failure("cannot modify objects in table")
+        self.state["rows"][key] = (copy.deepcopy(row), payer or old[1])
+        self.chain.journal.append(lambda: self.undo(key, old))
+
+    def erase(self, key):
+        '''Remove an existing row.
+        '''
+        self.check_writable()
+        key = primary_key(key)
+        old = self.state["rows"].get(key)
+        if old is None:
+            raise assertion_failure("cannot erase objects in table")
+        self.remove(key)
+        self.chain.journal.append(lambda: self.undo(key, old))
+
+    def remove(self, key):
+        del self.state["rows"][key]
+        del self.state["keys"][bisect.bisect_left(self.state["keys"], key)]
+
+    def undo(self, key, old):
+        if key in self.state["rows"]:
+            self.remove(key)
+        if old is not None:
+            bisect.insort(self.state["keys"], key)
+            self.state["rows"][key] = old
+
+    def items(self):
+        '''Iterate over *(primary key, row)* pairs, in the order of keys.
+        '''
+        for key in list(self.state["keys"]):
+            yield key, copy.deepcopy(self.state["rows"][key][0])
+
+    def __iter__(self):
+        for _, row in self.items():
+            yield row
+
+    def __len__(self):
+        return len(self.state["keys"])
+
+
+class ActionContext():
+    '''The execution context of an action, passed to action handlers.
+
+    Attributes:
+        receiver (str): The account executing the action.
+        code (str): The account of the contract defining the action.
+        name (str): The name of the action.
+        data (dict): The action data.
+        authorization (list): The authorization of the action, like
+            *[{"actor": "alice", "permission": "active"}]*.
+        console (list): The console output.
+    '''
+    def __init__(self, chain, receiver, code, name, data, authorization):
+        self.chain = chain
+        self.receiver = receiver
+        self.code = code
+        self.name = name
+        self.data = data
+        self.authorization = authorization
+        self.console = []
+        self.recipients = []
+        self.inline_actions = []
+
+    def print(self, *values):
+        '''Append the values to the console output, like *eosio::print*.
+        '''
+        self.console.extend([str(value) for value in values])
+
+    def check(self, condition, message):
+        '''Fail the action with the given message if the condition is false,
+        like *eosio::check*.
+        '''
+        if not condition:
+            raise assertion_failure(message)
+
+    def has_auth(self, account):
+        '''Determine whether the action is authorized by the account.
+        '''
+        return any(
+            auth["actor"] == account for auth in self.authorization)
+
+    def require_auth(self, account):
+        '''Fail the action if it is not authorized by the account.
+        '''
+        if not self.has_auth(account):
+            raise missing_authority(account)
+
+    def is_account(self, account):
+        '''Determine whether the account exists.
+        '''
+        return account in self.chain.accounts
+
+    def require_recipient(self, account):
+        '''Notify the account of the action.
+
+        The notification is handled with the handler registered for the
+        contract of the account, with the action name *code::name*.
+        '''
+        if not account in self.recipients and not account == self.receiver:
+            self.recipients.append(account)
+
+    def send_inline(self, account, name, data, permission=None):
+        '''Send an inline action, executed after this one.
+
+        Args:
+            account (str): The account of the contract.
+            name (str): The name of the action.
+            data (dict): The action data.
+            permission (str or list): The authorization, like *alice@active*,
+                defaults to the active permission of the receiver.
+        '''
+        self.inline_actions.append({
+            "account": account,
+            "name": name,
+            "authorization": authorization(
+                            permission if permission else self.receiver),
+            "data": data
+        })
+
+    def table(self, name, scope=None, code=None):
+        '''Return a table; writable only if it is owned by the receiver.
+
+        Args:
+            name (str): The name of the table.
+            scope (str): The scope, defaults to the receiver.
+            code (str): The contract owning the table, defaults to the
+                receiver.
+        '''
+        code = code if code else self.receiver
+        return Table(
+            self.chain, code, scope if scope else self.receiver, name,
+            code == self.receiver)
+
+
+def authorization(permission):
+    '''Convert permissions, like *alice* or *[alice@owner, carol]*, to an
+    action authorization list.
+    '''
+    if isinstance(permission, str):
+        permission = [permission]
+    result = []
+    for perm in permission:
+        actor, _, name = perm.partition("@")
+        result.append({"actor": actor, "permission": name or "active"})
+    return result
+
+
+def parse(args, flags):
+    '''Split *cleos* arguments into positionals and options.
+
+    Args:
+        args (list): The arguments.
+        flags ([str]): The options that do not take a value.
+
+    Returns:
+        tuple: The list of positionals, and the dictionary of options, with
+        lists of values.
+    '''
+    positionals = []
+    options = {}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg.startswith("-") and not re.match(r"^-\d", arg):
+            if arg in flags or i + 1 == len(args):
+                options.setdefault(arg, []).append(True)
+            else:
+                options.setdefault(arg, []).append(args[i + 1])
+                i += 1
+        else:
+            positionals.append(arg)
+        i += 1
+    return positionals, options
+
+
+def option(options, name, default=None, alias=None):
+    values = options.get(name) or (options.get(alias) if alias else None)
+    return values[-1] if values else default
+
+
+FLAGS = [
+    "--json", "-j", "--to-console", "--r1", "--skip-sign", "--dont-broadcast",
+    "-d", "--force-unique", "-f", "--clear", "-c", "--binary", "-b",
+    "--reverse", "-r", "--show-payer", "--full", "--pretty", "--console",
+    "--wasm"]
+
+
+class MockChain():
+    '''An in-process local node with its wallet manager.
+
+    See the module description.
+
+    Args:
+        check_signatures (bool): If set, the declared authorization of a
+            transaction needs keys of unlocked wallets, as with *keosd*.
+            Default is *True*.
+
+    Attributes:
+        accounts (dict): Accounts, by name.
+        tables (dict): Table states, by *(code, scope, table)*.
+        blocks (list): The blocks produced.
+        wallets (dict): Wallets, by name.
+    '''
+    def __init__(self, check_signatures=True):
+        self.check_signatures = check_signatures
+        self.handlers = {}
+        self.key_pairs = {}
+        self.wallets = {}
+        self.previous = None
+        self.lock = threading.RLock()
+        self.register_key(config.eosio_key_private(), config.eosio_key_public())
+        self.reset()
+
+    def reset(self):
+        '''Clear the chain, keeping wallets, like a clean restart of the
+        local node.
+        '''
+        self.accounts = {}
+        self.tables = {}
+        self.transactions = {}
+        self.history = {}
+        self.journal = []
+        self.global_sequence = 0
+        self.blocks = []
+        self.blocks.append(self.block([]))
+        for name in SYSTEM_ACCOUNTS:
+            self.add_account(
+                name, "eosio", config.eosio_key_public(),
+                config.eosio_key_public())
+
+    def install(self):
+        '''Replace *EOSIO cleos* with this object.
+
+        The chain cache, see :mod:`.core.chain_cache`, is disabled, as it
+        relates to the chain id of the local node.
+        '''
+        import eosfactory.core.cleos as cleos
+
+        if self.previous is None:
+            self.previous = (cleos.backend(), setup.is_chain_cache)
+        cleos.set_backend(self)
+        setup.is_chain_cache = False
+        return self
+
+    def uninstall(self):
+        '''Restore the state changed with :func:`.install`.
+        '''
+        import eosfactory.core.cleos as cleos
+
+        if self.previous is None:
+            return
+        backend, setup.is_chain_cache = self.previous
+        cleos.set_backend(backend)
+        self.previous = None
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, type, value, traceback):
+        self.uninstall()
+
+    def action(self, contract, name):
+        '''Decorator registering an action handler.
+
+        The handler is called with an :class:`.ActionContext` object and the
+        action data. It fails the action by raising an exception, for example
+        with :func:`.ActionContext.check`.
+
+        Args:
+            contract (str): The name of the contract, that is the name of its
+                WASM file, or the account of the contract.
+            name (str): The name of the action, or *code::name* for
+                notifications of actions of other contracts.
+        '''
+        def register(function):
+            self.handlers[(contract, name)] = function
+            return function
+        return register
+
+    def register_key(self, private_key, public_key):
+        '''Make the public key of a private key known, so that it can be
+        imported to wallets.
+        '''
+        self.key_pairs[private_key] = public_key
+
+    def public_key(self, private_key):
+        if not private_key in self.key_pairs:
+            self.key_pairs[private_key] = "EOS" + hashlib.sha256(
+                                        private_key.encode()).hexdigest()[:50]
+        return self.key_pairs[private_key]
+
+    ###########################################################################
+    # Chain state
+    ###########################################################################
+
+    @property
+    def head_block(self):
+        return self.blocks[-1]
+
+    def head_block_num(self):
+        '''The head block number, see :func:`.core.read_cache.head_block_num`.
+        '''
+        with self.lock:
+            return self.head_block["block_num"]
+
+    def block(self, transactions):
+        block_num = len(self.blocks) + 1
+        now = time.time()
+        return {
+            "block_num": block_num,
+            "id": "{:08x}".format(block_num) \
+                        + digest(block_num, transactions, now)[8:],
+            "timestamp": timestamp(now),
+            "producer": "eosio",
+            "previous": self.blocks[-1]["id"] if self.blocks else EMPTY_HASH,
+            "ref_block_prefix": block_num,
+            "transactions": transactions
+        }
+
+    def add_account(self, name, creator, owner_key, active_key):
+        self.accounts[name] = {
+            "creator": creator,
+            "created": timestamp(time.time()),
+            "permissions": {
+                "owner": {"parent": "", "keys": [owner_key], "accounts": []},
+                "active": {
+                    "parent": "owner", "keys": [active_key], "accounts": []}
+            },
+            "links": {},
+            "code_hash": EMPTY_HASH,
+            "contract": None,
+            "abi": None,
+            "cpu_used": 0,
+            "net_used": 0,
+            "ram_used": RAM_BASE_BYTES
+        }
+
+    def account(self, name):
+        if not name in self.accounts:
+            raise unknown_account(name)
+        return self.accounts[name]
+
+    def unlocked_keys(self):
+        keys = []
+        for wallet in self.wallets.values():
+            if wallet["unlocked"]:
+                keys.extend(wallet["keys"].keys())
+        return keys
+
+    def is_satisfied(self, actor, permission, keys, depth=0):
+        '''Determine whether the keys satisfy the permission of the actor.
+        '''
+        if depth > 4 or not actor in self.accounts:
+            return False
+        permissions = self.accounts[actor]["permissions"]
+        if not permission in permissions:
+            return False
+        perm = permissions[permission]
+        if any(key in keys for key in perm["keys"]):
+            return True
+        for level in perm["accounts"]:
+            if self.is_satisfied(
+                    level["actor"], level["permission"], keys, depth + 1):
+                return True
+        # A parent permission satisfies its children:
+        if perm["parent"]:
+            return self.is_satisfied(actor, perm["parent"], keys, depth + 1)
+        return False
+
+    def check_authorization(self, actions):
+        keys = self.unlocked_keys()
+        for action in actions:
+            for auth in action["authorization"]:
+                actor = auth["actor"]
+                self.account(actor)
+                permission = auth["permission"]
+                if not permission in ["owner", "active"]:
+                    links = self.accounts[actor]["links"]
+                    if not permission in [
+                            links.get((action["account"], action["name"])),
+                            links.get((action["account"], ""))]:
+                        raise ActionError('''Error 3090005: Irrelevant authority included
+Error Details:
+action declares irrelevant authority '{}'
+'''.format(json.dumps(auth)))
+                if self.check_signatures \
+                        and not self.is_satisfied(actor, permission, keys):
+                    raise unsatisfied_authorization(auth)
+
+    ###########################################################################
+    # Transactions
+    ###########################################################################
+
+    def run_action(self, receiver, action, depth, trx_id, block):
+        '''Execute an action and its inline actions, and return the trace.
+        '''
+        if depth > 8:
+            raise ActionError("Error 3080006: max inline action depth per "
+                                "transaction reached")
+        code = action["account"]
+        name = action["name"]
+        contract = self.account(code)
+        if code == receiver and contract["abi"] is not None \
+                and not name in [item["name"] for item in \
+                                    contract["abi"].get("actions", [])]:
+            raise ActionError('''Error 3015014: Pack data exception
+Error Details:
+Unknown action {} in contract {}
+'''.format(name, code))
+
+        context = ActionContext(
+                        self, receiver, code, name, action["data"],
+                        action["authorization"])
+        receiving = self.accounts.get(receiver, {})
+        handler = None
+        for contract_name in [receiving.get("contract"), receiver]:
+            handler = self.handlers.get((contract_name, name \
+                    if code == receiver else "{}::{}".format(code, name)))
+            if handler:
+                break
+        if code == receiver and handler is None and contract["abi"] is None \
+                                            and not code in SYSTEM_ACCOUNTS:
+            raise ActionError('''Error 3015014: Pack data exception
+Error Details:
+No ABI found for {}
+'''.format(code))
+
+        start = time.perf_counter()
+        try:
+            if handler:
+                handler(context, action["data"])
+        except ActionError as e:
+            if not "pending console output" in e.message:
+                e.message = e.message + "pending console output: {}\n".format(
+                                                    "".join(context.console))
+            raise
+        except Exception as e:
+            raise ActionError('''Error 3050000: action exception
+Error Details:
+{}
+'''.format(traceback.format_exc()))
+        elapsed = int((time.perf_counter() - start) * 1e6)
+
+        self.global_sequence += 1
+        trace = {
+            "receipt": {
+                "receiver": receiver,
+                "act_digest": digest(action),
+                "global_sequence": self.global_sequence,
+                "recv_sequence": self.global_sequence,
+                "auth_sequence": [[auth["actor"], self.global_sequence] \
+                                    for auth in action["authorization"]],
+                "code_sequence": 1,
+                "abi_sequence": 1
+            },
+            "receiver": receiver,
+            "act": action,
+            "context_free": False,
+            "elapsed": elapsed,
+            "console": "".join(context.console),
+            "trx_id": trx_id,
+            "block_num": block["block_num"],
+            "block_time": block["timestamp"],
+            "producer_block_id": None,
+            "account_ram_deltas": [],
+            "except": None,
+            "inline_traces": []
+        }
+        self.history.setdefault(receiver, []).append(trace)
+
+        for recipient in context.recipients:
+            trace["inline_traces"].append(
+                    self.run_action(recipient, action, depth + 1, trx_id, block))
+        for inline in context.inline_actions:
+            trace["inline_traces"].append(self.run_action(
+                        inline["account"], inline, depth + 1, trx_id, block))
+        return trace
+
+    def push_transaction(self, actions, options):
+        '''Execute the actions atomically, in a new block.
+
+        Returns:
+            dict: The *push* response.
+        '''
+        if option(options, "--force-unique", alias="-f"):
+            actions = [{
+                "account": "eosio.null",
+                "name": "nonce",
+                "authorization": [],
+                "data": os.urandom(8).hex()
+            }] + actions
+
+        self.check_authorization(actions)
+        block = self.block([])
+        trx_id = digest(actions, block["block_num"], time.time())
+        history = {name: len(value) for name, value in self.history.items()}
+        sequence = self.global_sequence
+        journal = self.journal = []
+        try:
+            action_traces = [
+                self.run_action(action["account"], action, 0, trx_id, block) \
+                                                        for action in actions]
+        except ActionError:
+            self.rollback(journal, history, sequence)
+            raise
+        finally:
+            self.journal = []
+
+        elapsed = sum([trace["elapsed"] for trace in action_traces])
+        net_words = NET_BASE_WORDS + len(json.dumps(actions)) // 32
+        cpu_us = CPU_BASE_US + elapsed
+        receipt = {
+            "status": "executed",
+            "cpu_usage_us": cpu_us,
+            "net_usage_words": net_words
+        }
+        processed = {
+            "id": trx_id,
+            "block_num": block["block_num"],
+            "block_time": block["timestamp"],
+            "producer_block_id": None,
+            "receipt": receipt,
+            "elapsed": elapsed,
+            "net_usage": net_words * 8,
+            "scheduled": False,
+            "action_traces": action_traces,
+            "except": None
+        }
+
+        if option(options, "--dont-broadcast", alias="-d"):
+            self.rollback(journal, history, sequence)
+            return {
+                "expiration": block["timestamp"],
+                "ref_block_num": block["block_num"],
+                "ref_block_prefix": block["ref_block_prefix"],
+                "actions": actions,
+                "signatures": []
+            }
+
+        for auth in actions[-1]["authorization"][:1]:
+            self.accounts[auth["actor"]]["cpu_used"] += cpu_us
+            self.accounts[auth["actor"]]["net_used"] += net_words * 8
+
+        block["transactions"].append(dict(receipt, trx={
+            "id": trx_id,
+            "signatures": [],
+            "transaction": {
+                "expiration": block["timestamp"],
+                "ref_block_num": block["block_num"] - 1,
+                "actions": actions
+            }
+        }))
+        self.blocks.append(block)
+        self.transactions[trx_id] = processed
+        return {"transaction_id": trx_id, "processed": processed}
+
+    def rollback(self, journal, history, sequence):
+        '''Revert the changes of a transaction.
+        '''
+        for undo in reversed(journal):
+            undo()
+        for name in list(self.history):
+            del self.history[name][history.get(name, 0):]
+        self.global_sequence = sequence
+
+    def transaction_response(self, response, actions, options):
+        '''Return *(stdout, stderr)* of a transaction, as *cleos* prints them.
+        '''
+        if option(options, "--json", alias="-j") \
+                        or option(options, "--dont-broadcast", alias="-d"):
+            return json.dumps(response, indent=2), ""
+
+        processed = response["processed"]
+        lines = ["executed transaction: {}  {} bytes  {} us".format(
+            response["transaction_id"], processed["net_usage"],
+            processed["receipt"]["cpu_usage_us"])]
+        stack = list(reversed(processed["action_traces"]))
+        while stack:
+            trace = stack.pop()
+            lines.append("#{:>14} <= {:<26} {}".format(
+                trace["receiver"], "{}::{}".format(
+                    trace["act"]["account"], trace["act"]["name"]),
+                json.dumps(trace["act"]["data"])))
+            if trace["console"]:
+                lines.append(">> " + trace["console"])
+            stack.extend(reversed(trace["inline_traces"]))
+        lines.append(EXECUTED)
+        return "", "\n".join(lines) + "\n"
+
+    ###########################################################################
+    # Commands
+    ###########################################################################
+
+    def execute(self, command_group, command, args):
+        '''Execute a *cleos* command.
+
+        Returns:
+            tuple: The texts of the stdout and stderr streams.
+        '''
+        method = getattr(self, "{}_{}".format(
+            command_group, command.replace(" ", "_")), None)
+        if method is None:
+            return "", "ERROR: The command ``{} {}`` is not emulated.\n"\
+                                                .format(command_group, command)
+        positionals, options = parse(args, FLAGS)
+        with self.lock:
+            try:
+                return method(positionals, options)
+            except ActionError as e:
+                return "", e.message
+
+    def get_info(self, positionals, options):
+        head = self.head_block
+        return json.dumps({
+            "server_version": SERVER_VERSION,
+            "chain_id": CHAIN_ID,
+            "head_block_num": head["block_num"],
+            "last_irreversible_block_num": head["block_num"],
+            "last_irreversible_block_id": head["id"],
+            "head_block_id": head["id"],
+            "head_block_time": head["timestamp"],
+            "head_block_producer": head["producer"],
+            "server_version_string": SERVER_VERSION
+        }, indent=2), ""
+
+    def get_block(self, positionals, options):
+        key = positionals[0]
+        for block in self.blocks:
+            if str(block["block_num"]) == key or block["id"] == key:
+                return json.dumps(block, indent=2), ""
+        return "", '''Error 3100002: Unknown block
+Error Details:
+Could not find block: {}
+'''.format(key)
+
+    def get_transaction(self, positionals, options):
+        processed = self.transactions.get(positionals[0])
+        if processed is None:
+            return "", '''Error 3040011: The transaction can not be found
+Error Details:
+Transaction {} not found in history
+'''.format(positionals[0])
+        block = self.blocks[processed["block_num"] - 1]
+        trx = [item for item in block["transactions"] \
+                                    if item["trx"]["id"] == processed["id"]][0]
+        return json.dumps({
+            "id": processed["id"],
+            "trx": {"receipt": {
+                "status": trx["status"],
+                "cpu_usage_us": trx["cpu_usage_us"],
+                "net_usage_words": trx["net_usage_words"]
+                }, "trx": trx["trx"]["transaction"]},
+            "block_time": processed["block_time"],
+            "block_num": processed["block_num"],
+            "last_irreversible_block": self.head_block["block_num"],
+            "traces": processed["action_traces"]
+        }, indent=2), ""
+
+    def get_account(self, positionals, options):
+        name = positionals[0]
+        account = self.account(name)
+        head = self.head_block["block_num"]
+        permissions = []
+        for perm_name, perm in account["permissions"].items():
+            permissions.append({
+                "perm_name": perm_name,
+                "parent": perm["parent"],
+                "required_auth": {
+                    "threshold": 1,
+                    "keys": [{"key": key, "weight": 1} for key in perm["keys"]],
+                    "accounts": [{
+                        "permission": level, "weight": 1} \
+                                            for level in perm["accounts"]],
+                    "waits": []
+                }
+            })
+        limit = lambda used: {
+            "used": used, "available": -1, "max": -1}
+        ram_used = account["ram_used"] + sum([
+            len(json.dumps(row)) for state in self.tables.values() \
+                    for row, payer in state["rows"].values() if payer == name])
+        if option(options, "--json", alias="-j"):
+            return json.dumps({
+                "account_name": name,
+                "head_block_num": head,
+                "head_block_time": self.head_block["timestamp"],
+                "privileged": name == "eosio",
+                "last_code_update": "1970-01-01T00:00:00.000",
+                "created": account["created"],
+                "ram_quota": -1,
+                "net_weight": -1,
+                "cpu_weight": -1,
+                "net_limit": limit(account["net_used"]),
+                "cpu_limit": limit(account["cpu_used"]),
+                "ram_usage": ram_used,
+                "permissions": permissions,
+                "total_resources": None,
+                "self_delegated_bandwidth": None,
+                "refund_request": None,
+                "voter_info": None
+            }, indent=2), ""
+
+        lines = ["created: {}".format(account["created"]), "permissions: "]
+        for perm_name in ["owner", "active"] + sorted(
+                    [p for p in account["permissions"] \
+                                    if not p in ["owner", "active"]]):
+            perm = account["permissions"][perm_name]
+            depth = 1
+            parent = perm["parent"]
+            while parent:
+                depth += 1
+                parent = account["permissions"][parent]["parent"]
+            lines.append("{}{:<10}1:    {}".format(
+                "     " * depth, perm_name, ", ".join(
+                    ["1 " + key for key in perm["keys"]] \
+                    + ["1 {}@{}".format(level["actor"], level["permission"]) \
+                                            for level in perm["accounts"]])))
+        lines.append("memory: ")
+        lines.append("     quota:       unlimited  used:  {} bytes".format(
+                                                                    ram_used))
+        lines.append("")
+        return "\n".join(lines) + "\n", ""
+
+    def get_code(self, positionals, options):
+        account = self.account(positionals[0])
+        return "code hash: {}\n".format(account["code_hash"]), ""
+
+    def get_abi(self, positionals, options):
+        account = self.account(positionals[0])
+        if account["abi"] is None:
+            return "", "no abi\n"
+        return json.dumps(account["abi"], indent=2), ""
+
+    def get_table(self, positionals, options):
+        code, scope, name = positionals[:3]
+        self.account(code)
+        index = option(options, "--index")
+        if index and not index in ["1", "primary"]:
+            raise ActionError(
+                "Error 3060003: Secondary indices are not emulated.\n")
+
+        state = self.tables.get((code, scope, name), {"keys": [], "rows": {}})
+        keys = state["keys"]
+        lower = option(options, "--lower", alias="-L")
+        upper = option(options, "--upper", alias="-U")
+        begin = bisect.bisect_left(keys, primary_key(lower)) if lower else 0
+        end = bisect.bisect_right(keys, primary_key(upper)) \
+                                                    if upper else len(keys)
+        selected = keys[begin:end]
+        if option(options, "--reverse", alias="-r"):
+            selected = list(reversed(selected))
+        limit = int(option(options, "--limit", 10, "-l"))
+
+        show_payer = option(options, "--show-payer")
+        rows = []
+        for key in selected[:limit]:
+            row, payer = state["rows"][key]
+            rows.append({"data": row, "payer": payer} if show_payer else row)
+        more = len(selected) > limit
+        return json.dumps({
+            "rows": rows,
+            "more": more,
+            "next_key": str(selected[limit]) if more else ""
+        }, indent=2), ""
+
+    def get_scope(self, positionals, options):
+        code = positionals[0]
+        table = option(options, "--table")
+        rows = []
+        for (code_, scope, name), state in sorted(self.tables.items()):
+            if code_ == code and (not table or table == name) \
+                                                        and state["keys"]:
+                rows.append({
+                    "code": code, "scope": scope, "table": name,
+                    "payer": code, "count": len(state["keys"])})
+        lower = option(options, "--lower", alias="-L")
+        upper = option(options, "--upper", alias="-U")
+        rows = [row for row in rows \
+            if (not lower or primary_key(row["scope"]) >= primary_key(lower)) \
+            and (not upper or primary_key(row["scope"]) <= primary_key(upper))]
+        if option(options, "--reverse", alias="-r"):
+            rows = list(reversed(rows))
+        limit = int(option(options, "--limit", 10, "-l"))
+        return json.dumps({
+            "rows": rows[:limit],
+            "more": rows[limit]["scope"] if len(rows) > limit else ""
+        }, indent=2), ""
+
+    def get_actions(self, positionals, options):
+        account = positionals[0]
+        history = self.history.get(account, [])
+        pos = int(positionals[1]) if len(positionals) > 1 else -1
+        offset = int(positionals[2]) if len(positionals) > 2 else -20
+        if pos == -1:
+            pos = len(history) - 1
+            begin, end = (pos + offset, pos) if offset < 0 else (pos, pos)
+        else:
+            begin, end = (pos + offset, pos) if offset < 0 \
+                                                else (pos, pos + offset)
+        actions = []
+        for seq in range(max(0, begin), min(len(history) - 1, end) + 1):
+            trace = history[seq]
+            actions.append({
+                "global_action_seq": trace["receipt"]["global_sequence"],
+                "account_action_seq": seq,
+                "block_num": trace["block_num"],
+                "block_time": trace["block_time"],
+                "action_trace": trace
+            })
+        return json.dumps({
+            "actions": actions,
+            "last_irreversible_block": self.head_block["block_num"]
+        }, indent=2), ""
+
+    def create_key(self, positionals, options):
+        seed = os.urandom(32)
+        private_key = "5K" + hashlib.sha256(seed).hexdigest()[:49]
+        public_key = "EOS" + hashlib.sha256(seed[::-1]).hexdigest()[:50]
+        self.register_key(private_key, public_key)
+        return "Private key: {}\nPublic key: {}\n".format(
+                                                private_key, public_key), ""
+
+    def create_account(self, positionals, options):
+        creator, name, owner_key, active_key = (positionals + [None] * 4)[:4]
+        if not active_key:
+            active_key = owner_key
+        if not re.match(r"^[a-z1-5\.]{1,12}$", name):
+            raise ActionError('''Error 3010001: Invalid name
+Error Details:
+Name not properly normalized (name: {})
+'''.format(name))
+        if name in self.accounts:
+            raise ActionError('''Error 3050001: Account name already exists
+Error Details:
+Cannot create account named {}, as that name is already taken
+'''.format(name))
+
+        permission = options.get("--permission") or options.get("-p") \
+                                                                    or [creator]
+        actions = [{
+            "account": "eosio",
+            "name": "newaccount",
+            "authorization": authorization(permission),
+            "data": {
+                "creator": creator, "name": name,
+                "owner": {"threshold": 1, "keys": [{
+                                    "key": owner_key, "weight": 1}]},
+                "active": {"threshold": 1, "keys": [{
+                                    "key": active_key, "weight": 1}]}
+            }
+        }]
+        response = self.push_transaction(actions, options)
+        if not option(options, "--dont-broadcast", alias="-d"):
+            self.add_account(name, creator, owner_key, active_key)
+        return self.transaction_response(response, actions, options)
+
+    def set_contract(self, positionals, options):
+        name, contract_dir = positionals[:2]
+        account = self.account(name)
+        wasm_file = positionals[2] if len(positionals) > 2 else None
+        abi_file = positionals[3] if len(positionals) > 3 else None
+        files = os.listdir(contract_dir) if os.path.isdir(contract_dir) else []
+        if not wasm_file:
+            wasm_file = next((f for f in files if f.endswith(".wasm")), None)
+        if not abi_file:
+            abi_file = next((f for f in files if f.endswith(".abi")), None)
+        if not wasm_file or not abi_file:
+            raise ActionError('''Error 3160010: No abi file found
+Error Details:
+no wasm or abi file found in {}
+'''.format(contract_dir))
+
+        with open(os.path.join(contract_dir, wasm_file), "rb") as f:
+            code_hash = hashlib.sha256(f.read()).hexdigest()
+        with open(os.path.join(contract_dir, abi_file), "r") as f:
+            abi = json.load(f)
+
+        messages = []
+        actions = []
+        permission = options.get("--permission") or options.get("-p") or [name]
+        if code_hash == account["code_hash"]:
+            messages.append("Skipping set code because the new code is the "
+                                            "same as the existing code")
+        else:
+            actions.append({
+                "account": "eosio", "name": "setcode",
+                "authorization": authorization(permission),
+                "data": {"account": name, "vmtype": 0, "vmversion": 0,
+                                                        "code": code_hash}})
+        if abi == account["abi"]:
+            messages.append("Skipping set abi because the new abi is the "
+                                            "same as the existing abi")
+        else:
+            actions.append({
+                "account": "eosio", "name": "setabi",
+                "authorization": authorization(permission),
+                "data": {"account": name, "abi": digest(abi)}})
+        if not actions:
+            return "", "\n".join(messages) + "\n"
+
+        response = self.push_transaction(actions, options)
+        if not option(options, "--dont-broadcast", alias="-d"):
+            account["code_hash"] = code_hash
+            account["abi"] = abi
+            account["contract"] = os.path.splitext(
+                                                os.path.basename(wasm_file))[0]
+        out, err = self.transaction_response(response, actions, options)
+        return out, "\n".join(messages + [err]) if messages else err
+
+    def set_account_permission(self, positionals, options):
+        name, permission, authority = positionals[:3]
+        parent = positionals[3] if len(positionals) > 3 else \
+                            ("owner" if not permission == "owner" else "")
+        account = self.account(name)
+        if authority == "null":
+            data = {"account": name, "permission": permission}
+            action_name = "deleteauth"
+        else:
+            if authority.startswith("{"):
+                authority = json.loads(authority)
+            else:
+                authority = {"threshold": 1, "keys": [
+                                                {"key": authority, "weight": 1}]}
+            data = {"account": name, "permission": permission,
+                            "parent": parent, "auth": authority}
+            action_name = "updateauth"
+
+        actions = [{
+            "account": "eosio", "name": action_name,
+            "authorization": authorization(
+                options.get("--permission") or options.get("-p") \
+                                        or ["{}@{}".format(name, "owner" \
+                        if permission == "owner" else parent or "active")]),
+            "data": data
+        }]
+        response = self.push_transaction(actions, options)
+        if not option(options, "--dont-broadcast", alias="-d"):
+            if action_name == "deleteauth":
+                account["permissions"].pop(permission, None)
+            else:
+                account["permissions"][permission] = {
+                    "parent": parent,
+                    "keys": [key["key"] for key in authority.get("keys", [])],
+                    "accounts": [level["permission"] \
+                                    for level in authority.get("accounts", [])]
+                }
+        return self.transaction_response(response, actions, options)
+
+    def set_action_permission(self, positionals, options):
+        name, code, type_, requirement = positionals[:4]
+        account = self.account(name)
+        actions = [{
+            "account": "eosio",
+            "name": "unlinkauth" if requirement == "null" else "linkauth",
+            "authorization": authorization(
+                options.get("--permission") or options.get("-p") or [name]),
+            "data": {"account": name, "code": code, "type": type_,
+                                                "requirement": requirement}
+        }]
+        response = self.push_transaction(actions, options)
+        if not option(options, "--dont-broadcast", alias="-d"):
+            if requirement == "null":
+                account["links"].pop((code, type_), None)
+            else:
+                account["links"][(code, type_)] = requirement
+        return self.transaction_response(response, actions, options)
+
+    def push_action(self, positionals, options):
+        code, name, data = positionals[:3]
+        try:
+            data = json.loads(data)
+        except ValueError:
+            raise ActionError('''Error 3015013: Unpack data exception
+Error Details:
+Fail to parse action JSON data='{}'
+'''.format(data))
+        actions = [{
+            "account": code,
+            "name": name,
+            "authorization": authorization(
+                options.get("--permission") or options.get("-p") or [code]),
+            "data": data
+        }]
+        response = self.push_transaction(actions, options)
+        return self.transaction_response(response, actions, options)
+
+    def wallet(self, name):
+        if not name in self.wallets:
+            raise ActionError('''Error 3120002: Nonexistent wallet
+Are you sure you typed the wallet name correctly?
+Error Details:
+Unable to open file: {}.wallet
+'''.format(name))
+        return self.wallets[name]
+
+    def remove_wallets(self, prefix):
+        '''Remove the wallets whose names start with the prefix, like their
+        files are removed from the wallet directory.
+        '''
+        with self.lock:
+            for name in list(self.wallets):
+                if name.startswith(prefix):
+                    del self.wallets[name]
+
+    def wallet_create(self, positionals, options):
+        name = option(options, "--name", "default", "-n")
+        if name in self.wallets:
+            return "", '''Error 3120001: Wallet already exists
+Try to use different wallet name.
+'''
+        password = "PW5" + hashlib.sha256(os.urandom(32)).hexdigest()[:48]
+        self.wallets[name] = {
+                            "password": password, "keys": {}, "unlocked": True}
+        return '''Creating wallet: {}
+Save password to use in the future to unlock this wallet.
+Without password imported keys will not be retrievable.
+"{}"
+'''.format(name, password), ""
+
+    def wallet_open(self, positionals, options):
+        name = option(options, "--name", "default", "-n")
+        # Wallets of earlier sessions, whose passwords are saved in the
+        # wallet directory, are created empty:
+        self.wallets.setdefault(
+                name, {"password": None, "keys": {}, "unlocked": False})
+        return "Opened: {}\n".format(name), ""
+
+    def wallet_unlock(self, positionals, options):
+        name = option(options, "--name", "default", "-n")
+        wallet = self.wallet(name)
+        password = option(options, "--password")
+        if wallet["password"] is None:
+            wallet["password"] = password
+        if not password == wallet["password"]:
+            return "", '''Error 3120005: Invalid wallet password
+Are you sure you are using the right password?
+'''
+        wallet["unlocked"] = True
+        return "Unlocked: {}\n".format(name), ""
+
+    def wallet_lock(self, positionals, options):
+        name = option(options, "--name", "default", "-n")
+        self.wallet(name)["unlocked"] = False
+        return "Locked: {}\n".format(name), ""
+
+    def wallet_lock_all(self, positionals, options):
+        for wallet in self.wallets.values():
+            wallet["unlocked"] = False
+        return "Locked All Wallets\n", ""
+
+    def wallet_stop(self, positionals, options):
+        self.wallet_lock_all(positionals, options)
+        return "OK\n", ""
+
+    def wallet_list(self, positionals, options):
+        make_wallet_dir()
+        return "Wallets:\n{}\n".format(json.dumps([
+                    name + (" *" if wallet["unlocked"] else "") \
+                            for name, wallet in self.wallets.items()],
+                                                                indent=2)), ""
+
+    def locked_wallet(self, name):
+        return ActionError('''Error 3120003: Locked wallet
+Ensure that your wallet is unlocked before using it!
+Error Details:
+Wallet is locked: {}
+'''.format(name))
+
+    def wallet_import(self, positionals, options):
+        name = option(options, "--name", "default", "-n")
+        wallet = self.wallet(name)
+        if not wallet["unlocked"]:
+            raise self.locked_wallet(name)
+        private_key = option(options, "--private-key")
+        public_key = self.public_key(private_key)
+        if public_key in wallet["keys"]:
+            return "", '''Error 3120008: Key already exists
+Error Details:
+Key already in wallet
+'''
+        wallet["keys"][public_key] = private_key
+        return "imported private key for: {}\n".format(public_key), ""
+
+    def wallet_remove_key(self, positionals, options):
+        name = option(options, "--name", "default", "-n")
+        wallet = self.wallet(name)
+        if not option(options, "--password") == wallet["password"]:
+            return "", "Error 3120005: Invalid wallet password\n"
+        if wallet["keys"].pop(positionals[0], None) is None:
+            return "", '''Error 3120009: Nonexistent key
+Error Details:
+Key not in wallet
+'''
+        return "removed private key for: {}\n".format(positionals[0]), ""
+
+    def wallet_keys(self, positionals, options):
+        return json.dumps(self.unlocked_keys(), indent=2) + "\n", ""
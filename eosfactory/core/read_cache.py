@@ -0,0 +1,190 @@
+'''Head-block-scoped memoization of chain queries.
+
+Within one block, repeated *get account*, *get table* and *get info* queries
+with identical arguments return identical data. If the cache is started, with
+the function :func:`.start`, the responses to these queries are memoized,
+keyed with the node address, the command, its arguments and the head block
+number of the node.
+
+A background follower thread polls the head block of each node queried, and
+clears the entries of a node whenever its head block advances. Also, the
+entries of a node are cleared whenever a transaction is sent to it. The
+follower asks the nodes directly, not with *cleos* commands: its queries are
+not recorded, see :func:`.core.cleos.set_recorder`, traced as spans, or
+written to the command line file.
+
+Example::
+
+    import eosfactory.core.read_cache as read_cache
+    read_cache.start()
+    ...
+    read_cache.stop()
+'''
+import json
+import time
+import threading
+from urllib.request import Request, urlopen
+
+import eosfactory.core.setup as setup
+
+CACHED_COMMANDS = [("get", "account"), ("get", "table"), ("get", "info")]
+TRANSACTION_GROUPS = ["push", "set", "system", "transfer", "multisig", "sudo"]
+FOLLOWER_INTERVAL = 0.25
+# The timeout, in seconds, of the follower queries:
+FOLLOWER_TIMEOUT = 2
+
+__cache = {}
+__head_blocks = {}
+__follower = None
+__is_running = False
+__lock = threading.Lock()
+
+
+def key(command_group, command, args):
+    '''Return the key to the cached response of the given command, or *None*
+    if the response cannot be cached.
+    '''
+    if not __is_running or (command_group, command) not in CACHED_COMMANDS:
+        return None
+    return (setup.nodeos_address(), command_group, command, tuple(args))
+
+
+def lookup(command_group, command, args):
+    '''Return the cached response, *(out_msg, out_msg_details)*, to the given
+    command, or *None*.
+    '''
+    key_ = key(command_group, command, args)
+    if key_ is None:
+        return None
+    with __lock:
+        __head_blocks.setdefault(key_[0], None)
+        entry = __cache.get(key_)
+        if entry and entry[0] == __head_blocks[key_[0]]:
+            return entry[1]
+    return None
+
+
+def head_block(address=None):
+    '''The head block number of the given node, as seen by the follower.
+
+    Args:
+        address (str): The node address. Default is the address of the
+            current session.
+    '''
+    return __head_blocks.get(
+                        address if address else setup.nodeos_address())
+
+
+def store(command_group, command, args, head_block, out_msg, out_msg_details):
+    '''Memoize the response to the given command.
+
+    Args:
+        head_block (int): The head block number of the node, seen by the
+            follower when the command was issued. If the head block advanced
+            in the meantime, the response is not stored.
+    '''
+    key_ = key(command_group, command, args)
+    if key_ is None or head_block is None:
+        return
+    with __lock:
+        if head_block == __head_blocks.get(key_[0]):
+            __cache[key_] = (head_block, (out_msg, out_msg_details))
+
+
+def on_command(command_group, command):
+    '''Clear the entries of the current node if the given command sends a
+    transaction.
+    '''
+    if command_group in TRANSACTION_GROUPS \
+                        or (command_group == "create" and command == "account"):
+        clear(setup.nodeos_address())
+
+
+def clear(address=None):
+    '''Clear the cache.
+
+    Args:
+        address (str): If set, only the entries of the given node are cleared.
+    '''
+    with __lock:
+        if address is None:
+            __cache.clear()
+            return
+        for key_ in [key_ for key_ in __cache if key_[0] == address]:
+            del __cache[key_]
+
+
+def start(interval=FOLLOWER_INTERVAL):
+    '''Start the cache and its follower thread.
+
+    Args:
+        interval (float): The interval, in seconds, between the head block
+            queries issued by the follower to each node. Default is 0.25.
+    '''
+    global __is_running
+    global __follower
+    if __is_running:
+        return
+
+    __is_running = True
+    __follower = threading.Thread(
+                                target=follow, args=(interval,), daemon=True)
+    __follower.start()
+
+
+def stop():
+    '''Stop the cache and its follower thread.
+    '''
+    global __is_running
+    global __follower
+    __is_running = False
+    if __follower:
+        __follower.join()
+    __follower = None
+    with __lock:
+        __head_blocks.clear()
+    clear()
+
+
+def is_running():
+    return __is_running
+
+
+def head_block_num(address):
+    '''Return the head block number of the given node, or *None* if it does
+    not respond.
+
+    If a backend replaces *EOSIO cleos*, see :func:`.core.cleos.set_backend`,
+    the number is its *head_block_num()*, if the backend has such a method.
+    Otherwise, the node is asked with its HTTP API.
+    '''
+    import eosfactory.core.cleos as cleos
+
+    backend = cleos.backend()
+    try:
+        if backend is not None:
+            if not hasattr(backend, "head_block_num"):
+                return None
+            return backend.head_block_num()
+
+        request = Request(
+                        address + "/v1/chain/get_info", data=b"", method="POST")
+        with urlopen(request, timeout=FOLLOWER_TIMEOUT) as response:
+            return json.loads(response.read().decode("utf-8"))[
+                                                            "head_block_num"]
+    except Exception:
+        return None
+
+
+def follow(interval):
+    while __is_running:
+        with __lock:
+            addresses = list(__head_blocks)
+        for address in addresses:
+            head_block = head_block_num(address)
+            if not head_block == __head_blocks.get(address):
+                clear(address)
+                with __lock:
+                    __head_blocks[address] = head_block
+
+        time.sleep(interval)
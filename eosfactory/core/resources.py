@@ -0,0 +1,404 @@
+'''Resource usage of accounts.
+
+Account data is fetched concurrently, with the function
+:func:`.account_jsons`. The resource usage of a set of accounts can be
+sampled at a given interval in the background, with a
+:class:`.ResourceSampler` object, for example during a test::
+
+    sampler = resources.ResourceSampler([alice, carol], interval=0.5)
+    sampler.start()
+    ...
+    sampler.stop()
+    sampler.to_csv("resources.csv")
+
+The cost of actions, CPU and NET usage, can be recorded for each action
+pushed during a session, and reported at exit, with the function
+:func:`.collect`, and compared with a baseline with the function
+:func:`.check`, for example in a test module::
+
+    def setUpModule():
+        resources.collect(baseline="costs.json", threshold=0.1)
+
+    def tearDownModule():
+        resources.check()
+'''
+import os
+import json
+import time
+import atexit
+import threading
+
+import eosfactory.core.errors as errors
+import eosfactory.core.logger as logger
+import eosfactory.core.interface as interface
+import eosfactory.core.utils as utils
+
+ACCOUNT_CONCURRENCY = 8
+SAMPLE_PARAMS = ["ram_usage", "cpu_limit.used", "net_limit.used"]
+SAMPLE_INTERVAL = 1.0
+COST_THRESHOLD = 0.1
+
+
+def account_jsons(accounts, concurrency=ACCOUNT_CONCURRENCY):
+    '''Return the list of *get account* responses for the given accounts.
+
+    The accounts are queried concurrently, while the responses are listed
+    in the order of the accounts.
+
+    Args:
+        accounts ([str or .interface.Account]): The accounts.
+        concurrency (int): The number of pending queries. Default is 8.
+    '''
+    import eosfactory.core.cleos as cleos
+
+    return list(utils.ordered_map(
+        lambda account: cleos.GetAccount(
+                                account, is_info=False, is_verbose=0).json,
+        accounts, concurrency))
+
+
+def paths(params):
+    '''Split dotted parameter paths, like *cpu_limit.used*, into key lists.
+    '''
+    return [param.split(".") for param in params]
+
+
+def find(keys, json, default="n/a"):
+    '''Return the element of a JSON object at the given key list.
+
+    Args:
+        keys ([str]): The key list, see :func:`.paths`.
+        json (dict): The JSON object.
+        default: The value returned if the element does not exist.
+    '''
+    value = json
+    try:
+        for key in keys:
+            value = value[key]
+    except (KeyError, IndexError, TypeError):
+        return default
+    return value
+
+
+class ResourceSampler():
+    '''Sample the resource usage of accounts at a given interval.
+
+    Each sample is a tuple *(time, account name, values...)*, where the values
+    are the parameters given with the *params* argument. All the accounts are
+    queried concurrently in each sample.
+
+    Args:
+        accounts ([str or .interface.Account]): The accounts to be sampled.
+        interval (float): The interval between samples, in seconds. Default
+            is 1.
+        params ([str]): Dotted paths to the sampled parameters of *get account*
+            responses. Default is *ram_usage*, *cpu_limit.used* and
+            *net_limit.used*.
+
+    Attributes:
+        samples (list): The samples taken.
+    '''
+    def __init__(self, accounts, interval=SAMPLE_INTERVAL, params=None):
+        self.accounts = accounts
+        self.account_names = [
+                        interface.account_arg(account) for account in accounts]
+        self.interval = interval
+        self.params = params if params else SAMPLE_PARAMS
+        self.keys = paths(self.params)
+        self.samples = []
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def sample(self):
+        '''Take one sample of all the accounts.
+        '''
+        timestamp = time.time()
+        jsons = account_jsons(self.account_names)
+        for name, json in zip(self.account_names, jsons):
+            self.samples.append(
+                (timestamp, name) \
+                    + tuple([find(keys, json, None) for keys in self.keys]))
+
+    def start(self):
+        '''Start sampling in a background thread.
+        '''
+        if self.thread:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(
+                        target=utils.bind_context(self.run), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        '''Stop sampling.
+        '''
+        if not self.thread:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.sample()
+            except errors.Error as e:
+                logger.TRACE('''
+                Resource sample failed:
+                {}
+                '''.format(str(e)), translate=False)
+            self.stop_event.wait(self.interval)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+    def to_csv(self, path=None):
+        '''Export the samples as CSV.
+
+        Args:
+            path (str): If set, the file to write to.
+
+        Returns:
+            str: The CSV text.
+        '''
+        lines = [",".join(["time", "account"] + self.params)]
+        for sample in self.samples:
+            lines.append(",".join(
+                ["" if value is None else str(value) for value in sample]))
+        text = "\n".join(lines) + "\n"
+        if path:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def to_numpy(self):
+        '''Export the samples as *NumPy* arrays.
+
+        Returns:
+            dict: For each account name, an array with a row for each sample,
+            with the time in the first column, and the parameters in the
+            following ones. Missing values are *NaN*.
+        '''
+        try:
+            import numpy
+        except ImportError:
+            raise errors.Error('''
+            The ``numpy`` package is needed to export resource samples as
+            arrays.
+            ''')
+
+        rows = {name: [] for name in self.account_names}
+        for sample in self.samples:
+            rows[sample[1]].append(
+                [sample[0]] + [numpy.nan if value is None else float(value) \
+                                                    for value in sample[2:]])
+        return {
+            name: numpy.array(rows[name], dtype=float).reshape(
+                                            -1, len(self.params) + 1) \
+                                                        for name in rows}
+
+
+class ActionCosts():
+    '''Collection of the costs of actions.
+
+    For each action pushed, the CPU usage, in microseconds, and the NET usage,
+    in bytes, of its transaction, and the time, in microseconds, the action
+    took to execute, are recorded under the key *contract::action*.
+
+    Attributes:
+        costs (dict): For each key, the list of *(cpu, net, elapsed)* tuples.
+    '''
+    def __init__(self):
+        self.costs = {}
+        self.lock = threading.Lock()
+
+    def record(self, contract, action, processed):
+        '''Record the costs of an action.
+
+        Args:
+            contract (str): The account of the contract.
+            action (str): The name of the action.
+            processed (dict): The *["processed"]* component of a *push*
+                response.
+        '''
+        receipt = processed["receipt"]
+        elapsed = sum([trace["elapsed"] for trace in processed["action_traces"] \
+                                                        if "elapsed" in trace])
+        cost = (
+            int(receipt["cpu_usage_us"]),
+            int(receipt["net_usage_words"]) * 8,
+            int(elapsed))
+        with self.lock:
+            self.costs.setdefault(
+                        "{}::{}".format(contract, action), []).append(cost)
+
+    def summary(self):
+        '''Return the statistics of the costs of each action.
+
+        Returns:
+            dict: For each *contract::action* key, a dictionary with *count*, 
+            and *mean*, *p50*, *p95* and *p99* values of *cpu*, *net* and 
+            *elapsed*, like *cpu_p95*.
+        '''
+        with self.lock:
+            costs = {key: list(value) for key, value in self.costs.items()}
+
+        summary = {}
+        for key in sorted(costs):
+            stats = {"count": len(costs[key])}
+            for index, name in enumerate(["cpu", "net", "elapsed"]):
+                values = sorted([cost[index] for cost in costs[key]])
+                stats[name + "_mean"] = sum(values) / len(values)
+                for p in [50, 95, 99]:
+                    stats["{}_p{}".format(name, p)] = percentile(values, p)
+            summary[key] = stats
+        return summary
+
+    def report(self, summary=None):
+        '''Return the summary as a table.
+        '''
+        if summary is None:
+            summary = self.summary()
+        columns = ["count", "cpu_mean", "cpu_p50", "cpu_p95", "cpu_p99", 
+                    "net_mean", "net_p50", "net_p95", "net_p99"]
+        lines = ["{:30}".format("action") \
+                                + "".join(["{:>10}".format(c) for c in columns])]
+        for key, stats in summary.items():
+            lines.append("{:30}".format(key) + "".join(
+                    ["{:>10.0f}".format(stats[column]) for column in columns]))
+        return "\n".join(lines)
+
+    def compare(self, baseline, threshold=COST_THRESHOLD, summary=None):
+        '''Return the list of regressions against a baseline.
+
+        An action regresses if its mean CPU or NET usage exceeds the baseline
+        value by more than the given fraction.
+
+        Args:
+            baseline (dict): A summary, see :func:`.summary`.
+            threshold (float): The fraction. Default is 0.1.
+
+        Returns:
+            [str]: The descriptions of regressions.
+        '''
+        if summary is None:
+            summary = self.summary()
+        regressions = []
+        for key, stats in summary.items():
+            if not key in baseline:
+                continue
+            for name in ["cpu_mean", "net_mean"]:
+                base = baseline[key].get(name)
+                if base and stats[name] > base * (1 + threshold):
+                    regressions.append(
+                        "{} {}: {:.0f} against the baseline {:.0f}".format(
+                                                key, name, stats[name], base))
+        return regressions
+
+
+def percentile(values, p):
+    '''Return the nearest-rank percentile of sorted values.
+    '''
+    if not values:
+        return None
+    rank = max(1, int(-(-p * len(values) // 100)))
+    return values[min(rank, len(values)) - 1]
+
+
+__action_costs = None
+__baseline = None
+__threshold = COST_THRESHOLD
+
+
+def action_costs():
+    '''Return the :class:`.ActionCosts` object of the session, or *None* if
+    costs are not collected.
+    '''
+    return __action_costs
+
+
+def record(contract, action, processed):
+    '''Record the costs of an action, if costs are collected.
+    '''
+    costs = __action_costs
+    if costs is None:
+        return
+    try:
+        costs.record(contract, action, processed)
+    except (KeyError, TypeError, ValueError):
+        pass
+
+
+def collect(baseline=None, threshold=COST_THRESHOLD, save=None):
+    '''Start collecting the costs of actions, for the report at exit.
+
+    At exit, the report is printed, and saved with the *save* argument. The
+    costs are compared with the baseline with the function :func:`.check`,
+    called explicitly.
+
+    Args:
+        baseline (str): If set, the path to a baseline file, written with
+            the *save* argument, the default of :func:`.check`.
+        threshold (float): The regression fraction, the default of 
+            :func:`.check`. Default is 0.1.
+        save (str): If set, the path to the file to save the summary to, for
+            use as a baseline.
+
+    Returns:
+        :class:`.ActionCosts`: The collection.
+    '''
+    global __action_costs
+    global __baseline
+    global __threshold
+    __baseline = baseline
+    __threshold = threshold
+    if __action_costs is None:
+        __action_costs = ActionCosts()
+        atexit.register(exit_report, save)
+    return __action_costs
+
+
+def check(baseline=None, threshold=None):
+    '''Compare the costs of actions collected with a baseline.
+
+    Args:
+        baseline (str): The path to a baseline file. Default is the *baseline*
+            argument of :func:`.collect`.
+        threshold (float): The regression fraction. Default is the 
+            *threshold* argument of :func:`.collect`.
+
+    Returns:
+        list: Empty, if no action regresses, or no baseline is given.
+
+    Raises:
+        .core.errors.CostRegressionError: If any action regresses.
+    '''
+    costs = __action_costs
+    if baseline is None:
+        baseline = __baseline
+    if threshold is None:
+        threshold = __threshold
+    if costs is None or not baseline or not os.path.exists(baseline):
+        return []
+
+    with open(baseline, "r") as f:
+        regressions = costs.compare(json.load(f), threshold)
+    if regressions:
+        raise errors.CostRegressionError(regressions, threshold)
+    return regressions
+
+
+def exit_report(save):
+    costs = __action_costs
+    if costs is None or not costs.costs:
+        return
+
+    summary = costs.summary()
+    logger.OUT(costs.report(summary), translate=False)
+    if save:
+        with open(save, "w") as f:
+            json.dump(summary, f, indent=4)
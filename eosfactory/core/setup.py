@@ -1,6 +1,13 @@
 #!/usr/bin/python3
 
 import re
+import sys
+import atexit
+
+try:
+    import contextvars
+except ImportError:
+    contextvars = None
 
 is_print_command_lines = False
 is_save_command_lines = False
@@ -9,31 +16,227 @@ is_raise_error = False
 is_print_request = False
 is_print_response = False
 is_translating = True
-account_map = "accounts.json"
-password_map = "passwords.json"
-wallet_default_name = "default"
-is_local_address = False
+is_chain_cache = True
+is_strict_accounts = True
+
+__command_line_handle = None
+
+# The former module variables, now attributes of the current session:
+SESSION_ATTRIBUTES = [
+    "account_map", "password_map", "wallet_default_name", "is_local_address"]
+
+
+class Session():
+    '''The state of a session with a node: the node URL, the file prefix of
+    the wallet files, the wallet, and the account objects.
+
+    The current session is scoped with the module *contextvars*: a session
+    entered with the *with* statement is current in the block, in the 
+    current thread or task, while other threads keep their sessions. Hence,
+    one process can run parallel scenarios against several nodes::
+
+        def scenario(url):
+            with setup.Session(url):
+                master = create_master_account("MASTER")
+                alice = create_account("ALICE", master)
+                ...
+        
+        threading.Thread(target=scenario, args=(url1,)).start()
+        threading.Thread(target=scenario, args=(url2,)).start()
+
+    Outside any *with* block, the default session is current. Its account 
+    objects are put in the global namespace of the caller, while the account
+    objects of other sessions are put in the dictionary *accounts* of the
+    session, and are returned by the factory functions, like
+    :func:`.shell.account.create_account`.
+
+    Args:
+        address (str): If set, the node URL, see :meth:`.set_nodeos_address`.
+            The session is bound to this node: :meth:`.reboot` keeps it.
+        prefix (str): A prefix prepended to the names of the wallet files.
+        accounts (dict): If set, the namespace the account objects are put 
+            in, otherwise a new dictionary.
+
+    Attributes:
+        nodeos_address (str): The node URL.
+        file_prefix (str): The prefix of the names of the wallet files.
+        account_map (str): The name of the account map file.
+        password_map (str): The name of the password map file.
+        wallet_default_name (str): The default name of the wallet.
+        is_local_address (bool): Whether the node is the local one.
+        wallet (.shell.wallet.Wallet): The wallet of the session.
+        wallet_globals (dict): The namespace the account objects are put in,
+            when the wallet is set.
+        accounts (dict): The namespace the account objects are put in, or 
+            *None* for the global namespace of the caller.
+    '''
+    def __init__(self, address=None, prefix=None, accounts=None):
+        self.tokens = []
+        self.address = address
+        self.account_map = "accounts.json"
+        self.password_map = "passwords.json"
+        self.wallet_default_name = "default"
+        self.wallet = None
+        self.wallet_globals = None
+        self.accounts = {} if accounts is None else accounts
+        self.nodeos_address = None
+        self.file_prefix = None
+        self.is_local_address = False
+        if address:
+            self.set_nodeos_address(address, prefix)
+
+    def reboot(self):
+        '''Forget the node, unless the session is bound to one with the
+        *address* argument.
+        '''
+        if self.address:
+            return
+        self.nodeos_address = None
+        self.file_prefix = None
+        self.is_local_address = False
+
+    def set_nodeos_address(self, address, prefix=None):
+        '''Set the node URL, and the file prefix derived from it.
+        '''
+        if address:
+            self.nodeos_address = address
+
+        if not self.nodeos_address:
+            print('''
+ERROR in setup.set_nodeos_address(...)!
+nodeos address is not set.
+            ''')
+            return
+
+        p = url_prefix(self.nodeos_address)
+        if prefix:
+            p = prefix + "_" + p
+
+        self.file_prefix = p
+        self.account_map = p + "accounts.json"
+        self.password_map = p + "passwords.json"
+        self.wallet_default_name = p + "default"
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in SESSION_ATTRIBUTES:
+            mirror_session()
+
+    def __enter__(self):
+        self.tokens.append(set_session(self))
+        return self
+
+    def __exit__(self, type, value, traceback):
+        reset_session(self.tokens.pop())
+
+
+class SessionVar():
+    '''A stand-in for *contextvars.ContextVar*, where the module 
+    *contextvars* is not available, below Python 3.7: the session is 
+    global.
+    '''
+    def __init__(self, name, default=None):
+        self.value = default
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        token = self.value
+        self.value = value
+        return token
+
+    def reset(self, token):
+        self.value = token
+
 
-__nodeos_address = None
-__file_prefix = None
+def mirror_session():
+    '''Below Python 3.7, module attributes are not looked up with the 
+    function :func:`__getattr__`: copy the former module variables from the 
+    current session to the module.
+    '''
+    # The default session is set up before the session variable is defined:
+    if sys.version_info < (3, 7) and "__session" in globals():
+        for name in SESSION_ATTRIBUTES:
+            globals()[name] = getattr(session(), name)
+
+
+__default_session = Session()
+# The account objects of the default session are in the caller's namespace:
+__default_session.accounts = None
+__session = (contextvars.ContextVar if contextvars else SessionVar)(
+                                                "eosfactory_session", default=None)
+
+
+def session():
+    '''Return the current :class:`.Session` object.
+    '''
+    current = __session.get()
+    return current if current is not None else __default_session
+
+
+def set_session(session_):
+    '''Make the given :class:`.Session` object current, in the current 
+    context. Return a token for :func:`reset_session`.
+    '''
+    token = __session.set(session_)
+    mirror_session()
+    return token
+
+
+def reset_session(token):
+    '''Restore the session current before :func:`set_session`.
+    '''
+    __session.reset(token)
+    mirror_session()
+
+
+mirror_session()
+
+
+def __getattr__(name):
+    if name in SESSION_ATTRIBUTES:
+        return getattr(session(), name)
+    raise AttributeError(
+                "module '{}' has no attribute '{}'".format(__name__, name))
 
 
 def save_command_lines():
+    '''Start saving command lines to the file *command_line_file*.
+
+    The file is kept open, flushed with each command line, and closed at 
+    exit.
+    '''
     global is_save_command_lines
     is_save_command_lines = True
-    with open(command_line_file, "w+") as f:
-        f.write("")
+    global __command_line_handle
+    if __command_line_handle is None:
+        atexit.register(close_command_line_file)
+    else:
+        __command_line_handle.close()
+    __command_line_handle = open(command_line_file, "w+")
+
+
+def close_command_line_file():
+    global __command_line_handle
+    if __command_line_handle is not None:
+        __command_line_handle.close()
+        __command_line_handle = None
 
 
 def add_to__command_line_file(command_line):
     if is_save_command_lines:
-        with open(command_line_file, "a+") as f:
-            f.write("{}\n\n".format(command_line))
+        global __command_line_handle
+        if __command_line_handle is None:
+            __command_line_handle = open(command_line_file, "a+")
+            atexit.register(close_command_line_file)
+        __command_line_handle.write("{}\n\n".format(command_line))
+        # Nothing is lost if the process crashes:
+        __command_line_handle.flush()
 
 
 def nodeos_address():
-    global __nodeos_address
-    return __nodeos_address
+    return session().nodeos_address
 
 
 def url_prefix(address):
@@ -42,51 +245,20 @@ def url_prefix(address):
 
 
 def set_nodeos_address(address, prefix=None):
-    '''Set testnet properties.
+    '''Set testnet properties of the current session, see 
+    :class:`.Session`.
 
     :param str address: testnet url, for example `http://faucet.cryptokylin.io`.
     :param str prefix: A prefix prepended to names of system files like the
         wallet file and password map file and account map file, in order to 
         relate them to the given testnet.
     '''
-    global __nodeos_address
-    if address:
-        __nodeos_address = address
-
-    if not __nodeos_address:
-        print('''
-ERROR in setup.set_nodeos_address(...)!
-nodeos address is not set.
-        ''')
-        return
-
-    address = __nodeos_address
-    p = url_prefix(address)
-
-    if prefix:
-        p = prefix + "_" + p
-
-    global __file_prefix
-    __file_prefix = p
-
-    global account_map
-    account_map = __file_prefix + "accounts.json"
-    global password_map
-    password_map = __file_prefix + "passwords.json"
-    global wallet_default_name
-    wallet_default_name = __file_prefix + "default"
+    session().set_nodeos_address(address, prefix)
 
 
 def file_prefix():
-    global __file_prefix
-    return __file_prefix
+    return session().file_prefix
 
 
 def reboot():
-    global is_local_address
-    is_local_address = False
-    global __nodeos_address
-    __nodeos_address = None
-    global __file_prefix
-    __file_prefix = None
-
+    session().reboot()
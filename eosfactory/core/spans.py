@@ -0,0 +1,228 @@
+'''Timing spans of commands.
+
+When recording is started, each *cleos* command, including wallet
+operations, each contract build, and each start, probe and stop of the local
+node emit a timing span, with the start time, the duration, the category,
+the status and, for *cleos* commands, the numbers of bytes sent and received.
+
+Spans are passed to a background thread that writes them, buffered, to a
+file, either in the Chrome trace format, if the file name ends with *.json*,
+to be viewed with *chrome://tracing* or *Perfetto*, or as JSON lines::
+
+    spans.start("spans.json")
+    ...
+    spans.stop()
+
+Without recording, instrumented code pays one global lookup per span.
+'''
+import os
+import json
+import time
+import atexit
+import threading
+import functools
+
+CHROME = "chrome"
+JSON_LINES = "jsonl"
+FLUSH_SIZE = 256
+OK = "ok"
+ERROR = "error"
+
+
+class Span():
+    '''A timing span, emitted when ended.
+
+    Args:
+        name (str): The name, like *get info*.
+        category (str): The category, like *wallet*, *build*, or *node*.
+        args (dict): Additional values.
+
+    Attributes:
+        start (float): The start time, in seconds since the epoch.
+        duration (float): The duration, in seconds.
+        status (str): *ok*, or *error*.
+    '''
+    def __init__(self, name, category, args=None):
+        self.name = name
+        self.category = category
+        self.args = dict(args) if args else {}
+        self.status = OK
+        self.thread = threading.get_ident()
+        self.start = time.time()
+        self.counter = time.perf_counter()
+        self.duration = None
+
+    def set(self, **args):
+        '''Add values to the span.
+        '''
+        self.args.update(args)
+
+    def end(self, status=None):
+        '''End the span, and pass it to the writer, if any.
+        '''
+        self.duration = time.perf_counter() - self.counter
+        if status:
+            self.status = status
+        writer_ = writer()
+        if writer_ is not None:
+            writer_.put(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.end(ERROR if type else None)
+
+
+class NullSpan():
+    '''A span doing nothing, returned when spans are not recorded.
+    '''
+    def set(self, **args):
+        pass
+
+    def end(self, status=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class SpanWriter():
+    '''Background writer of spans.
+
+    Args:
+        path (str): The file to write to.
+        format (str): *chrome* or *jsonl*. If not set, it is *chrome* if the
+            file name ends with *.json*, otherwise *jsonl*.
+
+    Attributes:
+        count (int): The number of spans written.
+    '''
+    def __init__(self, path, format=None):
+        if not format:
+            format = CHROME if path.endswith(".json") else JSON_LINES
+        self.path = path
+        self.format = format
+        self.count = 0
+        import queue
+        self.queue = queue.Queue()
+        self.file = open(path, "w")
+        if format == CHROME:
+            self.file.write("[\n")
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def put(self, span):
+        self.queue.put(span)
+
+    def record(self, span):
+        if self.format == CHROME:
+            args = dict(span.args)
+            args["status"] = span.status
+            return "{}{}".format(",\n" if self.count else "", json.dumps({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": int(span.start * 1e6),
+                "dur": int(span.duration * 1e6),
+                "pid": os.getpid(),
+                "tid": span.thread,
+                "args": args
+            }))
+        record = {
+            "name": span.name,
+            "category": span.category,
+            "start": span.start,
+            "duration": span.duration,
+            "status": span.status,
+            "thread": span.thread
+        }
+        record.update(span.args)
+        return json.dumps(record) + "\n"
+
+    def run(self):
+        buffer = []
+        while True:
+            span = self.queue.get()
+            if span is not None:
+                buffer.append(self.record(span))
+                self.count += 1
+            if span is None or len(buffer) >= FLUSH_SIZE \
+                                                    or self.queue.empty():
+                self.file.write("".join(buffer))
+                self.file.flush()
+                buffer = []
+            if span is None:
+                return
+
+    def close(self):
+        '''Write the pending spans, and close the file.
+        '''
+        self.queue.put(None)
+        self.thread.join()
+        if self.format == CHROME:
+            self.file.write("\n]\n")
+        self.file.close()
+
+
+__writer = None
+
+
+def writer():
+    '''Return the current :class:`.SpanWriter` object, or *None*.
+    '''
+    return __writer
+
+
+def start(path, format=None):
+    '''Start recording spans to a file; stop the current recording, if any.
+
+    Args:
+        path (str): The file.
+        format (str): *chrome* or *jsonl*, see :class:`.SpanWriter`.
+    '''
+    global __writer
+    stop()
+    __writer = SpanWriter(path, format)
+    atexit.register(stop)
+    return __writer
+
+
+def stop():
+    '''Stop recording spans, and close the file.
+    '''
+    global __writer
+    writer_ = __writer
+    __writer = None
+    if writer_ is not None:
+        writer_.close()
+
+
+def span(name, category, **args):
+    '''Return a new :class:`.Span` object, if spans are recorded, otherwise
+    a span doing nothing. Use it as a context manager::
+
+        with spans.span("build", "build", contract_dir=contract_dir):
+            ...
+    '''
+    if __writer is None:
+        return NULL_SPAN
+    return Span(name, category, args)
+
+
+def traced(name, category):
+    '''Decorator making each call of the function a span.
+    '''
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,385 @@
+'''Client of the state history plugin of *nodeos*.
+
+Instead of polling the tables of a contract, subscribe to the websocket of the
+state history plugin, and receive the changes of the tables, and the traces
+of the actions, block after block, decoded with the ABI of the contracts.
+
+The plugin is enabled with the *state_history* argument of
+:func:`.core.manager.reset`. Then, either iterate asynchronously::
+
+    async for delta in state_history.StateHistory().deltas():
+        print(delta["table"], delta["primary_key"], delta["value"])
+
+or register callbacks::
+
+    state_history.StateHistory(end_block=100).run(on_delta=print)
+
+The websocket client needs the *websockets* package. A session recorded with
+the *record* argument is replayed with the *fixture* argument, without any
+node.
+'''
+import json
+import asyncio
+
+import eosfactory.core.errors as errors
+import eosfactory.core.config as config
+import eosfactory.core.abi_serializer as abi_serializer
+
+MAX_BLOCK = 0xffffffff
+MESSAGES_IN_FLIGHT = 10
+CONTRACT_ROW = "contract_row"
+SET_ABI = ("eosio", "setabi")
+
+
+def websockets_module():
+    try:
+        import websockets
+    except ImportError:
+        raise errors.Error('''
+        The ``websockets`` package is needed to connect to the state history
+        plugin. Install it with:
+            pip install websockets
+        ''')
+    return websockets
+
+
+def variant_value(value):
+    '''Return the value of a variant, whatever its version.
+    '''
+    return value[1] if isinstance(value, list) else value
+
+
+class Socket():
+    '''Websocket connection to the state history plugin.
+
+    Args:
+        endpoint (str): The address of the plugin.
+    '''
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.socket = None
+
+    async def connect(self):
+        websockets = websockets_module()
+        self.closed = websockets.ConnectionClosed
+        self.socket = await websockets.connect(
+                                "ws://" + self.endpoint, max_size=None)
+
+    async def recv(self):
+        '''Return the next message, or *None* if the connection is closed.
+        '''
+        try:
+            return await self.socket.recv()
+        except self.closed:
+            return None
+
+    async def send(self, message):
+        await self.socket.send(message)
+
+    async def close(self):
+        if self.socket:
+            await self.socket.close()
+
+
+class Fixture():
+    '''Recorded messages of the state history plugin, replayed as a
+    connection.
+
+    Args:
+        path (str): The file of the messages, each in a line, as written by
+            :class:`.Recorder`.
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.messages = []
+        self.sent = []
+
+    async def connect(self):
+        with open(self.path, "r") as f:
+            self.messages = [json.loads(line) for line in f if line.strip()]
+        self.messages.reverse()
+
+    async def recv(self):
+        if not self.messages:
+            return None
+        message = self.messages.pop()
+        return message["text"] if "text" in message \
+                                        else bytes.fromhex(message["binary"])
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def close(self):
+        self.messages = []
+
+
+class Recorder():
+    '''Connection that writes the messages received to a fixture file.
+
+    Args:
+        socket: The connection recorded.
+        path (str): The fixture file.
+    '''
+    def __init__(self, socket, path):
+        self.socket = socket
+        self.path = path
+        self.file = None
+
+    async def connect(self):
+        await self.socket.connect()
+        self.file = open(self.path, "w")
+
+    async def recv(self):
+        message = await self.socket.recv()
+        if message is not None:
+            self.file.write(json.dumps({"text": message} \
+                if isinstance(message, str) else {"binary": message.hex()}))
+            self.file.write("\n")
+        return message
+
+    async def send(self, message):
+        await self.socket.send(message)
+
+    async def close(self):
+        self.file.close()
+        await self.socket.close()
+
+
+class StateHistory():
+    '''Subscription to the state history plugin of *nodeos*.
+
+    Args:
+        endpoint (str): The address of the plugin. Default is
+            :func:`.core.config.state_history_endpoint`.
+        start_block (int): The number of the first block. Default is 0.
+        end_block (int): If set, the number of the block, exclusive, where
+            the subscription ends.
+        irreversible_only (bool): If set, only irreversible blocks are
+            received. Default is *False*.
+        abis (dict): The ABIs of contracts, indexed with account names. The
+            ABIs of other contracts are fetched from the node, when first
+            needed.
+        fixture (str): If set, a recorded session replayed instead of a
+            connection to the node.
+        record (str): If set, the file the session is recorded to.
+
+    Attributes:
+        ship_abi (.core.abi_serializer.AbiSerializer): The serializer of the
+            protocol of the plugin, as sent by the plugin.
+    '''
+    def __init__(
+            self, endpoint=None, start_block=0, end_block=None,
+            irreversible_only=False, abis=None, fixture=None, record=None):
+        self.endpoint = endpoint
+        self.start_block = start_block
+        self.end_block = end_block
+        self.irreversible_only = irreversible_only
+        self.fixture = fixture
+        self.record = record
+        self.ship_abi = None
+        self.serializers = {}
+        for code, abi in (abis or {}).items():
+            self.serializers[code] = abi_serializer.AbiSerializer(abi)
+
+    def connection(self):
+        if self.fixture:
+            return Fixture(self.fixture)
+        socket = Socket(self.endpoint or config.state_history_endpoint())
+        return Recorder(socket, self.record) if self.record else socket
+
+    def serializer(self, code):
+        '''Return the serializer of the ABI of a contract, or *None* if the
+        ABI is not available.
+
+        Note that the ABI fetched from the node is the current one.
+        '''
+        if not code in self.serializers:
+            import eosfactory.core.cleos_get as cleos_get
+            try:
+                abi = cleos_get.GetAbi(code, is_verbose=False).abi
+            except Exception:
+                abi = None
+            self.serializers[code] = abi_serializer.AbiSerializer(abi) \
+                                                                if abi else None
+        return self.serializers[code]
+
+    def decode_data(self, code, kind, name, data):
+        serializer = self.serializer(code)
+        type_ = getattr(serializer, kind + "_type")(name) \
+                                                    if serializer else None
+        if not type_:
+            return data
+        try:
+            return serializer.decode(type_, data)
+        except errors.Error:
+            return data
+
+    def request(self, name, value):
+        return self.ship_abi.encode("request", [name, value])
+
+    async def blocks(self):
+        '''Iterate over the blocks.
+
+        Yields:
+            dict: The number and id of the block, *block_num* and *block_id*,
+            the head and last irreversible block numbers, *head* and
+            *last_irreversible*, the action traces, *traces*, as returned with
+            :func:`.traces`, and the table deltas, *deltas*, as returned with
+            :func:`.deltas`.
+        '''
+        socket = self.connection()
+        await socket.connect()
+        try:
+            self.ship_abi = abi_serializer.AbiSerializer(
+                                            json.loads(await socket.recv()))
+            await socket.send(self.request("get_blocks_request_v0", {
+                "start_block_num": self.start_block,
+                "end_block_num": MAX_BLOCK if self.end_block is None \
+                                                        else self.end_block,
+                "max_messages_in_flight": MESSAGES_IN_FLIGHT,
+                "have_positions": [],
+                "irreversible_only": self.irreversible_only,
+                "fetch_block": False,
+                "fetch_traces": True,
+                "fetch_deltas": True
+            }))
+
+            while True:
+                message = await socket.recv()
+                if message is None:
+                    break
+                result = variant_value(self.ship_abi.decode("result", message))
+                await socket.send(self.request(
+                                "get_blocks_ack_request_v0", {"num_messages": 1}))
+                if not result.get("this_block"):
+                    continue
+                block_num = result["this_block"]["block_num"]
+                yield {
+                    "block_num": block_num,
+                    "block_id": result["this_block"]["block_id"],
+                    "head": result["head"]["block_num"],
+                    "last_irreversible":
+                                    result["last_irreversible"]["block_num"],
+                    "traces": self.decode_traces(
+                                            block_num, result.get("traces")),
+                    "deltas": self.decode_deltas(
+                                            block_num, result.get("deltas"))
+                }
+                if self.end_block is not None \
+                                        and block_num + 1 >= self.end_block:
+                    break
+        finally:
+            await socket.close()
+
+    def decode_traces(self, block_num, data):
+        traces = []
+        if not data:
+            return traces
+        for transaction in self.ship_abi.decode("transaction_trace[]", data):
+            transaction = variant_value(transaction)
+            for trace in transaction["action_traces"]:
+                trace = variant_value(trace)
+                act = trace["act"]
+                if (act["account"], act["name"]) == SET_ABI:
+                    # The contract changes its ABI:
+                    self.serializers.pop(abi_serializer.int_to_name(
+                        int.from_bytes(
+                            bytes.fromhex(act["data"][:16]), "little")), None)
+                traces.append({
+                    "block_num": block_num,
+                    "trx_id": transaction["id"],
+                    "status": transaction["status"],
+                    "receiver": trace["receiver"],
+                    "account": act["account"],
+                    "name": act["name"],
+                    "authorization": ["{}@{}".format(
+                                item["actor"], item["permission"]) \
+                                            for item in act["authorization"]],
+                    "data": self.decode_data(
+                                act["account"], "action", act["name"],
+                                act["data"]),
+                    "console": trace.get("console", ""),
+                    "except": trace.get("except")
+                })
+        return traces
+
+    def decode_deltas(self, block_num, data):
+        deltas = []
+        if not data:
+            return deltas
+        for delta in self.ship_abi.decode("table_delta[]", data):
+            delta = variant_value(delta)
+            if not delta["name"] == CONTRACT_ROW:
+                continue
+            for row in delta["rows"]:
+                value = variant_value(
+                                self.ship_abi.decode(CONTRACT_ROW, row["data"]))
+                deltas.append({
+                    "block_num": block_num,
+                    "present": row["present"],
+                    "code": value["code"],
+                    "scope": value["scope"],
+                    "table": value["table"],
+                    "primary_key": value["primary_key"],
+                    "payer": value["payer"],
+                    "value": self.decode_data(
+                            value["code"], "table", value["table"],
+                            value["value"])
+                })
+        return deltas
+
+    async def traces(self):
+        '''Iterate over the action traces.
+
+        Yields:
+            dict: The block number, *block_num*, the transaction id, *trx_id*,
+            the transaction *status*, the *receiver*, the *account* and the
+            *name* of the action, the *authorization*, as a list of
+            *actor@permission* strings, the action *data*, decoded with the
+            ABI of the contract, if available, the *console* output, and the
+            exception message, *except*, if any.
+        '''
+        async for block in self.blocks():
+            for trace in block["traces"]:
+                yield trace
+
+    async def deltas(self):
+        '''Iterate over the changes of the contract tables.
+
+        Yields:
+            dict: The block number, *block_num*, whether the row is present or
+            removed, *present*, the *code*, the *scope*, the *table*, the
+            *primary_key* and the *payer* of the row, and its *value*, decoded
+            with the ABI of the contract, if available.
+        '''
+        async for block in self.blocks():
+            for delta in block["deltas"]:
+                yield delta
+
+    async def dispatch(self, on_block, on_trace, on_delta):
+        async for block in self.blocks():
+            if on_block:
+                on_block(block)
+            for trace in block["traces"] if on_trace else []:
+                on_trace(trace)
+            for delta in block["deltas"] if on_delta else []:
+                on_delta(delta)
+
+    def run(self, on_block=None, on_trace=None, on_delta=None):
+        '''Receive the blocks, until the end block or the end of the
+        connection, and call the callbacks.
+
+        Args:
+            on_block (function): If set, called with each block, see
+                :func:`.blocks`.
+            on_trace (function): If set, called with each action trace, see
+                :func:`.traces`.
+            on_delta (function): If set, called with each table delta, see
+                :func:`.deltas`.
+        '''
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(
+                                self.dispatch(on_block, on_trace, on_delta))
+        finally:
+            loop.close()
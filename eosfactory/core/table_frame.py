@@ -0,0 +1,489 @@
+'''Columnar snapshots of contract tables.
+
+A :class:`.TableFrame` object keeps the rows of a table as columns, typed
+with the ABI of the contract, so that assertions and analytics over large
+tables do not loop over rows in Python::
+
+    frame = host.table_frame("accounts", scope=[alice, carol])
+    rich = frame.where(frame["balance"] > 100)
+    totals = frame.group_by("scope", {"balance": "sum"})
+
+The columns are *NumPy* arrays, if the ``numpy`` package is installed,
+otherwise lists; then comparisons like ``frame["balance"] > 100`` are not
+vectorized, and masks are made with the method :meth:`.TableFrame.mask`,
+which works in both cases. A frame converts to a *pandas* DataFrame with the
+method :meth:`.TableFrame.to_pandas`, if the ``pandas`` package is
+installed.
+
+Integer columns are *int64*, or *uint64* for *uint64* fields; *float32* and
+*float64* fields are *float64*, *bool* fields are *bool*. Other fields, like
+names, assets, 128-bit integers, arrays and structures, are object columns.
+'''
+import operator
+
+import eosfactory.core.errors as errors
+import eosfactory.core.interface as interface
+import eosfactory.core.cleos_get as cleos_get
+
+INT_TYPES = [
+    "int8", "int16", "int32", "int64", "uint8", "uint16", "uint32",
+    "varint32", "varuint32"]
+UINT64_TYPES = ["uint64"]
+FLOAT_TYPES = ["float32", "float64"]
+BOOL_TYPES = ["bool"]
+AGGREGATIONS = ["count", "sum", "mean", "min", "max"]
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge
+}
+SCOPE = "scope"
+
+__numpy = None
+
+
+def numpy_module():
+    '''Return the ``numpy`` module, or *False* if it is not installed.
+    '''
+    global __numpy
+    if __numpy is None:
+        try:
+            import numpy
+            __numpy = numpy
+        except ImportError:
+            __numpy = False
+    return __numpy
+
+
+def abi_fields(abi, table):
+    '''Return the fields of the rows of a table, as defined with the ABI.
+
+    Args:
+        abi (dict): The ABI of the contract.
+        table (str): The name of the table.
+
+    Returns:
+        list: The *(name, type)* pairs, including the fields of the base
+        structures, with the type aliases resolved.
+    '''
+    aliases = {item["new_type_name"]: item["type"] \
+                                            for item in abi.get("types", [])}
+    structs = {item["name"]: item for item in abi.get("structs", [])}
+
+    def resolve(type_):
+        while type_ in aliases:
+            type_ = aliases[type_]
+        return type_
+
+    type_ = None
+    for item in abi.get("tables", []):
+        if item["name"] == table:
+            type_ = resolve(item["type"])
+    if type_ is None or not type_ in structs:
+        raise errors.Error('''
+        The ABI does not define the table ``{}``.
+        '''.format(table))
+
+    fields = []
+    while type_:
+        struct = structs[type_]
+        fields = [(field["name"], resolve(field["type"])) \
+                                    for field in struct["fields"]] + fields
+        type_ = resolve(struct["base"]) if struct.get("base") else None
+    return fields
+
+
+def convert(values, type_):
+    '''Return the values as a column of the given ABI type.
+    '''
+    numpy = numpy_module()
+    try:
+        if type_ in INT_TYPES:
+            values = [int(value) for value in values]
+            return numpy.array(values, dtype=numpy.int64) if numpy else values
+        if type_ in UINT64_TYPES:
+            values = [int(value) for value in values]
+            return numpy.array(values, dtype=numpy.uint64) if numpy else values
+        if type_ in FLOAT_TYPES:
+            values = [float(value) for value in values]
+            return numpy.array(values, dtype=numpy.float64) \
+                                                        if numpy else values
+        if type_ in BOOL_TYPES:
+            values = [bool(value) for value in values]
+            return numpy.array(values, dtype=bool) if numpy else values
+    except (TypeError, ValueError):
+        pass
+    return object_column(values)
+
+
+def object_column(values):
+    numpy = numpy_module()
+    if not numpy:
+        return list(values)
+    column = numpy.empty(len(values), dtype=object)
+    column[:] = list(values)
+    return column
+
+
+def take(column, positions):
+    '''Return the items of a column at the given positions.
+    '''
+    numpy = numpy_module()
+    if numpy and isinstance(column, numpy.ndarray):
+        return column[numpy.asarray(positions, dtype=numpy.int64)]
+    return [column[position] for position in positions]
+
+
+class TableFrame():
+    '''Columns of a table.
+
+    Args:
+        columns (dict): Values of each column, by column name; the columns are
+            to be of the same length.
+        types (dict): The ABI types of the columns, by column name. The
+            columns not listed are object columns.
+
+    Attributes:
+        names (list): The names of the columns, in order.
+        types (dict): The ABI types of the columns.
+        indexes (dict): The in-memory indexes made with the method
+            :meth:`.index`, by column name.
+    '''
+    def __init__(self, columns, types=None):
+        self.types = dict(types) if types else {}
+        self.names = list(columns)
+        self.columns = {}
+        self.indexes = {}
+        length = None
+        for name in self.names:
+            self.columns[name] = convert(columns[name], self.types.get(name))
+            if length is None:
+                length = len(self.columns[name])
+            elif not len(self.columns[name]) == length:
+                raise errors.Error('''
+                The columns of a table frame are to be of the same length; the
+                column ``{}`` has {} values, while there are {} rows.
+                '''.format(name, len(self.columns[name]), length))
+        self.length = length if length else 0
+
+    @classmethod
+    def from_rows(cls, rows, fields=None):
+        '''Make a frame from rows, as returned by the *get table* command.
+
+        Args:
+            rows (list): The rows, as *dict* objects.
+            fields (list): The *(name, type)* pairs, see :func:`.abi_fields`.
+                If not set, the columns are the keys of the first row, and
+                their types are not known.
+        '''
+        rows = list(rows)
+        if fields is None:
+            fields = [(name, None) for name in (rows[0] if rows else [])]
+        return cls(
+            {name: [row.get(name) for row in rows] for name, type_ in fields},
+            {name: type_ for name, type_ in fields if type_})
+
+    @classmethod
+    def concat(cls, frames):
+        '''Join the rows of frames with the same columns.
+        '''
+        frames = list(frames)
+        if not frames:
+            return cls({})
+        columns = {}
+        for name in frames[0].names:
+            values = []
+            for frame in frames:
+                values.extend(list(frame[name]))
+            columns[name] = values
+        return cls(columns, frames[0].types)
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, name):
+        '''Return the column of the given name.
+        '''
+        if not name in self.columns:
+            raise errors.Error('''
+            There is no column ``{}`` in the table frame; the columns are:
+            {}
+            '''.format(name, ", ".join(self.names)))
+        return self.columns[name]
+
+    def __str__(self):
+        lines = ["\t".join(self.names)]
+        for row in self.rows():
+            lines.append("\t".join([str(row[name]) for name in self.names]))
+        return "\n".join(lines)
+
+    def rows(self):
+        '''Return the rows, as *dict* objects.
+        '''
+        return [{name: self.value(self.columns[name][i]) \
+                        for name in self.names} for i in range(self.length)]
+
+    def value(self, value):
+        # NumPy scalars to Python values:
+        return value.item() if hasattr(value, "item") else value
+
+    def mask(self, name, op, value):
+        '''Return the mask of the rows where the column compares with the
+        value.
+
+        Args:
+            name (str): The name of the column.
+            op (str): One of *==*, *!=*, *<*, *<=*, *>*, *>=*, or *in*; with
+                *in*, the value is a collection.
+            value: The value compared with.
+        '''
+        column = self[name]
+        numpy = numpy_module()
+        if op == "in":
+            if numpy:
+                return numpy.array(
+                            [item in value for item in column], dtype=bool)
+            return [item in value for item in column]
+        if not op in OPERATORS:
+            raise errors.Error('''
+            The operator ``{}`` is not one of {}.
+            '''.format(op, ", ".join(list(OPERATORS) + ["in"])))
+        if numpy and not column.dtype == object:
+            return OPERATORS[op](column, value)
+        result = [OPERATORS[op](item, value) for item in column]
+        return numpy.array(result, dtype=bool) if numpy else result
+
+    def positions(self, mask):
+        return [i for i, selected in enumerate(mask) if selected]
+
+    def select(self, positions):
+        '''Return a frame of the rows at the given positions.
+        '''
+        return TableFrame(
+            {name: take(self.columns[name], positions) for name in self.names},
+            self.types)
+
+    def where(self, mask=None, **equals):
+        '''Return a frame of the rows selected with the mask, where the given
+        columns equal the given values::
+
+            frame.where(frame.mask("amount", ">", 100), owner="alice")
+
+        Args:
+            mask (list or array): If set, a boolean value for each row.
+            equals: Column names with values.
+        '''
+        numpy = numpy_module()
+        if mask is None:
+            mask = [True] * self.length
+        for name, value in equals.items():
+            if name in self.indexes:
+                selected = set(self.indexes[name].get(value, []))
+                mask = [bool(item) and i in selected \
+                                                for i, item in enumerate(mask)]
+            else:
+                other = self.mask(name, "==", value)
+                mask = numpy.logical_and(mask, other) if numpy \
+                            else [a and b for a, b in zip(mask, other)]
+        if numpy:
+            return self.select(numpy.flatnonzero(numpy.asarray(mask)))
+        return self.select(self.positions(mask))
+
+    def sort(self, name, reverse=False):
+        '''Return a frame sorted with the given column.
+        '''
+        column = self[name]
+        numpy = numpy_module()
+        if numpy and not column.dtype == object:
+            positions = numpy.argsort(column, kind="stable")
+            if reverse:
+                positions = positions[::-1]
+        else:
+            positions = sorted(
+                range(self.length), key=lambda i: column[i], reverse=reverse)
+        return self.select(positions)
+
+    def aggregate(self, name, function):
+        '''Return an aggregate of a column.
+
+        Args:
+            name (str): The name of the column.
+            function (str): One of *count*, *sum*, *mean*, *min*, *max*.
+        '''
+        if not function in AGGREGATIONS:
+            raise errors.Error('''
+            The aggregation ``{}`` is not one of {}.
+            '''.format(function, ", ".join(AGGREGATIONS)))
+        column = self[name]
+        if function == "count":
+            return self.length
+        if not self.length:
+            return None
+        numpy = numpy_module()
+        if numpy and not column.dtype == object:
+            return self.value(getattr(numpy, function)(column))
+        if function == "sum":
+            return sum(column)
+        if function == "mean":
+            return sum(column) / self.length
+        return min(column) if function == "min" else max(column)
+
+    def sum(self, name):
+        return self.aggregate(name, "sum")
+
+    def mean(self, name):
+        return self.aggregate(name, "mean")
+
+    def min(self, name):
+        return self.aggregate(name, "min")
+
+    def max(self, name):
+        return self.aggregate(name, "max")
+
+    def group_by(self, key, aggregations):
+        '''Aggregate columns, for each value of the key column.
+
+        Args:
+            key (str): The name of the key column.
+            aggregations (dict): The aggregations, see :meth:`.aggregate`, by
+                column name.
+
+        Returns:
+            :class:`.TableFrame`: A frame with the key column, and a column
+            for each aggregation, sorted with the key.
+        '''
+        index = self.index(key)
+        keys = sorted(index)
+        columns = {key: keys}
+        types = {key: self.types.get(key)}
+        for name, function in aggregations.items():
+            columns[name] = [
+                self.select(index[value]).aggregate(name, function) \
+                                                            for value in keys]
+            types[name] = self.types.get(name) if function in [
+                                "sum", "min", "max"] else (
+                                    "uint64" if function == "count" \
+                                                            else "float64")
+        return TableFrame(columns, types)
+
+    def index(self, name):
+        '''Return the in-memory index of a column, made on the first call:
+        the positions of the rows, by column value. The method
+        :meth:`.where` uses it, if any.
+        '''
+        if not name in self.indexes:
+            index = {}
+            for position, value in enumerate(self[name]):
+                index.setdefault(self.value(value), []).append(position)
+            self.indexes[name] = index
+        return self.indexes[name]
+
+    def lookup(self, name, value):
+        '''Return a frame of the rows where the column equals the value, using
+        the in-memory index of the column.
+        '''
+        return self.select(self.index(name).get(value, []))
+
+    def join(self, other, on, how="inner", suffix="_right"):
+        '''Join with another frame, on the equality of a column.
+
+        Args:
+            other (.TableFrame): The other frame, indexed on the column.
+            on (str): The name of the column.
+            how (str): *inner*, or *left*; with *left*, the rows without any
+                match are kept, with *None* values.
+            suffix (str): The suffix of the names of the columns of the other
+                frame that are in this frame, too.
+
+        Returns:
+            :class:`.TableFrame`: The joined frame.
+        '''
+        if not how in ["inner", "left"]:
+            raise errors.Error('''
+            The join is either ``inner`` or ``left``, not ``{}``.
+            '''.format(how))
+        index = other.index(on)
+        left = []
+        right = []
+        for position, value in enumerate(self[on]):
+            matches = index.get(self.value(value))
+            if matches:
+                for match in matches:
+                    left.append(position)
+                    right.append(match)
+            elif how == "left":
+                left.append(position)
+                right.append(None)
+
+        columns = {name: take(self.columns[name], left) for name in self.names}
+        types = dict(self.types)
+        for name in other.names:
+            if name == on:
+                continue
+            column = other[name]
+            values = [
+                None if position is None else column[position] \
+                                                        for position in right]
+            joined = name + suffix if name in self.columns else name
+            columns[joined] = values
+            if name in other.types and not None in right:
+                types[joined] = other.types[name]
+        return TableFrame(columns, types)
+
+    def to_pandas(self):
+        '''Return the frame as a *pandas* DataFrame.
+        '''
+        try:
+            import pandas
+        except ImportError:
+            raise errors.Error('''
+            The ``pandas`` package is needed to export a table frame as a
+            DataFrame.
+            ''')
+        return pandas.DataFrame(
+                    {name: self.columns[name] for name in self.names},
+                    columns=self.names)
+
+
+def table_frame(account, table, scope="", page_size=100, concurrency=4):
+    '''Load a table into a :class:`.TableFrame` object, typed with the ABI of
+    the contract.
+
+    Args:
+        account (str or .interface.Account): The contract who owns the table.
+        table (str): The name of the table.
+        scope (str or .interface.Account or list): The scope, or a list of
+            scopes, or *None* for all the scopes of the table. If there are
+            many scopes, the frame has an additional *scope* column, and the
+            scopes are fetched concurrently.
+        page_size (int): The maximum number of rows fetched with a single
+            request. Default is 100.
+        concurrency (int): The number of scopes fetched in parallel. Default
+            is 4.
+    '''
+    fields = abi_fields(cleos_get.GetAbi(account, is_verbose=False).abi, table)
+    if scope is None or isinstance(scope, (list, tuple)):
+        if scope is None:
+            rows = cleos_get.scan_all_scopes(
+                                    account, table, concurrency, page_size)
+        else:
+            rows = cleos_get.scan_scopes(
+                                account, table, [interface.account_arg(item) \
+                                    for item in scope], concurrency, page_size)
+        scopes = []
+        values = []
+        for scope_, row in rows:
+            scopes.append(scope_)
+            values.append(row)
+        frame = TableFrame.from_rows(values, fields + [(SCOPE, "name")])
+        frame.columns[SCOPE] = object_column(scopes)
+        return frame
+
+    return TableFrame.from_rows(
+                cleos_get.table_rows(account, table, scope, page_size), fields)
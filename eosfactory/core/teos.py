@@ -5,13 +5,9 @@ import subprocess
 import threading
 import time
 import re
-import pathlib
 import shutil
-import pprint
 import json
 import sys
-import math
-import psutil
 
 import eosfactory.core.errors as errors
 import eosfactory.core.logger as logger
@@ -19,6 +15,7 @@ import eosfactory.core.utils as utils
 import eosfactory.core.setup as setup
 import eosfactory.core.config as config
 import eosfactory.core.vscode as vscode
+import eosfactory.core.spans as spans
 
 TEMPLATE_NAME = "CONTRACT_NAME"
 TEMPLATE_HOME = "${HOME}"
@@ -27,26 +24,57 @@ TASK_JSON = "${tasks}"
 CONFIGURATIONS = "configurations"
 BROWSE = "browse"
 WORKSPACE_FOLDER = "${workspaceFolder}"
-# The root directory of the Windows WSL, or empty string if not Windows:
-ROOT = config.wsl_root() 
-HOME = ROOT + os.environ["HOME"] # Linux ~home<user name>
-PROJECT_0_DIR = os.path.join(config.template_dir(), config.PROJECT_0)
 ERR_MSG_IS_STUCK = "The process of 'nodeos' is stuck."
 
+__root = None
+
+
+def root():
+    '''The root directory of the Windows WSL, or empty string if not Windows.
+
+    It is determined on the first call, not on import, as it spawns a process.
+    '''
+    global __root
+    if __root is None:
+        __root = config.wsl_root()
+    return __root
+
+
+def home():
+    '''The Linux home directory, prefixed with :func:`root`.
+    '''
+    return root() + os.environ["HOME"]
+
+
+def project_0_dir():
+    return os.path.join(config.template_dir(), config.PROJECT_0)
+
+
+def __getattr__(name):
+    # The former module constants:
+    if name == "ROOT":
+        return root()
+    if name == "HOME":
+        return home()
+    if name == "PROJECT_0_DIR":
+        return project_0_dir()
+    raise AttributeError(
+                "module '{}' has no attribute '{}'".format(__name__, name))
+
 
 def resolve_home(string): 
-    return string.replace(TEMPLATE_HOME, HOME)
+    return string.replace(TEMPLATE_HOME, home())
 
 
 def naturalize_path(path):
-    path = path.replace(TEMPLATE_HOME, HOME)
+    path = path.replace(TEMPLATE_HOME, home())
     if path.find("/mnt/") != 0:
-        path = ROOT + path
+        path = root() + path
     return utils.wslMapLinuxWindows(path, back_slash=False)
 
 
 def linuxize_path(path):
-    return utils.wslMapWindowsLinux(path.replace(ROOT, ""))
+    return utils.wslMapWindowsLinux(path.replace(root(), ""))
 
 
 def get_c_cpp_properties(contract_dir=None, c_cpp_properties_path=None):
@@ -71,6 +99,7 @@ def get_c_cpp_properties(contract_dir=None, c_cpp_properties_path=None):
         return json.loads(resolve_home(vscode.c_cpp_properties()))
 
 
+@spans.traced("build", "build")
 def build(
         contract_dir_hint, c_cpp_properties_path=None,
         compile_only=False, is_test_mode=False, is_execute=False, 
@@ -320,7 +349,8 @@ The file path is to be absolute or relative to the project directory.
             {}
             '''.format(" ".join(command_line)), [logger.Verbosity.DEBUG])
         
-    utils.long_process(command_line, build_dir, is_verbose=True, 
+    with spans.span("eosio-cpp", "build", contract_dir=contract_dir):
+        utils.long_process(command_line, build_dir, is_verbose=True, 
                                                             prompt="eosio-cpp")
     if not compile_only:
         if "wasm" in target_path:
@@ -509,8 +539,8 @@ already exists. Cannot overwrite it.
         with open(contract_path, "w") as output:
             output.write(template)
 
-    copy_dir_contents(project_dir, PROJECT_0_DIR, "", project_name)
-    if not template_dir == PROJECT_0_DIR: 
+    copy_dir_contents(project_dir, project_0_dir(), "", project_name)
+    if not template_dir == project_0_dir(): 
         copy_dir_contents(project_dir, template_dir, "", project_name)  
 
     if open_vscode:
@@ -537,6 +567,7 @@ already exists. Cannot overwrite it.
 def get_pid(name=None):
     """Return process ids found by name.
     """    
+    import psutil
     if not name:
         name = os.path.splitext(os.path.basename(config.node_exe()))[0]
 
@@ -595,30 +626,159 @@ def get_include_dir(source_dir):
     return path
 
 
-def args(clear=False):
+PLUGINS = [
+    "eosio::producer_plugin",
+    "eosio::chain_api_plugin",
+    "eosio::http_plugin",
+]
+# The plugins needed by *cleos*; the HTTP plugin is a dependency of the chain
+# API plugin:
+MINIMAL_PLUGINS = [
+    "eosio::producer_plugin",
+    "eosio::chain_api_plugin",
+]
+# The file systems in memory:
+RAMDISK_TYPES = ["tmpfs", "ramfs"]
+# The profiles of the command line of the local nodeos, selected with
+# :func:`.core.config.nodeos_profile`:
+PROFILES = {
+    "default": {
+        "plugins": PLUGINS,
+        "options": ["--contracts-console", "--verbose-http-errors"],
+    },
+    # Throughput experiments: no console output, long transactions allowed.
+    "bench": {
+        "plugins": MINIMAL_PLUGINS,
+        "options": [
+            "--max-transaction-time 1000",
+            "--abi-serializer-max-time-ms 1000",
+        ],
+    },
+    # The history of actions, see :mod:`.core.history`.
+    "debug": {
+        "plugins": PLUGINS + [
+            "eosio::history_plugin", "eosio::history_api_plugin"],
+        "options": [
+            "--contracts-console", "--verbose-http-errors",
+            "--filter-on '*'",
+        ],
+    },
+    # The state and the blocks on tmpfs, see 
+    # :func:`.core.config.nodeos_ramdisk_dir`.
+    "ramdisk": {
+        "plugins": PLUGINS,
+        "options": ["--contracts-console", "--verbose-http-errors"],
+        "ramdisk": True,
+    },
+}
+
+
+def profile(name=None):
+    '''Return the profile of the command line of the local *nodeos*.
+
+    Args:
+        name (str): The name of the profile, see :attr:`.PROFILES`. Default is
+            :func:`.core.config.nodeos_profile`.
+    '''
+    if not name:
+        name = config.nodeos_profile()
+    if not name in PROFILES:
+        raise errors.Error('''
+        The nodeos profile ``{}`` is not defined. The profiles are:
+        {}
+        '''.format(name, ", ".join(sorted(PROFILES))))
+    return PROFILES[name]
+
+
+def mount_type(path):
+    '''Return the type of the file system the given path is on, or *None* if
+    it cannot be determined.
+    '''
+    path = os.path.realpath(path)
+    mount_point = ""
+    type_ = None
+    try:
+        with open("/proc/mounts") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                point = fields[1].replace("\\040", " ")
+                if (path == point \
+                        or path.startswith(point.rstrip("/") + "/")) \
+                                        and len(point) >= len(mount_point):
+                    mount_point = point
+                    type_ = fields[2]
+    except OSError:
+        return None
+    return type_
+
+
+def ramdisk_dir(name):
+    '''Return a directory of the given name in
+    :func:`.core.config.nodeos_ramdisk_dir`, created if needed.
+
+    Raises:
+        .core.errors.Error: If the directory is not on *tmpfs*.
+    '''
+    path = os.path.join(config.nodeos_ramdisk_dir(), name)
+    type_ = mount_type(path)
+    if not type_ in RAMDISK_TYPES:
+        raise errors.Error('''
+        The ramdisk directory
+            {}
+        is not on tmpfs, but on ``{}``. Set the NODEOS_RAMDISK_DIR entry in 
+        the config.json file to a directory on tmpfs, for example, in 
+        /dev/shm/.
+        '''.format(path, type_ or "an unknown file system"))
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError as e:
+        raise errors.Error('''
+        Cannot create the ramdisk directory
+            {}
+        Error message is
+            {}
+        '''.format(path, str(e)))
+    return path
+
+
+def args(clear=False, state_history=False, profile_name=None):
+    profile_ = profile(profile_name)
     args_ = [
         "--http-server-address", config.http_server_address(),
         "--chain-state-db-size-mb", config.chain_state_db_size_mb(),
-        "--contracts-console",
-        "--verbose-http-errors",
         "--enable-stale-production",
         "--producer-name eosio",
         "--signature-provider " + config.eosio_key_public() + "=KEY:" 
             + config.eosio_key_private(),
-        "--plugin eosio::producer_plugin",
-        "--plugin eosio::chain_api_plugin",
-        "--plugin eosio::http_plugin",
     ]
+    args_.extend(["--plugin " + plugin for plugin in profile_["plugins"]])
+    args_.extend(profile_["options"])
     if config.nodeos_config_dir():
         args_.extend(["--config-dir", config.nodeos_config_dir()])
-    if config.nodeos_data_dir():
+    if profile_.get("ramdisk"):
+        args_.extend([
+            "--data-dir", ramdisk_dir("data"),
+            "--blocks-dir", ramdisk_dir("blocks")
+        ])
+    elif config.nodeos_data_dir():
         args_.extend(["--data-dir", config.nodeos_data_dir()])
     if config.nodeos_options():
-        args_.extend(nodeos_options())
+        args_.extend(config.nodeos_options())
+    if state_history:
+        args_.extend([
+            "--plugin eosio::state_history_plugin",
+            "--state-history-endpoint", config.state_history_endpoint(),
+            "--trace-history",
+            "--chain-state-history"
+        ])
 
     if clear:
         node_stop()
         args_.extend(["--delete-all-blocks"])
+        if state_history:
+            args_.extend(["--delete-state-history"])
         if config.genesis_json():
             args_.extend(["--genesis-json", config.genesis_json()])     
     return args_
@@ -634,7 +794,7 @@ def keosd_start():
                 break
 
 
-def on_nodeos_error(clear=False):
+def on_nodeos_error(clear=False, state_history=False, profile_name=None):
     ERROR_WAIT_TIME = 5
     NOT_ERROR = [
         "exit shutdown",
@@ -642,7 +802,7 @@ def on_nodeos_error(clear=False):
         ]
 
     node_stop()
-    args_ = args(clear)
+    args_ = args(clear, state_history, profile_name)
     args_.insert(0, config.node_exe())
     command_line = " ".join(args_)
 
@@ -703,7 +863,10 @@ Rerun the script with 'nodeos' restarted.
 
 
 std_out_handle = None
-def node_start(clear=False, nodeos_stdout=None):
+@spans.traced("node start", "node")
+def node_start(
+        clear=False, nodeos_stdout=None, state_history=False,
+        profile_name=None):
     '''Start the local EOSIO node.
 
     Args:
@@ -713,9 +876,13 @@ def node_start(clear=False, nodeos_stdout=None):
             the configuration of EOSFactory, see :func:`.core.config.nodeos_stdout`.
             If the file is set with the configuration, and in the same time 
             it is set with this argument, the argument setting prevails. 
+        state_history (bool): If set, the state history plugin is enabled,
+            see :mod:`.core.state_history`.
+        profile_name (str): If set, the profile of the command line, see
+            :func:`.profile`.
     '''
     
-    args_ = args(clear)
+    args_ = args(clear, state_history, profile_name)
         
     if not nodeos_stdout:
         nodeos_stdout = config.nodeos_stdout()
@@ -763,7 +930,9 @@ Error message is
     thread.start()
 
 
+@spans.traced("node probe", "node")
 def node_probe():
+    import psutil
     DELAY_TIME = 4
     WAIT_TIME = 1
 
@@ -845,6 +1014,7 @@ def is_local_node_process_running():
 
 
 def kill(name):
+    import psutil
     pids = get_pid(name)
     count = 10
     for pid in pids:
@@ -871,6 +1041,7 @@ def kill_keosd():
     kill(os.path.splitext(os.path.basename(config.keosd_exe()))[0])
 
 
+@spans.traced("node stop", "node")
 def node_stop(verbose=True):
     # You can see if the process is a zombie by using top or 
     # the following command:
@@ -39,7 +39,7 @@ class Testnet:
             else:
                 if not self.verify_production(throw_error=False):
                     manager.resume()
-            setup.is_local_address = True
+            setup.session().is_local_address = True
 
         self.account_name = account_name
         self.owner_key = owner_key
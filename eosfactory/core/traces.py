@@ -0,0 +1,243 @@
+'''Action trace tree of a transaction.
+
+The *["processed"]["action_traces"]* component of a *push* response is
+wrapped in a :class:`.TraceTree` object. Nodes of the tree, objects of the
+class :class:`.ActionTrace`, are created when accessed, and the console
+output of the tree is rendered, in one pass, when first read.
+
+Both trace layouts are supported: the nested one, where inline actions are
+listed under *inline_traces*, and the flat one, where all actions are listed
+together and linked with *creator_action_ordinal*.
+
+Example::
+
+    action = cleos.PushAction(...)
+    for trace in action.traces.find(receiver="alice"):
+        print(trace.console)
+'''
+import eosfactory.core.interface as interface
+
+PADDING = "  "
+
+
+class ActionTrace():
+    '''A node of a trace tree.
+
+    Args:
+        trace (dict): The action trace.
+        children ([dict]): If set, the inline action traces, otherwise the
+            *inline_traces* component of the trace.
+        depth (int): The depth of the node in the tree.
+
+    Attributes:
+        json (dict): The action trace.
+        depth (int): The depth of the node in the tree.
+    '''
+    def __init__(self, trace, children=None, depth=0):
+        self.json = trace
+        self.depth = depth
+        self._children = children
+        self._inline_traces = None
+        self._console = None
+
+    @property
+    def account(self):
+        '''The account of the contract executing the action.
+        '''
+        return self.json["act"]["account"]
+
+    @property
+    def name(self):
+        '''The name of the action.
+        '''
+        return self.json["act"]["name"]
+
+    @property
+    def data(self):
+        '''The data of the action.
+        '''
+        return self.json["act"]["data"]
+
+    @property
+    def receiver(self):
+        '''The account receiving the action.
+        '''
+        if "receiver" in self.json:
+            return self.json["receiver"]
+        return self.json["receipt"]["receiver"]
+
+    @property
+    def own_console(self):
+        '''The console output of this action alone.
+        '''
+        return self.json["console"]
+
+    @property
+    def inline_traces(self):
+        '''The list of nodes of inline actions.
+        '''
+        if self._inline_traces is None:
+            children = self._children if self._children is not None \
+                                            else self.json["inline_traces"]
+            self._inline_traces = [
+                child if isinstance(child, ActionTrace) \
+                        else ActionTrace(child, depth=self.depth + 1) \
+                                                        for child in children]
+        return self._inline_traces
+
+    @property
+    def console(self):
+        '''The console output of this action and its inline actions.
+        '''
+        if self._console is None:
+            self._console = render_console([self])
+        return self._console
+
+    def walk(self):
+        '''Iterate over the nodes of the subtree, depth first.
+        '''
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.inline_traces))
+
+    def find(self, receiver=None, account=None, name=None):
+        '''Return the list of nodes of the subtree matching all the given
+        conditions.
+
+        Args:
+            receiver (str or .interface.Account): The receiver of the action.
+            account (str or .interface.Account): The account of the contract.
+            name (str): The name of the action.
+        '''
+        return find(self.walk(), receiver, account, name)
+
+    def __str__(self):
+        return "{} <= {}::{} {}".format(
+                            self.receiver, self.account, self.name, self.data)
+
+
+class TraceTree():
+    '''The trace tree of a transaction.
+
+    Args:
+        action_traces (list): The *["processed"]["action_traces"]* component
+            of a *push* response.
+
+    Attributes:
+        json (list): The action traces.
+    '''
+    def __init__(self, action_traces):
+        self.json = action_traces
+        self._roots = None
+        self._console = None
+        self._act = None
+
+    @property
+    def roots(self):
+        '''The list of nodes of the actions of the transaction.
+        '''
+        if self._roots is None:
+            if any("creator_action_ordinal" in trace for trace in self.json):
+                self._roots = link_flat_traces(self.json)
+            else:
+                self._roots = [ActionTrace(trace) for trace in self.json]
+        return self._roots
+
+    @property
+    def console(self):
+        '''The console output of all the actions.
+        '''
+        if self._console is None:
+            self._console = render_console(self.roots)
+        return self._console
+
+    @property
+    def act(self):
+        '''Summary of all the listed actions with data, like
+        *eosio.null <= eosio.null::nonce 5d0a572c49880500*.
+
+        The actions are those of the *json* list: in the flat layout, the
+        inline actions and notifications, too.
+        '''
+        if self._act is None:
+            self._act = "\n".join([
+                "{} <= {}::{} {}".format(
+                    trace["act"]["account"], trace["act"]["account"],
+                    trace["act"]["name"], trace["act"]["data"]) \
+                        for trace in self.json if trace["act"]["data"]])
+        return self._act
+
+    def walk(self):
+        '''Iterate over all the nodes of the tree, depth first.
+        '''
+        for root in self.roots:
+            for node in root.walk():
+                yield node
+
+    def find(self, receiver=None, account=None, name=None):
+        '''Return the list of nodes matching all the given conditions.
+
+        See :func:`.ActionTrace.find`.
+        '''
+        return find(self.walk(), receiver, account, name)
+
+    def __iter__(self):
+        return iter(self.roots)
+
+    def __len__(self):
+        return len(self.json)
+
+
+def link_flat_traces(action_traces):
+    '''Build the tree of a flat list of action traces, linked with
+    *action_ordinal* and *creator_action_ordinal*.
+    '''
+    children = {}
+    for trace in action_traces:
+        children.setdefault(trace["creator_action_ordinal"], []).append(trace)
+
+    roots = []
+    stack = []
+    for trace in reversed(children.get(0, [])):
+        stack.append((trace, 0, roots))
+    while stack:
+        trace, depth, siblings = stack.pop()
+        node = ActionTrace(trace, [], depth)
+        siblings.append(node)
+        for child in reversed(children.get(trace["action_ordinal"], [])):
+            stack.append((child, depth + 1, node._children))
+    return roots
+
+
+def render_console(nodes):
+    '''Render the console output of the given nodes and their inline actions.
+
+    Each action with some console output contributes a header line, like
+    *alice@hi:*, followed with the output, both indented with the depth of
+    the action.
+    '''
+    lines = []
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        console = node.own_console
+        if console:
+            padding = PADDING * node.depth
+            lines.append("{}{}@{}:".format(padding, node.account, node.name))
+            lines.append(padding + console.replace("\n", "\n" + padding))
+        stack.extend(reversed(node.inline_traces))
+    return "\n".join(lines).rstrip()
+
+
+def find(nodes, receiver=None, account=None, name=None):
+    if receiver is not None:
+        receiver = interface.account_arg(receiver)
+    if account is not None:
+        account = interface.account_arg(account)
+    return [
+        node for node in nodes \
+            if (receiver is None or node.receiver == receiver) \
+                and (account is None or node.account == account) \
+                and (name is None or node.name == name)]
@@ -1,8 +1,15 @@
 import time
 import os
+import json
 import shutil
 import threading
 import subprocess
+import collections
+
+try:
+    import contextvars
+except ImportError:
+    contextvars = None
 
 import eosfactory.core.errors as errors
 
@@ -64,6 +71,82 @@ def spawn(command_line, error_message='', shell=False, raise_exception=True):
     else:
         return (stdout, stderr)
 
+def bind_context(function):
+    '''Return the function bound to a copy of the current context, see the
+    module *contextvars*, to be run in another thread, in the current session,
+    see :class:`.core.setup.Session`.
+
+    A copy may not be run by many threads at once: bind the function for
+    each thread.
+    '''
+    if contextvars is None:
+        return function
+    context = contextvars.copy_context()
+    def bound(*args, **kwargs):
+        return context.run(function, *args, **kwargs)
+    return bound
+
+
+def ordered_map(function, iterable, concurrency=4):
+    '''Map a function over an iterable, with a bounded number of threads.
+
+    The function is called concurrently for at most *concurrency* items at a
+    time, while the results are yielded in the order of the iterable. Each 
+    call runs in the context of the caller, see :func:`bind_context`.
+
+    Args:
+        function: A function of one argument.
+        iterable: The arguments.
+        concurrency (int): The number of pending calls. Default is 4.
+
+    Raises:
+        Exception: The exception raised by the function, if any.
+    '''
+    import concurrent.futures
+
+    concurrency = max(1, int(concurrency))
+    with concurrent.futures.ThreadPoolExecutor(
+                                            max_workers=concurrency) as executor:
+        window = collections.deque()
+        for item in iterable:
+            if len(window) >= concurrency:
+                yield window.popleft().result()
+            window.append(executor.submit(bind_context(function), item))
+
+        while window:
+            yield window.popleft().result()
+
+
+class Checkpoint():
+    '''Progress of a resumable job, saved to a JSON file.
+
+    The file is replaced atomically, so that an interrupted job leaves either
+    the previous state or the new one.
+
+    Args:
+        path (str): The checkpoint file.
+    '''
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        '''Return the saved state, or *None*.
+        '''
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def save(self, state):
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(self.path + ".tmp", self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
 UBUNTU = "Ubuntu"
 DARWIN = "Darwin"
 OTHER_OS = None
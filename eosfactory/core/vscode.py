@@ -7,7 +7,6 @@
 '''
 
 import json
-import argparse
 import eosfactory.core.config as config
 
 INCLUDE_PATH = "includePath"
@@ -226,6 +225,8 @@ def main(c_cpp_properties_path=None):
 
 
 if __name__ == '__main__':
+    import argparse
+
     parser = argparse.ArgumentParser()
     parser.add_argument("--c_cpp_prop_path", default="")
     args = parser.parse_args()
@@ -1,58 +1,100 @@
+'''The EOSFactory facade, usually imported with::
 
-import eosfactory.core.logger as logger
-import eosfactory.core.errors as errors
-import eosfactory.core.teos as teos
-import eosfactory.core.cleos as cleos
-import eosfactory.core.manager as manager
-import eosfactory.core.testnet as testnet
-import eosfactory.core.interface as interface
-import eosfactory.shell.wallet as wallet
-import eosfactory.shell.account as account
-import eosfactory.shell.contract as contract
-
-
-verbosity =  logger.verbosity
-Verbosity =  logger.Verbosity
-
-SCENARIO =  logger.SCENARIO
-COMMENT =  logger.COMMENT
-TRACE =  logger.TRACE
-INFO =  logger.INFO
-OUT =  logger.OUT
-DEBUG =  logger.DEBUG
-
-Error = errors.Error
-LowRamError = errors.LowRamError
-MissingRequiredAuthorityError = errors.MissingRequiredAuthorityError
-DuplicateTransactionError = errors.DuplicateTransactionError
-
-CreateKey = cleos.CreateKey
-Permission = interface.Permission
-
-create_wallet = wallet.create_wallet
-get_wallet = wallet.get_wallet
-
-Account = account.Account
-MasterAccount = account.MasterAccount
-create_account = account.create_account
-new_account = account.new_account
-create_master_account = account.create_master_account
-new_master_account = account.new_master_account
-
-print_stats = account.print_stats
-
-Contract = contract.Contract
-ContractBuilder = contract.ContractBuilder
-project_from_template = teos.project_from_template
-
-reboot = manager.reboot
-reset = manager.reset
-resume = manager.resume
-stop = manager.stop
-
-info = manager.info
-status = manager.status
-
-Testnet =  testnet.Testnet
-get_testnet =  testnet.get_testnet
-testnets =  testnet.testnets
+    from eosfactory.eosf import *
+
+The modules behind the names exported are imported on the first use of a
+name, so that importing the facade is fast.
+'''
+import sys
+import importlib
+
+MODULES = {
+    "logger": "eosfactory.core.logger",
+    "errors": "eosfactory.core.errors",
+    "teos": "eosfactory.core.teos",
+    "cleos": "eosfactory.core.cleos",
+    "manager": "eosfactory.core.manager",
+    "testnet": "eosfactory.core.testnet",
+    "interface": "eosfactory.core.interface",
+    "wallet": "eosfactory.shell.wallet",
+    "account": "eosfactory.shell.account",
+    "contract": "eosfactory.shell.contract"
+}
+# Names exported, with their modules and their names in the modules:
+NAMES = {
+    "verbosity": ("logger", "verbosity"),
+    "Verbosity": ("logger", "Verbosity"),
+
+    "SCENARIO": ("logger", "SCENARIO"),
+    "COMMENT": ("logger", "COMMENT"),
+    "TRACE": ("logger", "TRACE"),
+    "INFO": ("logger", "INFO"),
+    "OUT": ("logger", "OUT"),
+    "DEBUG": ("logger", "DEBUG"),
+
+    "Error": ("errors", "Error"),
+    "LowRamError": ("errors", "LowRamError"),
+    "MissingRequiredAuthorityError": (
+                                "errors", "MissingRequiredAuthorityError"),
+    "DuplicateTransactionError": ("errors", "DuplicateTransactionError"),
+    "ExpiredTransactionError": ("errors", "ExpiredTransactionError"),
+    "WaitTimeoutError": ("errors", "WaitTimeoutError"),
+
+    "CreateKey": ("cleos", "CreateKey"),
+    "Permission": ("interface", "Permission"),
+
+    "create_wallet": ("wallet", "create_wallet"),
+    "get_wallet": ("wallet", "get_wallet"),
+
+    "Account": ("account", "Account"),
+    "MasterAccount": ("account", "MasterAccount"),
+    "create_account": ("account", "create_account"),
+    "new_account": ("account", "new_account"),
+    "create_master_account": ("account", "create_master_account"),
+    "new_master_account": ("account", "new_master_account"),
+
+    "print_stats": ("account", "print_stats"),
+
+    "Contract": ("contract", "Contract"),
+    "ContractBuilder": ("contract", "ContractBuilder"),
+    "project_from_template": ("teos", "project_from_template"),
+
+    "reboot": ("manager", "reboot"),
+    "reset": ("manager", "reset"),
+    "resume": ("manager", "resume"),
+    "stop": ("manager", "stop"),
+
+    "info": ("manager", "info"),
+    "status": ("manager", "status"),
+
+    "Testnet": ("testnet", "Testnet"),
+    "get_testnet": ("testnet", "get_testnet"),
+    "testnets": ("testnet", "testnets")
+}
+
+__all__ = list(MODULES) + list(NAMES)
+
+
+def __getattr__(name):
+    '''Import the module behind the name, on the first use of the name.
+    '''
+    if name in MODULES:
+        value = importlib.import_module(MODULES[name])
+    elif name in NAMES:
+        module, attribute = NAMES[name]
+        value = getattr(__getattr__(module), attribute)
+    else:
+        raise AttributeError(
+                "module '{}' has no attribute '{}'".format(__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
+
+
+if sys.version_info < (3, 7):
+    # Module attributes are not looked up with the function __getattr__:
+    for name in __all__:
+        __getattr__(name)
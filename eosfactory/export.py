@@ -0,0 +1,417 @@
+import os
+import csv
+import json
+import argparse
+
+import eosfactory.core.errors as errors
+import eosfactory.core.logger as logger
+import eosfactory.core.setup as setup
+import eosfactory.core.utils as utils
+import eosfactory.core.interface as interface
+import eosfactory.core.cleos_get as cleos_get
+
+CSV = "csv"
+JSON_LINES = "jsonl"
+PARQUET = "parquet"
+FORMATS = [CSV, JSON_LINES, PARQUET]
+EXTENSIONS = {".csv": CSV, ".jsonl": JSON_LINES, ".json": JSON_LINES,
+                                                    ".parquet": PARQUET}
+PAGE_SIZE = 100
+CHECKPOINT_PAGES = 10
+CONCURRENCY = 4
+CHECKPOINT_EXTENSION = ".checkpoint"
+SCOPE = "scope"
+
+
+def format_of(path):
+    '''The format of an output file, by its extension; *jsonl* by default.
+    '''
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), JSON_LINES)
+
+
+def flat_row(row):
+    '''Return the row with the values that are not scalars as JSON strings.
+    '''
+    return {key: json.dumps(value, sort_keys=True) \
+                        if isinstance(value, (dict, list)) else value \
+                                                for key, value in row.items()}
+
+
+class CsvWriter():
+    '''Writer of CSV files. The columns are the keys of the first row.
+
+    Args:
+        path (str): The output file.
+        state (dict): If set, the state saved with a checkpoint: the file is
+            truncated to the saved size, and written on.
+    '''
+    def __init__(self, path, state=None):
+        self.path = path
+        self.columns = state["columns"] if state else None
+        if state:
+            self.file = open(path, "r+", newline="")
+            self.file.truncate(state["offset"])
+            self.file.seek(state["offset"])
+        else:
+            self.file = open(path, "w", newline="")
+        self.writer = None
+
+    def write(self, rows):
+        for row in rows:
+            if self.writer is None:
+                if self.columns is None:
+                    self.columns = list(row)
+                    csv.writer(self.file).writerow(self.columns)
+                self.writer = csv.DictWriter(
+                    self.file, self.columns, restval="",
+                    extrasaction="ignore")
+            self.writer.writerow(flat_row(row))
+
+    def flush(self):
+        '''Flush the file, and return the state to be saved with a
+        checkpoint.
+        '''
+        self.file.flush()
+        return {"offset": self.file.tell(), "columns": self.columns}
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesWriter():
+    '''Writer of JSON lines files, a JSON object per row.
+
+    See :class:`.CsvWriter` for the arguments.
+    '''
+    def __init__(self, path, state=None):
+        self.path = path
+        if state:
+            self.file = open(path, "r+")
+            self.file.truncate(state["offset"])
+            self.file.seek(state["offset"])
+        else:
+            self.file = open(path, "w")
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(row) + "\n")
+
+    def flush(self):
+        self.file.flush()
+        return {"offset": self.file.tell()}
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter():
+    '''Writer of Parquet files, with the ``pyarrow`` package.
+
+    The output is a directory of part files, one for each checkpoint, that
+    reads as one dataset, for example with *pyarrow.parquet.read_table*.
+    Values that are not scalars are JSON strings. The schema is inferred from
+    the rows of the first part, and all the parts are written with it.
+
+    See :class:`.CsvWriter` for the arguments.
+    '''
+    def __init__(self, path, state=None):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise errors.Error('''
+            The ``pyarrow`` package is needed to export to Parquet files.
+            ''')
+        self.pyarrow = pyarrow
+        self.path = path
+        self.part = state["part"] if state else 0
+        self.rows = []
+        self.schema = None
+        if not os.path.exists(path):
+            os.makedirs(path)
+        for file in os.listdir(path):
+            # Parts written after the checkpoint:
+            if file.startswith("part-") and int(file[5:10]) >= self.part:
+                os.remove(os.path.join(path, file))
+        if self.part:
+            self.schema = pyarrow.parquet.read_schema(self.part_file(0))
+
+    def part_file(self, part):
+        return os.path.join(self.path, "part-{:05d}.parquet".format(part))
+
+    def write(self, rows):
+        self.rows.extend([flat_row(row) for row in rows])
+
+    def flush(self):
+        if self.rows:
+            part = self.part_file(self.part)
+            try:
+                table = self.pyarrow.Table.from_pylist(
+                                                    self.rows, self.schema)
+            except (self.pyarrow.ArrowInvalid,
+                                        self.pyarrow.ArrowTypeError) as e:
+                raise errors.Error('''
+                The rows do not match the schema of the first part of
+                    {}
+                {}
+                '''.format(self.path, str(e)))
+            self.schema = table.schema
+            self.pyarrow.parquet.write_table(table, part + ".tmp")
+            os.replace(part + ".tmp", part)
+            self.part += 1
+            self.rows = []
+        return {"part": self.part}
+
+    def close(self):
+        self.flush()
+
+
+WRITERS = {CSV: CsvWriter, JSON_LINES: JsonLinesWriter, PARQUET: ParquetWriter}
+
+
+class TablePages():
+    '''Pages of the rows of a contract table, in all or the given scopes.
+
+    Each row has an additional *scope* column.
+
+    Args:
+        code (str or .interface.Account): The contract who owns the table.
+        table (str): The name of the table.
+        scopes (list): If set, the scopes, otherwise all the scopes of the
+            table.
+        page_size (int): The maximum number of rows in a page.
+    '''
+    def __init__(self, code, table, scopes=None, page_size=PAGE_SIZE):
+        self.code = interface.account_arg(code)
+        self.table = table
+        self.scopes = [interface.account_arg(scope) for scope in scopes] \
+                                                        if scopes else None
+        self.page_size = page_size
+        self.description = {
+            "table": self.table, "code": self.code, "scopes": self.scopes}
+
+    def pages(self, position=None):
+        '''Yield the rows of each page, with the position of the next page.
+
+        Args:
+            position (dict): If set, the position to start at.
+        '''
+        first_scope = position["scope"] if position else ""
+        lower = position["lower"] if position else ""
+        if self.scopes is None:
+            scopes = cleos_get.scopes(
+                            self.code, self.table, self.page_size, first_scope)
+        else:
+            scopes = self.scopes[self.scopes.index(first_scope):] \
+                                        if first_scope else self.scopes
+
+        for scope in scopes:
+            if position and scope == first_scope and position["done"]:
+                continue
+            if not scope == first_scope:
+                lower = ""
+            for page in cleos_get.table_pages(
+                    self.code, self.table, scope, self.page_size, lower):
+                rows = page.json["rows"]
+                for row in rows:
+                    row[SCOPE] = scope
+                more = page.json.get("more") and page.json.get("next_key")
+                yield {
+                    "scope": scope,
+                    "lower": more if more else "",
+                    "done": not more}, rows
+
+
+class BlockPages():
+    '''Pages of blocks, as rows, fetched concurrently.
+
+    Args:
+        start (int): The number of the first block.
+        end (int): The number of the last block.
+        page_size (int): The number of blocks in a page.
+        concurrency (int): The number of blocks fetched in parallel.
+    '''
+    def __init__(
+            self, start, end, page_size=PAGE_SIZE, concurrency=CONCURRENCY):
+        self.start = start
+        self.end = end
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.description = {"blocks": [start, end]}
+
+    def pages(self, position=None):
+        block_num = position["block"] if position else self.start
+        while block_num <= self.end:
+            last = min(self.end, block_num + self.page_size - 1)
+            rows = list(utils.ordered_map(
+                    lambda number: cleos_get.GetBlock(
+                                                number, is_verbose=False).json,
+                    range(block_num, last + 1), self.concurrency))
+            block_num = last + 1
+            yield {"block": block_num}, rows
+
+
+def export(
+        source, output, format=None, checkpoint_pages=CHECKPOINT_PAGES,
+        restart=False):
+    '''Stream the pages of a source to a file, with checkpoints.
+
+    The rows are written page by page, except for Parquet, where the rows of
+    *checkpoint_pages* pages are kept in memory, to be written as one part
+    file. Every *checkpoint_pages* pages, the output is flushed, and the
+    position is saved to a checkpoint file, named as the output file, with the
+    *.checkpoint* extension. If the export is interrupted, a next run with the
+    same arguments resumes it. The checkpoint file is deleted when the export
+    completes.
+
+    Args:
+        source (:class:`.TablePages` or :class:`.BlockPages`): The source.
+        output (str): The output file, or directory, for Parquet.
+        format (str): *csv*, *jsonl* or *parquet*. If not set, it is
+            determined with the extension of the output file.
+        checkpoint_pages (int): The number of pages between checkpoints.
+        restart (bool): If set, a checkpoint, if any, is ignored.
+
+    Returns:
+        int: The number of rows in the output.
+    '''
+    if not format:
+        format = format_of(output)
+    if not format in FORMATS:
+        raise errors.Error('''
+        The export format is one of {}, not ``{}``.
+        '''.format(", ".join(FORMATS), format))
+
+    checkpoint = utils.Checkpoint(
+                            output.rstrip(os.sep) + CHECKPOINT_EXTENSION)
+    state = None if restart else checkpoint.load()
+    if state:
+        if not state["source"] == source.description \
+                                            or not state["format"] == format:
+            raise errors.Error('''
+            The checkpoint file
+                {}
+            is of another export. Delete it, or restart the export.
+            '''.format(checkpoint.path))
+        logger.INFO('''
+        Resuming the export after {} rows.
+        '''.format(state["rows"]))
+
+    writer = WRITERS[format](output, state["writer"] if state else None)
+    count = state["rows"] if state else 0
+    pages = 0
+    try:
+        for position, rows in source.pages(
+                                    state["position"] if state else None):
+            writer.write(rows)
+            count += len(rows)
+            pages += 1
+            if pages % checkpoint_pages == 0:
+                checkpoint.save({
+                    "source": source.description,
+                    "format": format,
+                    "position": position,
+                    "writer": writer.flush(),
+                    "rows": count
+                })
+    finally:
+        writer.close()
+    checkpoint.remove()
+    return count
+
+
+def main():
+    '''
+    usage: python3 -m eosfactory.export [-h] [--url URL]
+                                        [--format {csv,jsonl,parquet}]
+                                        [--page_size PAGE_SIZE]
+                                        [--checkpoint_pages CHECKPOINT_PAGES]
+                                        [--restart] [--verbose]
+                                        {table,blocks} ...
+
+    Export contract tables, or blocks, from a node to CSV, JSON lines or
+    Parquet files.
+
+    The rows are streamed page by page, hence the memory used is bounded.
+    The export is checkpointed: an interrupted export is resumed with the
+    same command.
+
+    Commands:
+        table contract table output [--scope SCOPE [SCOPE ...]]
+            Export the rows of a table, in all the scopes, or in the given
+            ones, with an additional *scope* column.
+        blocks start end output [--concurrency CONCURRENCY]
+            Export the blocks of a range, inclusive.
+
+    Args:
+        --url: The node URL; the local node, by default.
+        --format: The output format; by default, determined with the
+            extension of the output file. Parquet needs the *pyarrow*
+            package, and the output is a directory of part files.
+        --page_size: The number of rows, or blocks, fetched at a time.
+        --checkpoint_pages: The number of pages between checkpoints.
+        --restart: Ignore the checkpoint, if any.
+        --verbose: Print info.
+        -h: Show help message and exit
+    '''
+    parser = argparse.ArgumentParser(description='''
+    Export contract tables, or blocks, from a node to CSV, JSON lines or
+    Parquet files.
+
+    The rows are streamed page by page, hence the memory used is bounded.
+    The export is checkpointed: an interrupted export is resumed with the
+    same command.
+    ''')
+    parser.add_argument("--url", help="The node URL; the local node, by default.")
+    parser.add_argument(
+        "--format", help="The output format; by default, determined with the "
+        "extension of the output file.", choices=FORMATS)
+    parser.add_argument(
+        "--page_size", help="The number of rows, or blocks, fetched at a time.",
+        type=int, default=PAGE_SIZE)
+    parser.add_argument(
+        "--checkpoint_pages", help="The number of pages between checkpoints.",
+        type=int, default=CHECKPOINT_PAGES)
+    parser.add_argument(
+        "--restart", help="Ignore the checkpoint, if any.", action="store_true")
+    parser.add_argument("--verbose", help="Print info.", action="store_true")
+
+    commands = parser.add_subparsers(dest="command")
+    table_parser = commands.add_parser(
+                                    "table", help="Export a contract table.")
+    table_parser.add_argument("contract", help="The contract account.")
+    table_parser.add_argument("table", help="The table name.")
+    table_parser.add_argument("output", help="The output file.")
+    table_parser.add_argument(
+        "--scope", help="The scopes; all the scopes, by default.", nargs="+")
+    blocks_parser = commands.add_parser(
+                                    "blocks", help="Export a block range.")
+    blocks_parser.add_argument("start", help="The first block.", type=int)
+    blocks_parser.add_argument("end", help="The last block.", type=int)
+    blocks_parser.add_argument("output", help="The output file.")
+    blocks_parser.add_argument(
+        "--concurrency", help="The number of blocks fetched in parallel.",
+        type=int, default=CONCURRENCY)
+
+    args = parser.parse_args()
+    if not args.command:
+        parser.error("The command, table or blocks, is missing.")
+    if not args.verbose:
+        logger.verbosity([logger.Verbosity.ERROR])
+    if args.url:
+        setup.set_nodeos_address(args.url)
+
+    if args.command == "table":
+        source = TablePages(
+                    args.contract, args.table, args.scope, args.page_size)
+    else:
+        source = BlockPages(
+                    args.start, args.end, args.page_size, args.concurrency)
+
+    count = export(
+        source, args.output, args.format, args.checkpoint_pages, args.restart)
+    print("Exported {} rows to {}.".format(count, args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+import bisect
+import random
+import time
+import math
+import argparse
+import threading
+
+import eosfactory.core.errors as errors
+import eosfactory.core.logger as logger
+import eosfactory.core.manager as manager
+import eosfactory.core.teos as teos
+import eosfactory.core.cleos as cleos
+import eosfactory.core.utils as utils
+import eosfactory.bench as bench
+
+WORKERS = 8
+DURATION = 10
+INTERVAL = 1.0
+ACCEPTED = "accepted"
+FAILED = "failed"
+EXPIRED = "expired"
+DUPLICATE = "duplicate"
+OUTCOMES = [ACCEPTED, FAILED, EXPIRED, DUPLICATE]
+
+
+class LoadGenerator():
+    '''Push a mix of actions to a contract, at a target rate or at maximum
+    throughput, with many concurrent signer workers.
+
+    Each transaction is made unique with the *force_unique* option, that adds
+    a nonce action, so that repeated action data is not rejected as a
+    duplicate transaction.
+
+    Args:
+        host (.shell.account.Account): The account of the contract.
+        scenarios ([dict]): The action mix. Each scenario is defined as in the
+            scenario files of :mod:`.bench`, with an additional, optional,
+            *weight* key; the default weight is 1.
+        rate (float): If set, the target rate, in transactions per second,
+            otherwise the workers push as fast as they can.
+        duration (float): The duration of the load, in seconds. Default is 10.
+        workers (int): The number of concurrent workers. Default is 8.
+        ramp (bool): If set, the target rate grows linearly from zero to
+            *rate* over the duration, so that the saturation point of the
+            contract shows on the throughput curve.
+        interval (float): The time resolution of the throughput curve, in
+            seconds. Default is 1.
+        seed: If set, the seed of the action mix selection.
+
+    Attributes:
+        counts (dict): The numbers of *accepted*, *failed*, *expired* and
+            *duplicate* transactions.
+        curve ([dict]): For each interval, the start time, the target rate,
+            and the rates of each outcome, in transactions per second.
+    '''
+    def __init__(
+            self, host, scenarios, rate=None, duration=DURATION,
+            workers=WORKERS, ramp=False, interval=INTERVAL, seed=None):
+        if ramp and not rate:
+            raise errors.Error('''
+            The ramp mode needs the target rate.
+            ''')
+        self.host = host
+        self.scenarios = scenarios
+        self.rate = rate
+        self.duration = duration
+        self.workers = workers
+        self.ramp = ramp
+        self.interval = interval
+        self.random = random.Random(seed)
+        self.cumulative_weights = []
+        total = 0
+        for scenario in scenarios:
+            total += scenario.get("weight", 1)
+            self.cumulative_weights.append(total)
+
+        self.lock = threading.Lock()
+        self.slot = 0
+        self.start_time = None
+        self.counts = {outcome: 0 for outcome in OUTCOMES}
+        self.buckets = {}
+        self.curve = []
+
+    def target_rate(self, elapsed):
+        '''The target rate, at the given time since start, or *None*.
+        '''
+        if not self.rate:
+            return None
+        if self.ramp:
+            return self.rate * min(elapsed, self.duration) / self.duration
+        return self.rate
+
+    def next_slot(self):
+        '''Return the next scheduled push, *(run, scenario, time)*, or *None*
+        if the load is over.
+        '''
+        with self.lock:
+            run = self.slot
+            self.slot += 1
+            scenario = self.scenarios[bisect.bisect_right(
+                self.cumulative_weights,
+                self.random.random() * self.cumulative_weights[-1])]
+
+        if not self.rate:
+            at = time.time() - self.start_time
+        elif self.ramp:
+            # The number of pushes scheduled up to *t* is rate * t^2 / 2D:
+            at = math.sqrt(2 * self.duration * run / self.rate)
+        else:
+            at = run / self.rate
+
+        if at >= self.duration:
+            return None
+        return run, scenario, at
+
+    def push(self, run, scenario):
+        action, data, permission = bench.action_args(scenario, run)
+        try:
+            cleos.PushAction(
+                self.host, action, data,
+                permission if permission else self.host,
+                force_unique=1, is_verbose=False, json=True)
+            return ACCEPTED
+        except errors.ExpiredTransactionError:
+            return EXPIRED
+        except errors.DuplicateTransactionError:
+            return DUPLICATE
+        except errors.Error:
+            return FAILED
+
+    def work(self):
+        while True:
+            slot = self.next_slot()
+            if slot is None:
+                return
+            run, scenario, at = slot
+            delay = self.start_time + at - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+            outcome = self.push(run, scenario)
+            bucket = int((time.time() - self.start_time) / self.interval)
+            with self.lock:
+                self.counts[outcome] += 1
+                self.buckets.setdefault(
+                    bucket, {outcome: 0 for outcome in OUTCOMES})[outcome] += 1
+
+    def run(self):
+        '''Run the load, and compute the throughput curve.
+
+        Returns:
+            :class:`.LoadGenerator`: This object.
+        '''
+        self.start_time = time.time()
+        threads = [
+            threading.Thread(
+                target=utils.bind_context(self.work), daemon=True) \
+                                            for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.curve = []
+        for bucket in range(max(self.buckets) + 1 if self.buckets else 0):
+            counts = self.buckets.get(
+                                bucket, {outcome: 0 for outcome in OUTCOMES})
+            start = bucket * self.interval
+            row = {
+                "time": start,
+                "target": self.target_rate(start + self.interval / 2)
+            }
+            for outcome in OUTCOMES:
+                row[outcome] = counts[outcome] / self.interval
+            self.curve.append(row)
+        return self
+
+    def to_csv(self, path=None):
+        '''Export the throughput curve as CSV.
+
+        Args:
+            path (str): If set, the file to write to.
+
+        Returns:
+            str: The CSV text.
+        '''
+        columns = ["time", "target"] + OUTCOMES
+        lines = [",".join(columns)]
+        for row in self.curve:
+            lines.append(",".join([
+                "" if row[column] is None else "{:g}".format(row[column]) \
+                                                        for column in columns]))
+        text = "\n".join(lines) + "\n"
+        if path:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def report(self):
+        '''Return the counts and the throughput curve as text.
+        '''
+        lines = ["  ".join(["{}: {}".format(outcome, self.counts[outcome]) \
+                                                    for outcome in OUTCOMES])]
+        lines.append("{:>8}{:>10}".format("time", "target") + "".join(
+                            ["{:>10}".format(outcome) for outcome in OUTCOMES]))
+        for row in self.curve:
+            lines.append("{:>8.1f}{:>10}".format(
+                row["time"],
+                "-" if row["target"] is None \
+                                        else "{:.1f}".format(row["target"]))
+                + "".join(["{:>10.1f}".format(row[outcome]) \
+                                                    for outcome in OUTCOMES]))
+        return "\n".join(lines)
+
+
+def main():
+    '''
+    usage: python3 -m eosfactory.load [-h] [--rate RATE] [--ramp]
+                                        [--duration DURATION]
+                                        [--workers WORKERS] [--output OUTPUT]
+                                        [--profile PROFILE] [--verbose]
+                                        contract_dir scenario
+
+    Load a contract on a clean local node.
+
+    A clean local node is started, the contract is built, if needed, and
+    deployed, then the mix of actions defined with the scenario file is
+    pushed, at the target rate, or as fast as possible. The numbers of
+    accepted, failed, and expired transactions, and the throughput curve are
+    printed. With the *ramp* option, the target rate grows from zero, to show
+    the saturation point of the contract.
+
+    See :func:`.bench.load_scenarios` for the format of the scenario file.
+    Each scenario may have an additional *weight* key.
+
+    Args:
+        contract_dir: Contract name or directory.
+        scenario: Scenario file.
+        --rate: The target rate, in transactions per second.
+        --ramp: Grow the target rate linearly from zero.
+        --duration: The duration of the load, in seconds, default is 10.
+        --workers: The number of concurrent workers, default is 8.
+        --output: CSV file to save the throughput curve to.
+        --profile: The profile of the local node, for example *bench*, see
+            :func:`.core.config.nodeos_profile`.
+        --verbose: Print info.
+        -h: Show help message and exit
+    '''
+    parser = argparse.ArgumentParser(description='''
+    Load a contract on a clean local node.
+
+    A clean local node is started, the contract is built, if needed, and
+    deployed, then the mix of actions defined with the scenario file is
+    pushed, at the target rate, or as fast as possible. The numbers of
+    accepted, failed, and expired transactions, and the throughput curve are
+    printed. With the *ramp* option, the target rate grows from zero, to show
+    the saturation point of the contract.
+    ''')
+
+    parser.add_argument("contract_dir", help="Contract name or directory.")
+    parser.add_argument("scenario", help="Scenario file.")
+    parser.add_argument(
+        "--rate", help="The target rate, in transactions per second.",
+        type=float)
+    parser.add_argument(
+        "--ramp", help="Grow the target rate linearly from zero.",
+        action="store_true")
+    parser.add_argument(
+        "--duration", help="The duration of the load, in seconds.",
+        type=float, default=DURATION)
+    parser.add_argument(
+        "--workers", help="The number of concurrent workers.", type=int,
+        default=WORKERS)
+    parser.add_argument(
+        "--output", help="CSV file to save the throughput curve to.")
+    parser.add_argument(
+        "--profile", help="The profile of the local node.",
+        choices=sorted(teos.PROFILES))
+    parser.add_argument("--verbose", help="Print info.", action="store_true")
+
+    args = parser.parse_args()
+    if args.ramp and not args.rate:
+        parser.error("The ramp mode needs the target rate.")
+
+    module = bench.load_scenarios(args.scenario)
+    if not args.verbose:
+        logger.verbosity([logger.Verbosity.ERROR])
+
+    manager.reset(profile=args.profile)
+    try:
+        host, _ = bench.deploy(args.contract_dir, module)
+        generator = LoadGenerator(
+            host, module.SCENARIOS, args.rate, args.duration, args.workers,
+            args.ramp).run()
+    finally:
+        manager.stop()
+
+    if args.output:
+        generator.to_csv(args.output)
+    print(generator.report())
+
+
+if __name__ == '__main__':
+    main()
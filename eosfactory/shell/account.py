@@ -1,6 +1,5 @@
 import sys
 import json
-import inspect
 import time
 import re
 
@@ -18,13 +17,12 @@ import eosfactory.core.cleos_sys as cleos_sys
 import eosfactory.core.manager as manager
 import eosfactory.core.testnet as testnet
 import eosfactory.core.account as account
+import eosfactory.core.resources as resources
+import eosfactory.core.table_frame as table_frame
+import eosfactory.core.history as history
 import eosfactory.shell.wallet as wallet
 
 
-wallet_globals = None
-wallet_singleton = None
-
-
 class MasterAccount(account.Eosio):
     '''Dummy class for declaring master account objects.
     '''
@@ -36,22 +34,66 @@ class Account():
     '''Methods to be ascribed to account objects.
     '''
     @classmethod
-    def add_methods_and_finalize(cls, account_object_name, account):
+    def add_methods_and_finalize(
+                                cls, account_object_name, account, verify=True):
         '''Ascribes methodes to the given *account*, and finalizes the creation 
         of this *account*.
+
+        If the *verify* argument is not set, the account is not cross-checked
+        with the blockchain and the wallet, until first used, or verified with
+        the method :func:`.verify`.
         '''
         account.account_object_name = account_object_name
 
         if not isinstance(account, cls): 
             account.__class__.__bases__ += (cls,)
 
-        get_account = cleos.GetAccount(account, is_info=False, is_verbose=0)
+        account.is_verified = verify
+        if verify:
+            get_account = cleos.GetAccount(account, is_info=False, is_verbose=0)
+
+            logger.TRACE('''
+            * Cross-checked: account object ``{}`` mapped to an existing 
+                account ``{}``.
+            '''.format(account_object_name, account.name), translate=False)
+        return put_account_to_wallet_and_on_stack(
+                                account_object_name, account, verify=verify)
 
+    def verify(self):
+        '''Cross-check the account with the blockchain and the wallet.
+
+        Accounts created with the *verify* argument not set are verified on
+        first use.
+
+        Raises:
+            .core.errors.Error: If the account does not exist, or its keys are 
+                not the keys of the account object, or they are not in the 
+                wallet.
+        '''
+        get_account = cleos.GetAccount(self, is_info=False, is_verbose=0)
+        if self.owner_key:
+            keys = [
+                interface.key_arg(self, is_owner_key=True, 
+                                                        is_private_key=False),
+                interface.key_arg(self, is_owner_key=False, 
+                                                        is_private_key=False)]
+            if not keys == [get_account.owner_key, get_account.active_key]:
+                raise errors.Error('''
+                The keys of the account object ``{}`` are not the keys of the
+                account ``{}``.
+                '''.format(self.account_object_name, self.name))
+            wallet_keys = cleos.WalletKeys(is_verbose=False).json
+            if not all([key in wallet_keys for key in keys]):
+                raise errors.Error('''
+                The keys of the account ``{}`` are not in the wallet.
+                '''.format(self.name))
+
+        self.is_verified = True
         logger.TRACE('''
         * Cross-checked: account object ``{}`` mapped to an existing 
             account ``{}``.
-        '''.format(account_object_name, account.name), translate=False)
-        return put_account_to_wallet_and_on_stack(account_object_name, account)
+        '''.format(self.account_object_name, self.name), translate=False)
+        return self
 
     def actions(self, pos=-1, offset=1, 
         json=True, full=False, pretty=False, console=False):
@@ -76,6 +118,28 @@ class Account():
             self, pos, offset, json, full, pretty, console, is_verbose=False)
         return result
 
+    def actions_iter(
+            self, window=100, concurrency=4, checkpoint=None, start=0,
+            end=None):
+        '''Iterate over all the actions of the account, fetched in parallel.
+
+        Args:
+            window (int): The number of actions fetched with a single request.
+                Default is 100.
+            concurrency (int): The number of requests issued in parallel.
+                Default is 4.
+            checkpoint (str): If set, the file the progress is saved to, so
+                that an interrupted iteration resumes where it stopped.
+            start (int): The sequence number of the first action. Default is 0.
+            end (int): If set, the sequence number of the last action.
+
+        Yields:
+            dict: An action, as returned by :func:`.core.history.decode`.
+        '''
+        stop_if_account_is_not_set(self)
+        return history.crawl(
+                        self, window, concurrency, checkpoint, start, end)
+
     def code(self, code=None, abi=None, wasm=False):
         '''Retrieve the code and ABI
 
@@ -329,13 +393,9 @@ class Account():
         '''.format(re.sub(' +',' ', data)))
 
         self.action = result
-        try:
-            self._console = result.console
-            logger.DEBUG(self._console)
-        except:
-            pass
-
-        self.action = result
+        # The console output is rendered only if it is going to be printed:
+        if logger.is_verbose(logger.Verbosity.DEBUG):
+            logger.DEBUG(result.console)
 
     def show_action(
             self, action, data, permission=None,
@@ -413,6 +473,55 @@ class Account():
 
         return result
 
+    def table_iter(
+            self, table_name, scope="", page_size=100,
+            lower="", upper="", index="",
+            key_type="", encode_type="", reverse=False, show_payer=False
+            ):
+        '''Iterate over all the rows of a database table.
+
+        Contrary to the :func:`table` method, the table is not truncated:
+        the rows are fetched page by page, following the continuation keys,
+        and the next page is fetched while the current one is consumed.
+
+        Args:
+            table (str): The name of the table as specified by the contract abi.
+            scope (str or .interface.Account): The scope within the account in
+                which the table is found.
+            page_size (int): The maximum number of rows fetched with a single
+                request. Default is 100.
+
+        See definitions of the remaining parameters: :func:`table`.
+
+        Returns:
+            generator: Rows of the table, as *dict* objects.
+        '''
+        stop_if_account_is_not_set(self)
+        return cleos_get.table_rows(
+                    self, table_name, scope,
+                    page_size, lower, upper, index,
+                    key_type, encode_type, reverse, show_payer)
+
+    def table_frame(
+            self, table_name, scope="", page_size=100, concurrency=4):
+        '''Load a database table into columns typed with the contract ABI.
+
+        Args:
+            table (str): The name of the table as specified by the contract abi.
+            scope (str or .interface.Account or list): The scope, or a list 
+                of scopes, or *None* for all the scopes of the table.
+            page_size (int): The maximum number of rows fetched with a single
+                request. Default is 100.
+            concurrency (int): The number of scopes fetched in parallel. 
+                Default is 4.
+
+        Returns:
+            :class:`.core.table_frame.TableFrame` object
+        '''
+        stop_if_account_is_not_set(self)
+        return table_frame.table_frame(
+                    self, table_name, scope, page_size, concurrency)
+
     def buy_ram(
             self, amount_kbytes, receiver=None,
             expiration_sec=None, 
@@ -492,23 +601,12 @@ class Account():
         print(msg)
 
     def stats(self, params, last_col="%s", col="%15s", to_string=False):
-        def find(element, json):
-            try:
-                keys = element.split('.')
-                rv = json
-                for key in keys:
-                    rv = rv[key]
-            except:
-                rv = "n/a"
-            return rv
-
         json = cleos.GetAccount(self, is_info=False, is_verbose=0).json
         json["account_object_name"] = self.account_object_name
 
-        output = ""
-        for param in params:
-            output = output + col % find(param, json)
-            output = output + "  " + last_col % (param) + "\n"
+        output = "".join([
+            col % resources.find(keys, json) + "  " + last_col % param + "\n" \
+                        for param, keys in zip(params, resources.paths(params))])
          
         if to_string:
             return output
@@ -551,8 +649,7 @@ def new_master_account(
     '''
 
     return create_master_account(
-            get_new_account_name(inspect.getframeinfo(
-                                            inspect.currentframe()).function), 
+            get_new_account_name("new_master_account"), 
             account_name, owner_key, active_key)
         
 
@@ -608,7 +705,7 @@ def create_master_account(
             be set if the testnode is not local.
     '''
 
-    globals = inspect.stack()[1][0].f_globals
+    globals = namespace(sys._getframe(1).f_globals)
 
     if isinstance(account_name, testnet.Testnet):
         owner_key = account_name.owner_key
@@ -639,7 +736,7 @@ def create_master_account(
     *eosio* account. Put the account into the wallet. Put the account object into 
     the global namespace of the caller, and **return**.
     '''
-    if setup.is_local_address:
+    if setup.session().is_local_address:
         account_object = account.Eosio(account_object_name)
         put_account_to_wallet_and_on_stack(
             account_object_name, account_object, logger)
@@ -765,7 +862,7 @@ def restore_account(
         testnet_account (.core.testnet.Testnet): A testnet object defining the account to restore.
     '''
 
-    globals = inspect.stack()[1][0].f_globals
+    globals = namespace(sys._getframe(1).f_globals)
     '''
     Check the conditions:
     * a *Wallet* object is defined.
@@ -814,7 +911,9 @@ def new_account(
         delay_sec=0,        
         buy_ram_kbytes=8, buy_ram="",
         transfer=False,
-        restore=False):
+        restore=False,
+        verify=None,
+        account_json=None):
     '''Create account object in caller's global namespace.
 
     Wraps the account factory function :func:`create_account` so that the 
@@ -849,8 +948,7 @@ def new_account(
     '''
 
     return create_account(
-        get_new_account_name(inspect.getframeinfo(
-            inspect.currentframe()).function), 
+        get_new_account_name("new_account"), 
         creator, 
         account_name,
         owner_key, active_key,
@@ -863,7 +961,9 @@ def new_account(
         delay_sec,        
         buy_ram_kbytes, buy_ram,
         transfer,
-        restore)
+        restore,
+        verify,
+        account_json)
 
 
 def create_account(
@@ -880,7 +980,9 @@ def create_account(
         delay_sec=0,        
         buy_ram_kbytes=8, buy_ram="",
         transfer=False,
-        restore=False):
+        restore=False,
+        verify=None,
+        account_json=None):
     '''Create account object in caller's global namespace.
     
     Args:
@@ -899,11 +1001,22 @@ def create_account(
         buy_ram_kbytes (int): The amount of RAM bytes to purchase.
         transfer (bool): Transfer voting power and right to unstake EOS to 
             receiver.
+        verify (bool): If set, the new account is cross-checked with the
+            blockchain and the wallet, otherwise the fast path is taken: the 
+            keys are imported to the wallet, and the account is verified on 
+            first use, see :func:`.Account.verify`. On the local node, if keys
+            are not given, one key pair is shared by the *owner* and *active*
+            permissions; elsewhere, the keys are distinct. If not set,
+            it is the value of the flag *setup.is_strict_accounts*, *True* by
+            default.
+        account_json (dict): If set, together with the *restore* argument, 
+            the *get account* response of the existing account, already 
+            retrieved, then the account is not retrieved again.
 
     See definitions of the remaining parameters: \
     :func:`.cleos.common_parameters`.
     '''
-    globals = inspect.stack()[1][0].f_globals
+    globals = namespace(sys._getframe(1).f_globals)
     '''
     Check the conditions:
     * a *Wallet* object is defined;
@@ -926,6 +1039,8 @@ def create_account(
     Create an account object.
     '''
     account_object = None
+    if restore or verify is None:
+        verify = restore or setup.is_strict_accounts
 
     if restore:
         if creator:
@@ -935,8 +1050,10 @@ def create_account(
                         mapped as ``{}``.
                     '''.format(account_name, account_object_name), 
                     translate=False)
-        account_object = account.RestoreAccount(account_name)
+        account_object = account.RestoreAccount(account_name, account_json)
         account_object.account_object_name = account_object_name
+        if account_json is not None:
+            verify = False
     else:
         if not account_name:
             account_name = cleos.account_name()
@@ -945,7 +1062,9 @@ def create_account(
                 active_key = owner_key
         else:
             owner_key = cleos.CreateKey(is_verbose=False)
-            active_key = cleos.CreateKey(is_verbose=False)
+            # Only throw-away accounts of the local node share one key pair:
+            active_key = cleos.CreateKey(is_verbose=False) \
+                if verify or not manager.is_local_testnet() else owner_key
 
         if stake_net and not manager.is_local_testnet():
             logger.INFO('''
@@ -997,7 +1116,8 @@ def create_account(
                     expiration_sec, skip_sign, dont_broadcast, force_unique,
                     max_cpu_usage, max_net_usage,
                     ref_block,
-                    delay_sec
+                    delay_sec,
+                    verify
                     )
 
         account_object.account_object_name = account_object_name
@@ -1007,56 +1127,65 @@ def create_account(
     logger.TRACE('''
         * The account object is created.
         ''')
-    Account.add_methods_and_finalize(account_object_name, account_object)
+    Account.add_methods_and_finalize(
+                                account_object_name, account_object, verify)
+    if restore and account_json is not None:
+        # The account is retrieved, already:
+        account_object.is_verified = True
     return account_object
 
 def reboot():
-    '''Reset the :mod:`.shell.account` module.
+    '''Reset the :mod:`.shell.account` module, in the current session, see
+    :class:`.core.setup.Session`.
     '''
-    global wallet_singleton
-    if wallet_singleton:
-        wallet_singleton.delete_globals()
-    wallet.Wallet.wallet_single = None
-    try:
-        del wallet_singleton
-    except:
-        pass
-    wallet_singleton = None
-
-    global wallet_globals
-    wallet_globals = None
+    session = setup.session()
+    if session.wallet:
+        session.wallet.delete_globals()
+    session.wallet = None
+    session.wallet_globals = None
     setup.reboot()
 
 
+def namespace(caller_globals):
+    '''Return the namespace the account objects of the current session are
+    put in: the global namespace of the caller, for the default session,
+    otherwise, the namespace of the session, see :class:`.core.setup.Session`.
+    '''
+    accounts = setup.session().accounts
+    return caller_globals if accounts is None else accounts
+
+
 def is_wallet_defined(logger, globals=None):
-    global wallet_globals   
-    if not wallet_globals is None:
+    session = setup.session()
+    if not session.wallet_globals is None:
         return True
-    
-    global wallet_singleton
-    wallet_singleton = wallet.Wallet.wallet_single
 
-    if wallet_singleton is None:
+    if session.wallet is None:
+        if session.accounts is not None:
+            globals = session.accounts
         wallet.create_wallet(wallet_globals=globals)
-        wallet_singleton = wallet.Wallet.wallet_single
 
-        if wallet_singleton is None:
+        if session.wallet is None:
             raise errors.Error('''
                 Cannot find any `Wallet` object.
                 ''')
-    wallet_globals = wallet.Wallet.globals
+    session.wallet_globals = session.wallet.globals
     return True
 
 
 def put_account_to_wallet_and_on_stack(
-        account_object_name, account_object, logger=None):
+        account_object_name, account_object, logger=None, verify=True):
     if logger is None:
         logger = account_object
 
-    global wallet_singleton
+    session = setup.session()
+    wallet_singleton = session.wallet
 
     if account_object.owner_key:
-        if wallet_singleton.keys_in_wallets(
+        if not verify:
+            wallet_singleton.import_key(account_object, verify=False)
+            wallet_singleton.map_account(account_object)
+        elif wallet_singleton.keys_in_wallets(
                 [account_object.owner_key.key_private,
                 account_object.active_key.key_private]):
             wallet_singleton.map_account(account_object)
@@ -1070,8 +1199,7 @@ def put_account_to_wallet_and_on_stack(
                 return False
 
     # export the account object to the globals in the wallet module:
-    global wallet_globals      
-    wallet_globals[account_object_name] = account_object
+    session.wallet_globals[account_object_name] = account_object
     account_object.in_wallet_on_stack = True
     return True
 
@@ -1080,33 +1208,18 @@ def print_stats(
         accounts, params, 
         last_col="%s", col="%15s"
     ):
-    def find(element, json):
-        try:
-            keys = element.split('.')
-            rv = json
-            for key in keys:
-                rv = rv[key]
-        except:
-            rv = "n/a"
-        return rv
-
-    jsons = []
-    for account in accounts:
-        json = cleos.GetAccount(account, is_info=False, is_verbose=0).json
+    jsons = resources.account_jsons(accounts)
+    for account, json in zip(accounts, jsons):
         json["account_object_name"] = account.account_object_name
-        jsons.append(json)
-
-    header = ""
-    for json in jsons:
-        header = header + col % (json["account_object_name"])
-    output = ".\n" + header + "\n"
 
-    for param in params:
-        for json in jsons:
-            output = output + col % find(param, json)
-        output = output + "  " + last_col % (param) + "\n" 
+    lines = [".", "".join(
+                    [col % (json["account_object_name"]) for json in jsons])]
+    for param, keys in zip(params, resources.paths(params)):
+        lines.append(
+            "".join([col % resources.find(keys, json) for json in jsons]) \
+                                                + "  " + last_col % (param))
 
-    logger.OUT(output, translate=False)
+    logger.OUT("\n".join(lines) + "\n", translate=False)
     
 
 def is_in_globals(account_object_name, globals):
@@ -1123,26 +1236,74 @@ def is_in_globals(account_object_name, globals):
     return False
 
 
+__assignment_targets = {}
+
+
+def assignment_targets(filename, module_globals=None):
+    '''Return the names assigned with the results of function calls in the 
+    given source file, as a dictionary, keyed with line numbers, of 
+    dictionaries keyed with function names.
+
+    Each file is parsed once; the result is cached.
+    '''
+    if filename in __assignment_targets:
+        return __assignment_targets[filename]
+
+    # Parsing is needed only by the 'new_' factory functions:
+    import ast
+    import linecache
+    targets = None
+    lines = linecache.getlines(filename, module_globals)
+    if lines:
+        try:
+            tree = ast.parse("".join(lines), filename)
+        except SyntaxError:
+            tree = None
+        if tree:
+            targets = {}
+            for node in ast.walk(tree):
+                if not isinstance(node, ast.Assign) \
+                        or not len(node.targets) == 1 \
+                        or not isinstance(node.value, ast.Call):
+                    continue
+                target = node.targets[0]
+                function = node.value.func
+                if isinstance(target, ast.Name):
+                    target_name = target.id
+                elif isinstance(target, ast.Attribute):
+                    target_name = target.attr
+                else:
+                    continue
+                if isinstance(function, ast.Name):
+                    function_name = function.id
+                elif isinstance(function, ast.Attribute):
+                    function_name = function.attr
+                else:
+                    continue
+                # A call may span many lines:
+                last_line = max([getattr(item, "lineno", node.lineno) \
+                                                for item in ast.walk(node)])
+                for lineno in range(node.lineno, last_line + 1):
+                    targets.setdefault(lineno, {})[function_name] = target_name
+
+    __assignment_targets[filename] = targets
+    return targets
+
+
 def get_new_account_name(function_name):
-    frame = inspect.stack()[2][0]
-    if not inspect.getmodule(frame):
+    frame = sys._getframe(2)
+    filename = frame.f_code.co_filename
+    targets = assignment_targets(filename, frame.f_globals)
+    if targets is None:
         raise errors.Error('''
     'new_` account factory functions cannot be used interactively.
     Use 'create_' factory functions instead.
         ''')
-    frameinfo = inspect.getframeinfo(frame)
-    lines = inspect.getsourcelines(inspect.getmodule(frame))
 
-    count = 1
-    while True:
-        code = lines[0][frameinfo.lineno - count].strip()
-        if function_name in code:
-            break
-        count = count + 1
-
-    account_object_name = re.sub(r'\s*=\s*' + function_name + r'\(.*', "", code)
-    account_object_name = re.sub(r'.*\.', "", account_object_name)
-    if not function_name in code or not account_object_name.isidentifier():
+    account_object_name = targets.get(frame.f_lineno, {}).get(function_name)
+    if not account_object_name:
+        import linecache
+        code = linecache.getline(filename, frame.f_lineno).strip()
         raise errors.Error('''
     Cannot determine the object name of a new account to be created.
 
@@ -1165,4 +1326,7 @@ def stop_if_account_is_not_set(account):
         The account object calling the method of 'Account' class is not set.
         Use 'create_account' factory function to set it.
         ''', print_stack=True)
+    # Accounts created on the fast path are verified on first use:
+    if getattr(account, "is_verified", True) is False:
+        account.verify()
 
@@ -121,7 +121,6 @@ class Contract(ContractBuilder):
         self.ref_block = ref_block
         self.delay_sec = delay_sec
         self.contract = None
-        self._console = None
 
     def clear(self):
         '''Remove contract on an account
@@ -250,6 +249,13 @@ class Contract(ContractBuilder):
             binary, 
             limit, key, lower, upper)
 
+    def table_iter(self, table_name, scope="", page_size=100):
+        '''Iterate over all the rows of a database table.
+
+        See :func:`.shell.account.Account.table_iter`.
+        '''
+        return self.account.table_iter(table_name, scope, page_size)
+
     def code(self, code=None, abi=None, wasm=False):
         '''Retrieve the code and ABI
 
@@ -262,7 +268,10 @@ class Contract(ContractBuilder):
         return self.account.code(code, abi, wasm)
 
     def console(self):
-        return self._console
+        '''Return the console output of the last action pushed, or *None*.
+        '''
+        action = getattr(self.account, "action", None)
+        return action.console if action else None
 
     def path(self):
         ''' Return the path to the contract.
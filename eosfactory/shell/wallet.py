@@ -1,6 +1,6 @@
 import os
+import sys
 import json
-import inspect
 
 import eosfactory.core.errors as errors
 import eosfactory.core.config as config
@@ -9,6 +9,9 @@ import eosfactory.core.setup as setup
 import eosfactory.core.interface as interface
 import eosfactory.core.cleos as cleos
 import eosfactory.core.manager as manager
+import eosfactory.core.utils as utils
+
+RESTORE_CONCURRENCY = 8
 
 
 class Wallet(cleos.WalletCreate):
@@ -19,23 +22,22 @@ class Wallet(cleos.WalletCreate):
         name (str): The name of the new wallet, defaults to `default`.
         password (str): The password to the wallet, if the wallet exists. 
     '''
-    wallet_single = None
     globals = {}
 
     def __init__(self, name=None, password="", file=False):
 
         cleos.set_local_nodeos_address_if_none()
         if name is None:
-            name = setup.wallet_default_name
+            name = setup.session().wallet_default_name
         else:
             name = setup.file_prefix() + name
 
-        if not Wallet.wallet_single is None \
-                                    and not Wallet.wallet_single.name == name:
+        wallet_ = setup.session().wallet
+        if not wallet_ is None and not wallet_.name == name:
             raise errors.Error('''
-            It can be only one ``Wallet`` object in the script; there is one
+            It can be only one ``Wallet`` object in the session; there is one
             named ``{}``.
-            '''.format(Wallet.wallet_single.name))
+            '''.format(wallet_.name))
 
         self.wallet_dir = config.keosd_wallet_dir()
 
@@ -52,7 +54,8 @@ class Wallet(cleos.WalletCreate):
                     The password is restored from the file:
                     {}
                     '''.format(
-                        os.path.join(self.wallet_dir, setup.password_map)))
+                        os.path.join(
+                            self.wallet_dir, setup.session().password_map)))
 
         cleos.WalletCreate.__init__(self, name, password, is_verbose=False)
 
@@ -71,7 +74,7 @@ class Wallet(cleos.WalletCreate):
                 logger.INFO('''
                     * Password is saved to the file ``{}`` 
                     in the wallet directory.
-                    '''.format(setup.password_map)
+                    '''.format(setup.session().password_map)
                 )
             else:
                 logger.OUT(self.out_msg)
@@ -187,7 +190,7 @@ class Wallet(cleos.WalletCreate):
         ''')
         return True
 
-    def import_key(self, account_or_key):
+    def import_key(self, account_or_key, verify=True):
         ''' Imports private keys into wallet.
 
         Return list of `cleos.WalletImport` objects
@@ -197,7 +200,22 @@ class Wallet(cleos.WalletCreate):
                 A private key to import. If *account_or_key* is an 
                 .interface.Account object, both owner and active keys are 
                 imported.
+            verify (bool): If not set, the wallet is assumed open and
+                unlocked, a key shared by the owner and active permissions is
+                imported once, and the wallet is not cross-checked for the 
+                keys. Default is *True*.
         '''
+        if not verify and isinstance(account_or_key, interface.Account):
+            keys = []
+            for is_owner_key in [True, False]:
+                key = interface.key_arg(
+                    account_or_key, is_owner_key=is_owner_key, 
+                    is_private_key=True)
+                if not key in keys:
+                    keys.append(key)
+                    cleos.WalletImport(key, self.name, is_verbose=False)
+            return True
+
         self.open_unlock()
         imported_keys = []
         account_name = None
@@ -273,27 +291,41 @@ class Wallet(cleos.WalletCreate):
     def restore_accounts(self):
         '''Restore into the global namespace all the account objects 
         represented in the wallet. 
+
+        The accounts are retrieved concurrently, at most 
+        *RESTORE_CONCURRENCY* at a time, and their keys are checked against 
+        one listing of the wallet keys.
         '''
         self.open_unlock()
         account_map = manager.account_map()
         new_map = {}
-        wallet_keys = cleos.WalletKeys(is_verbose=0)
         if len(account_map) > 0:
             logger.INFO('''
                     ######### Restore cached account objects:
                     ''') 
-            for name, object_name in account_map.items():
+
+            def get_account(name):
                 try:
-                    account_ = cleos.GetAccount(
-                        name, is_info=False, is_verbose=False)
-                    if account_.owner_key in wallet_keys.json and \
-                            account_.active_key in wallet_keys.json:
-                        new_map[name] = object_name
-
-                    from eosfactory.shell.account import create_account
-                    create_account(object_name, name, restore=True)                        
+                    return cleos.GetAccount(
+                                    name, is_info=False, is_verbose=False).json
                 except errors.AccountDoesNotExistError:
-                    pass
+                    return None
+
+            names = list(account_map.keys())
+            account_jsons = utils.ordered_map(
+                                get_account, names, RESTORE_CONCURRENCY)
+            wallet_keys = cleos.WalletKeys(is_verbose=0).json
+
+            from eosfactory.shell.account import create_account
+            for name, account_json in zip(names, account_jsons):
+                if account_json is None:
+                    continue
+                owner_key, active_key = cleos.permission_keys(account_json)
+                if owner_key in wallet_keys and active_key in wallet_keys:
+                    new_map[name] = account_map[name]
+                create_account(
+                    account_map[name], name, restore=True, 
+                    account_json=account_json)
 
             manager.save_account_map(new_map)
         else:
@@ -308,7 +340,7 @@ class Wallet(cleos.WalletCreate):
         '''
         account_map = manager.account_map()
         for account_object, object_name in account_map.items():
-            del Wallet.globals[object_name]
+            del self.globals[object_name]
 
     def stop(self):
         '''Stop keosd, the EOSIO wallet manager.
@@ -386,9 +418,9 @@ class Wallet(cleos.WalletCreate):
 
             if is_taken:
                 temp = None
-                if account_object_name in Wallet.globals:
-                    temp = Wallet.globals[account_object_name]
-                    del Wallet.globals[account_object_name]
+                if account_object_name in self.globals:
+                    temp = self.globals[account_object_name]
+                    del self.globals[account_object_name]
                 
                 answer = input("y/n <<< ")
                 
@@ -397,7 +429,7 @@ class Wallet(cleos.WalletCreate):
                     continue
                 else:
                     if temp:
-                        Wallet.globals[account_object_name] = temp
+                        self.globals[account_object_name] = temp
                     raise errors.Error('''
                     Use the function 'manager.edit_account_map()' to edit the file.
                     ''')
@@ -418,7 +450,8 @@ class Wallet(cleos.WalletCreate):
 
             account_map_json[account_object.name] = account_object_name
 
-            with open(self.wallet_dir + setup.account_map, "w") as out:
+            account_map = setup.session().account_map
+            with open(self.wallet_dir + account_map, "w") as out:
                 out.write(json.dumps(
                     account_map_json, indent=3, sort_keys=True))
 
@@ -428,21 +461,22 @@ class Wallet(cleos.WalletCreate):
                     {}
                 '''.format(
                     account_object_name,
-                    setup.account_map,
-                    self.wallet_dir + setup.account_map))
+                    account_map,
+                    self.wallet_dir + account_map))
 
 
 def wallet_json_read():
     try:
-        with open(config.keosd_wallet_dir() + setup.password_map, "r") \
-                as f:    
+        with open(config.keosd_wallet_dir() + setup.session().password_map, 
+                "r") as f:    
             return json.load(f)
     except:
         return {}
 
 
 def wallet_json_write(wallet_json):
-    with open(config.keosd_wallet_dir() + setup.password_map, "w+")  as out:
+    with open(config.keosd_wallet_dir() + setup.session().password_map, 
+            "w+") as out:
         json.dump(wallet_json, out)
 
 
@@ -455,13 +489,12 @@ def create_wallet(
     on the first use of either :func:`.shell.account.create_master_account`
     or :func:`.shell.account.create_account` functions.
     '''
-    if wallet_globals:
-        Wallet.globals = wallet_globals
-    else:
-        Wallet.globals = inspect.stack()[1][0].f_globals
-    Wallet.wallet_single = Wallet(name, password, file)
-    Wallet.wallet_single.restore_accounts()
+    wallet_ = Wallet(name, password, file)
+    wallet_.globals = wallet_globals if wallet_globals is not None \
+                                            else sys._getframe(1).f_globals
+    setup.session().wallet = wallet_
+    wallet_.restore_accounts()
 
 
 def get_wallet():
-    return Wallet.wallet_single
\ No newline at end of file
+    return setup.session().wallet
\ No newline at end of file
@@ -1,4 +1,4 @@
-import unittest, argparse, sys, time
+import unittest, argparse, sys
 from eosfactory.eosf import *
 
 verbosity([Verbosity.INFO, Verbosity.OUT, Verbosity.TRACE])
@@ -91,7 +91,7 @@ def test():
                 },
                 permission=(carol, Permission.ACTIVE))
 
-            time.sleep(3)
+            HOST.action.wait()
 
             COMMENT('''
             Second attempt to create a new game:
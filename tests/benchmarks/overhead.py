@@ -0,0 +1,258 @@
+'''Framework-overhead benchmarks.
+
+The EOSIO executables, *cleos*, *nodeos*, *keosd* and *eosio-cpp*, are
+replaced with instant stubs, found in the *stubs* directory, so that the
+measured time is spent in EOSFactory itself: configuration resolution,
+process spawn, JSON parsing, logging and message translation.
+
+For each operation, the mean and median wall time of a call are measured,
+together with the number of processes spawned by a call. The overhead is the
+wall time less the time the spawned processes take, measured with the bare
+*cleos* stub.
+
+The results are appended to a history file, and compared with the median of
+the preceding entries, so that regressions of the framework are caught::
+
+    python3 tests/benchmarks/overhead.py --runs 50 --check
+'''
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import datetime
+import platform
+import tempfile
+import subprocess
+
+import eosfactory.core.logger as logger
+import eosfactory.core.config as config
+import eosfactory.core.setup as setup
+import eosfactory.core.teos as teos
+import eosfactory.core.cleos as cleos
+import eosfactory.core.cleos_get as cleos_get
+import eosfactory.shell.account as account
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+STUBS_DIR = os.path.join(BENCHMARK_DIR, "stubs")
+HISTORY_FILE = os.path.join(BENCHMARK_DIR, "overhead_history.jsonl")
+CONTRACT_DIR = os.path.join(
+            os.path.dirname(os.path.dirname(BENCHMARK_DIR)),
+            "contracts", "hello_world")
+RUNS = 30
+THRESHOLD = 0.2
+HISTORY_DEPTH = 5
+
+spawn_count = [0]
+
+
+def install_stubs(work_dir):
+    '''Make the stubs found first, and count the processes spawned.
+    '''
+    os.environ["PATH"] = STUBS_DIR + os.pathsep + os.environ["PATH"]
+    for name, function in [
+            ("cleos", "cli_exe"), ("nodeos", "node_exe"),
+            ("keosd", "keosd_exe"), ("eosio-cpp", "eosio_cpp")]:
+        path = shutil.which(getattr(config, function)())
+        if not path or not os.path.dirname(path) == STUBS_DIR:
+            # The configuration file overrides the PATH lookup:
+            stub = os.path.join(STUBS_DIR, name)
+            setattr(config, function, lambda stub=stub: stub)
+
+    # The eosio.cdt installation directory is looked for in system paths. 
+    # Its version is still queried, as the original function does:
+    cdt_root = os.path.join(work_dir, "eosio.cdt") + os.sep
+    for include in config.eosio_cpp_includes_[1][0]:
+        os.makedirs(os.path.join(cdt_root, include))
+    def eosio_cdt_root():
+        config.eosio_cdt_version()
+        return cdt_root
+    config.eosio_cdt_root = eosio_cdt_root
+
+    # All the subprocess functions spawn with the *Popen* class:
+    popen = subprocess.Popen
+    class CountedPopen(popen):
+        def __init__(self, *args, **kwargs):
+            spawn_count[0] += 1
+            popen.__init__(self, *args, **kwargs)
+    subprocess.Popen = CountedPopen
+
+
+def spawn_time(runs):
+    '''The mean time of spawning the bare *cleos* stub.
+    '''
+    command_line = [os.path.join(STUBS_DIR, "cleos"), "get", "info"]
+    start = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run(
+            command_line, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return (time.perf_counter() - start) / runs
+
+
+def measure(operation, runs, spawn):
+    '''Call the operation *runs* times, after one warm-up call.
+    '''
+    operation(-1)
+    times = []
+    spawns = spawn_count[0]
+    for run in range(runs):
+        start = time.perf_counter()
+        operation(run)
+        times.append(time.perf_counter() - start)
+    spawns = (spawn_count[0] - spawns) / runs
+
+    times.sort()
+    mean = sum(times) / runs
+    return {
+        "mean_us": mean * 1e6,
+        "p50_us": times[(runs - 1) // 2] * 1e6,
+        "spawns": spawns,
+        "overhead_us": max(0, mean - spawns * spawn) * 1e6
+    }
+
+
+def operations(work_dir):
+    '''Set up a wallet, accounts and a contract project, and return the
+    benchmarked operations.
+    '''
+    master = account.create_master_account("MASTER")
+    host = account.create_account("HOST", master)
+
+    contract_dir = os.path.join(work_dir, "hello_world")
+    shutil.copytree(CONTRACT_DIR, contract_dir)
+
+    return [
+        ("Cleos", lambda run: cleos_get.GetInfo(is_verbose=False)),
+        ("create_account", lambda run: account.create_account(
+                                        "ACCOUNT{}".format(run + 1), master)),
+        ("push_action", lambda run: host.push_action(
+                                        "hi", {"user": "alice", "run": run})),
+        ("table", lambda run: host.table("accounts", "alice")),
+        ("build", lambda run: teos.build(contract_dir, verbosity=[]))
+    ]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARK_DIR,
+                stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def run(runs=RUNS):
+    '''Run the benchmarks in a temporary home directory.
+
+    Returns:
+        dict: The history entry.
+    '''
+    work_dir = tempfile.mkdtemp()
+    home = os.environ.get("HOME")
+    os.environ["HOME"] = work_dir
+    os.makedirs(os.path.join(work_dir, "eosio-wallet"))
+    try:
+        install_stubs(work_dir)
+        logger.verbosity([])
+        setup.is_print_command_lines = False
+        spawn = spawn_time(runs)
+
+        results = {}
+        for name, operation in operations(work_dir):
+            results[name] = measure(operation, runs, spawn)
+    finally:
+        if home is None:
+            del os.environ["HOME"]
+        else:
+            os.environ["HOME"] = home
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "time": datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "runs": runs,
+        "spawn_us": spawn * 1e6,
+        "results": results
+    }
+
+
+def history(path):
+    entries = []
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    entries.append(json.loads(line))
+    return entries
+
+
+def regressions(entry, previous, threshold=THRESHOLD):
+    '''Compare the overhead of each operation with the median of the previous
+    entries.
+    '''
+    found = []
+    for name, result in entry["results"].items():
+        values = sorted([
+            item["results"][name]["overhead_us"] for item in previous \
+                                                if name in item["results"]])
+        if not values:
+            continue
+        median = values[(len(values) - 1) // 2]
+        if median and result["overhead_us"] > median * (1 + threshold):
+            found.append("{}: {:.0f}us against {:.0f}us".format(
+                                        name, result["overhead_us"], median))
+    return found
+
+
+def report(entry):
+    lines = ["{:16}{:>12}{:>12}{:>8}{:>14}".format(
+                    "operation", "mean [us]", "p50 [us]", "spawns",
+                    "overhead [us]")]
+    for name, result in entry["results"].items():
+        lines.append("{:16}{:>12.0f}{:>12.0f}{:>8.1f}{:>14.0f}".format(
+            name, result["mean_us"], result["p50_us"], result["spawns"],
+            result["overhead_us"]))
+    lines.append("stub spawn: {:.0f}us".format(entry["spawn_us"]))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='''
+    Measure the per-call overhead of EOSFactory, with the EOSIO executables
+    replaced with instant stubs.
+    ''')
+    parser.add_argument(
+        "--runs", help="The number of calls of each operation.", type=int,
+        default=RUNS)
+    parser.add_argument(
+        "--history", help="The history file.", default=HISTORY_FILE)
+    parser.add_argument(
+        "--threshold", help="The regression threshold, as a fraction.",
+        type=float, default=THRESHOLD)
+    parser.add_argument(
+        "--check", help="Exit with an error code on regression.",
+        action="store_true")
+    parser.add_argument(
+        "--dont_save", help="Do not append the results to the history file.",
+        action="store_true")
+    args = parser.parse_args()
+
+    entry = run(args.runs)
+    print(report(entry))
+
+    found = regressions(
+                entry, history(args.history)[-HISTORY_DEPTH:], args.threshold)
+    if not args.dont_save:
+        with open(args.history, "a") as f:
+            f.write(json.dumps(entry, sort_keys=True) + "\n")
+
+    if found:
+        print("Overhead regressions:\n" + "\n".join(found))
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -24,7 +24,7 @@ where `foo` is to be the new account object variable (global or local), and `own
 The current script can be compared with `tests/tic_tac_toe.py` which is 
 functionally identical, yet written with the standard EOSFactory style.
 '''
-import unittest, argparse, sys, time
+import unittest, argparse, sys
 from eosfactory.eosf import *
 
 verbosity([Verbosity.INFO, Verbosity.OUT, Verbosity.TRACE])
@@ -134,7 +134,7 @@ class Test(unittest.TestCase):
                     },
                     permission=(Test.carol, Permission.ACTIVE))
 
-                time.sleep(3)
+                Test.host.action.wait()
 
                 COMMENT('''
                 Second attempt to create a new game:
@@ -3,7 +3,7 @@
 For explanation see http://eosfactory.io/build/html/comments/account.html,
 there the section 'Account objects reside in the global namespace'.
 '''
-import unittest, argparse, sys, time
+import unittest, argparse, sys
 from eosfactory.eosf import *
 
 verbosity([Verbosity.INFO, Verbosity.OUT, Verbosity.TRACE])
@@ -114,7 +114,7 @@ class Test(unittest.TestCase):
                     },
                     permission=(CAROL, Permission.ACTIVE))
 
-                time.sleep(3)
+                HOST.action.wait()
 
                 COMMENT('''
                 Second attempt to create a new game:
@@ -0,0 +1,103 @@
+'''Record and replay of *cleos* commands, see :mod:`eosfactory.core.cassette`.
+
+A session is recorded on the in-process chain of
+:mod:`eosfactory.core.mock_chain`, and replayed without it.
+'''
+import os
+import json
+import tempfile
+import unittest
+
+from eosfactory.eosf import *
+import eosfactory.core.setup as setup
+import eosfactory.core.cassette as cassette
+import eosfactory.core.mock_chain as mock_chain
+
+verbosity([])
+
+ABI = {
+    "version": "eosio::abi/1.1",
+    "structs": [
+        {"name": "greeting", "base": "", "fields": [
+            {"name": "user", "type": "name"},
+            {"name": "count", "type": "uint64"}]},
+        {"name": "hi", "base": "", "fields": [
+            {"name": "user", "type": "name"}]}
+    ],
+    "actions": [{"name": "hi", "type": "hi"}],
+    "tables": [{"name": "greetings", "type": "greeting"}]
+}
+
+CHAIN = mock_chain.MockChain()
+
+
+@CHAIN.action("recorded", "hi")
+def hi(context, data):
+    context.require_auth(data["user"])
+    context.print("Hello, ", data["user"])
+    table = context.table("greetings")
+    row = table.get(data["user"], {"user": data["user"], "count": 0})
+    row = {"user": data["user"], "count": row["count"] + 1}
+    if data["user"] in table:
+        table.modify(data["user"], row)
+    else:
+        table.emplace(data["user"], row)
+
+
+def scenario(contract_dir, greet_host=False):
+    '''Run a session, and return what it observes, with the random account
+    names replaced with their roles.
+    '''
+    with setup.Session():
+        reset()
+        master = create_master_account("MASTER")
+        host = create_account("HOST", master)
+        alice = create_account("ALICE", master)
+        Contract(host, contract_dir).deploy()
+
+        def roles(text):
+            return text.replace(host.name, "HOST").replace(alice.name, "ALICE")
+
+        consoles = []
+        for i in range(2):
+            host.push_action("hi", {"user": alice}, permission=alice)
+            consoles.append(roles(host.action.console))
+        if greet_host:
+            host.push_action("hi", {"user": host}, permission=host)
+        rows = roles(json.dumps(host.table("greetings", host).json["rows"]))
+        stop()
+    return consoles, json.loads(rows)
+
+
+class Test(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.contract_dir = mock_chain.contract_dir("recorded", ABI)
+        cls.path = os.path.join(tempfile.mkdtemp(), "session.json.gz")
+        with CHAIN:
+            with cassette.Cassette(cls.path) as recorder:
+                cls.recorded = scenario(cls.contract_dir)
+        cls.recorder = recorder
+
+    def test_record(self):
+        self.assertEqual(self.recorder.mode, cassette.RECORD)
+        self.assertTrue(os.path.exists(self.path))
+        self.assertEqual(
+            self.recorded, (["HOST@hi:\nHello, ALICE"] * 2,
+                                            [{"user": "ALICE", "count": 2}]))
+
+    def test_replay(self):
+        with cassette.Cassette(self.path) as player:
+            self.assertEqual(player.mode, cassette.REPLAY)
+            self.assertEqual(scenario(self.contract_dir), self.recorded)
+
+    def test_replay_not_recorded(self):
+        with cassette.Cassette(self.path):
+            with self.assertRaises(Error) as context:
+                scenario(self.contract_dir, greet_host=True)
+        self.assertIn("The cassette has no record", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
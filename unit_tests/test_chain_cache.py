@@ -0,0 +1,82 @@
+'''The on-disk cache of irreversible blocks and transactions, see
+:mod:`eosfactory.core.chain_cache`.
+'''
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import eosfactory.core.chain_cache as chain_cache
+import eosfactory.core.cleos_get as cleos_get
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = chain_cache.ChainCache(
+                os.path.join(tempfile.mkdtemp(), "chain.sqlite"), 1024 * 1024)
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_put_and_get(self):
+        self.cache.put_block(5, "ab" * 32, "block 5")
+        self.cache.put_transaction("cd" * 32, 5, "transaction")
+        self.assertEqual(self.cache.block(5), "block 5")
+        self.assertEqual(self.cache.block(block_id="ab" * 32), "block 5")
+        self.assertEqual(self.cache.transaction("cd" * 32), "transaction")
+        self.assertIsNone(self.cache.block(6))
+
+    def test_size_of_replaced_entries(self):
+        for i in range(10):
+            self.cache.put_block(5, "ab" * 32, "block 5" * (i + 1))
+            self.cache.put_transaction("cd" * 32, 5, "transaction")
+        stored = self.cache.connection.execute(
+            "SELECT (SELECT SUM(size) FROM blocks)"
+            " + (SELECT SUM(size) FROM transactions)").fetchone()[0]
+        self.assertEqual(self.cache.size, stored)
+
+    def test_eviction(self):
+        self.cache.size_limit = 4096
+        for block_num in range(100):
+            self.cache.put_block(
+                block_num, str(block_num), os.urandom(256).hex())
+        self.assertLessEqual(self.cache.size, self.cache.size_limit)
+        self.assertIsNone(self.cache.block(0))
+        self.assertIsNotNone(self.cache.block(99))
+
+    def test_directory_made_when_opened(self):
+        path = os.path.join(tempfile.mkdtemp(), "cache")
+        with mock.patch.object(
+                    chain_cache.config, "config_value", return_value=path):
+            self.assertEqual(chain_cache.config.chain_cache_dir(), path)
+            self.assertFalse(os.path.exists(path))
+
+            cache = chain_cache.ChainCache(
+                                os.path.join(path, "chain.sqlite"), 1024)
+            cache.close()
+            self.assertTrue(os.path.isdir(path))
+
+    def test_last_irreversible_refresh(self):
+        info = mock.Mock(last_irreversible_block_num=10)
+        with mock.patch.object(chain_cache.setup, "nodeos_address",
+                    return_value="http://chain-cache.test:8888"), \
+                mock.patch.object(
+                    cleos_get, "GetInfo", return_value=info) as get_info:
+            chain_cache.remove("http://chain-cache.test:8888")
+            self.assertTrue(chain_cache.is_irreversible(10))
+            for block_num in range(11, 20):
+                self.assertFalse(chain_cache.is_irreversible(block_num))
+            self.assertEqual(get_info.call_count, 1)
+
+            info.last_irreversible_block_num = 15
+            with mock.patch.object(chain_cache.time, "time",
+                        return_value=chain_cache.time.time() \
+                                    + chain_cache.LIB_REFRESH_INTERVAL):
+                self.assertTrue(chain_cache.is_irreversible(15))
+            self.assertEqual(get_info.call_count, 2)
+            self.assertTrue(chain_cache.is_irreversible(12))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,21 @@
+'''Execution of the *cleos* commands, see :func:`eosfactory.core.cleos.execute`.
+'''
+import unittest
+from unittest import mock
+
+import eosfactory.core.config as config
+import eosfactory.core.cleos as cleos
+
+
+class Test(unittest.TestCase):
+
+    def test_execute_bare_executable_name(self):
+        # The executable is found on the PATH, as "cleos" may be:
+        with mock.patch.object(config, "cli_exe", return_value="sh"):
+            out, err = cleos.execute(
+                ["sh", "-c", "echo out; echo err >&2"], "get", "info", [])
+        self.assertEqual((out, err), ("out\n", "err\n"))
+
+
+if __name__ == '__main__':
+    unittest.main()
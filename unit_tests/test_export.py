@@ -0,0 +1,152 @@
+'''Export of contract tables, see :mod:`eosfactory.export`, interrupted and
+resumed from the checkpoint, on the in-process chain of
+:mod:`eosfactory.core.mock_chain`.
+'''
+import os
+import json
+import tempfile
+import unittest
+
+from eosfactory.eosf import *
+import eosfactory.core.mock_chain as mock_chain
+import eosfactory.export as export
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+verbosity([])
+
+ABI = {
+    "version": "eosio::abi/1.1",
+    "structs": [
+        {"name": "account", "base": "", "fields": [
+            {"name": "user", "type": "name"},
+            {"name": "amount", "type": "int64"},
+            {"name": "note", "type": "string?"}]},
+        {"name": "put", "base": "", "fields": [
+            {"name": "scope", "type": "name"},
+            {"name": "user", "type": "name"},
+            {"name": "amount", "type": "int64"}]}
+    ],
+    "actions": [{"name": "put", "type": "put"}],
+    "tables": [{"name": "accounts", "type": "account"}]
+}
+PAGE_SIZE = 3
+
+CHAIN = mock_chain.MockChain()
+
+
+@CHAIN.action("exported", "put")
+def put(context, data):
+    # The note column is null in the last pages:
+    context.table("accounts", data["scope"]).emplace(data["amount"], {
+        "user": data["user"], "amount": data["amount"],
+        "note": "note" if data["amount"] < 4 else None})
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptedPages():
+    '''The pages of a source, interrupted before the given page.
+    '''
+    def __init__(self, source, page):
+        self.source = source
+        self.page = page
+        self.description = source.description
+
+    def pages(self, position=None):
+        for page, item in enumerate(self.source.pages(position)):
+            if page == self.page:
+                raise Interrupted()
+            yield item
+
+
+# Actors of the test:
+MASTER = MasterAccount()
+HOST = Account()
+ALICE = Account()
+CAROL = Account()
+
+
+class Test(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        CHAIN.install()
+        reset()
+        create_master_account("MASTER")
+        create_account("HOST", MASTER)
+        create_account("ALICE", MASTER)
+        create_account("CAROL", MASTER)
+        Contract(HOST, mock_chain.contract_dir("exported", ABI)).deploy()
+        for scope in [ALICE, CAROL]:
+            for amount in range(8):
+                HOST.push_action("put", {
+                    "scope": scope, "user": ALICE, "amount": amount},
+                    permission=HOST)
+
+    @classmethod
+    def tearDownClass(cls):
+        stop()
+        CHAIN.uninstall()
+
+    def source(self):
+        return export.TablePages(HOST, "accounts", page_size=PAGE_SIZE)
+
+    def resumed(self, extension):
+        directory = tempfile.mkdtemp()
+        full = os.path.join(directory, "full" + extension)
+        output = os.path.join(directory, "resumed" + extension)
+        count = export.export(self.source(), full, checkpoint_pages=1)
+        self.assertEqual(count, 16)
+
+        with self.assertRaises(Interrupted):
+            export.export(
+                InterruptedPages(self.source(), 5), output, checkpoint_pages=2)
+        with open(output + export.CHECKPOINT_EXTENSION) as f:
+            self.assertEqual(json.load(f)["rows"], 11)
+
+        self.assertEqual(
+            export.export(self.source(), output, checkpoint_pages=2), 16)
+        self.assertFalse(
+                    os.path.exists(output + export.CHECKPOINT_EXTENSION))
+        return full, output
+
+    def test_csv_resumed(self):
+        full, output = self.resumed(".csv")
+        with open(full) as f, open(output) as g:
+            self.assertEqual(f.read(), g.read())
+
+    def test_json_lines_resumed(self):
+        full, output = self.resumed(".jsonl")
+        with open(full) as f, open(output) as g:
+            rows = [json.loads(line) for line in g]
+            self.assertEqual([json.loads(line) for line in f], rows)
+        # The scopes are in the order of their names:
+        first = min(ALICE.name, CAROL.name)
+        self.assertEqual(
+            [(row["scope"], row["amount"]) for row in rows[:4]],
+            [(first, 0), (first, 1), (first, 2), (first, 3)])
+
+    @unittest.skipIf(pyarrow is None, "The pyarrow package is not installed.")
+    def test_parquet_resumed(self):
+        full, output = self.resumed(".parquet")
+        self.assertEqual(
+            pyarrow.parquet.read_table(full).to_pylist(),
+            pyarrow.parquet.read_table(output).to_pylist())
+
+        # The parts with null notes only have the schema of the first part:
+        parts = sorted(os.listdir(full))
+        self.assertEqual(len(parts), 6)
+        schema = pyarrow.parquet.read_schema(os.path.join(full, parts[0]))
+        for part in parts[1:]:
+            self.assertEqual(
+                pyarrow.parquet.read_schema(os.path.join(full, part)), schema)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+'''Import-time budget of the EOSFactory facade.
+
+The facade is imported in a fresh interpreter, so that no module is cached.
+The heavy modules, like *psutil* and the shell modules, are not to be imported
+until used. The star import, as documented, imports the shell modules, but
+these defer their own heavy imports.
+'''
+import sys
+import json
+import unittest
+import subprocess
+
+# The budget, in seconds, generous for slow machines:
+IMPORT_TIME_BUDGET = 0.5
+HEAVY_MODULES = [
+    "psutil",
+    "eosfactory.core.teos",
+    "eosfactory.core.manager",
+    "eosfactory.shell.account",
+    "eosfactory.shell.contract"
+]
+# Not imported even with the star import:
+STAR_HEAVY_MODULES = [
+    "psutil",
+    "sqlite3",
+    "ast",
+    "linecache",
+    "pathlib",
+    "queue",
+    "argparse",
+    "concurrent.futures",
+    "asyncio"
+]
+SCRIPT = '''
+import sys
+import json
+import time
+start = time.perf_counter()
+{}
+duration = time.perf_counter() - start
+print(json.dumps({{
+    "duration": duration,
+    "modules": [name for name in {} if name in sys.modules]}}))
+'''
+STAR_IMPORT = "from eosfactory.eosf import *"
+
+
+def import_facade(module="eosfactory.eosf", modules=HEAVY_MODULES):
+    statement = module if module.startswith("from ") \
+                                                else "import " + module
+    out = subprocess.check_output([
+        sys.executable, "-c", SCRIPT.format(statement, modules)])
+    return json.loads(out.decode().strip().split("\n")[-1])
+
+
+class Test(unittest.TestCase):
+
+    def test_import_time(self):
+        duration = min([import_facade()["duration"] for i in range(3)])
+        self.assertLess(duration, IMPORT_TIME_BUDGET)
+
+    def test_heavy_modules_are_deferred(self):
+        self.assertEqual(import_facade()["modules"], [])
+
+    def test_star_import_time(self):
+        duration = min([import_facade(STAR_IMPORT)["duration"] \
+                                                        for i in range(3)])
+        self.assertLess(duration, IMPORT_TIME_BUDGET)
+
+    def test_star_import_defers_heavy_modules(self):
+        self.assertEqual(
+            import_facade(STAR_IMPORT, STAR_HEAVY_MODULES)["modules"], [])
+
+    def test_build_does_not_import_psutil(self):
+        self.assertNotIn("psutil", import_facade("eosfactory.build")["modules"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,220 @@
+'''Tests of the in-process chain, see :mod:`eosfactory.core.mock_chain`.
+
+The account objects, the contract and its tables are driven with the usual
+EOSFactory API, through the *cleos* commands that the mock chain emulates.
+No *nodeos* or *keosd* process is needed.
+'''
+import threading
+import unittest
+from unittest import mock
+
+from eosfactory.eosf import *
+import eosfactory.core.cleos_get as cleos_get
+import eosfactory.core.history as history
+import eosfactory.core.manager as manager
+import eosfactory.core.setup as setup
+import eosfactory.core.mock_chain as mock_chain
+
+verbosity([])
+
+ABI = {
+    "version": "eosio::abi/1.1",
+    "structs": [
+        {"name": "account", "base": "", "fields": [
+            {"name": "user", "type": "name"},
+            {"name": "amount", "type": "int64"}]},
+        {"name": "put", "base": "", "fields": [
+            {"name": "user", "type": "name"},
+            {"name": "amount", "type": "int64"}]},
+        {"name": "fail", "base": "", "fields": [
+            {"name": "user", "type": "name"}]}
+    ],
+    "actions": [
+        {"name": "put", "type": "put"}, {"name": "fail", "type": "fail"}],
+    "tables": [{"name": "accounts", "type": "account"}]
+}
+
+CHAIN = mock_chain.MockChain()
+
+
+@CHAIN.action("mock", "put")
+def put(context, data):
+    context.require_auth(data["user"])
+    context.print("put ", data["user"])
+    table = context.table("accounts", data["user"])
+    key = data["amount"]
+    row = {"user": data["user"], "amount": data["amount"]}
+    if key in table:
+        table.modify(key, row)
+    else:
+        table.emplace(key, row)
+
+
+@CHAIN.action("mock", "fail")
+def fail(context, data):
+    context.table("accounts", data["user"]).emplace(
+                                    999, {"user": data["user"], "amount": 999})
+    context.check(False, "failed on purpose")
+
+
+# Actors of the test:
+MASTER = MasterAccount()
+HOST = Account()
+ALICE = Account()
+CAROL = Account()
+DAVE = Account()
+ERIN = Account()
+
+
+class Test(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        CHAIN.install()
+        reset()
+        create_master_account("MASTER")
+        create_account("HOST", MASTER)
+        create_account("ALICE", MASTER)
+        create_account("CAROL", MASTER)
+        Contract(HOST, mock_chain.contract_dir("mock", ABI)).deploy()
+
+    @classmethod
+    def tearDownClass(cls):
+        stop()
+        CHAIN.uninstall()
+
+    def rows(self, scope, **kwargs):
+        return HOST.table("accounts", scope, **kwargs).json["rows"]
+
+    def test_create_account(self):
+        get_account = cleos.GetAccount(ALICE, is_info=False, is_verbose=0)
+        self.assertEqual(get_account.owner_key, ALICE.owner_key.key_public)
+        self.assertEqual(get_account.active_key, ALICE.active_key.key_public)
+        wallet_keys = cleos.WalletKeys(is_verbose=False).json
+        self.assertIn(ALICE.active_key.key_public, wallet_keys)
+        with self.assertRaises(errors.AccountDoesNotExistError):
+            cleos.GetAccount("nobody", is_info=False, is_verbose=0)
+
+    def test_create_account_fast_path(self):
+        create_account("DAVE", MASTER, verify=False)
+        self.assertEqual(DAVE.owner_key.key_public, DAVE.active_key.key_public)
+        self.assertIs(DAVE.verify(), DAVE)
+
+        # Elsewhere than on the local node, the keys are distinct:
+        with mock.patch.object(
+                        manager, "is_local_testnet", return_value=False):
+            create_account("ERIN", MASTER, stake_net=0, verify=False)
+        self.assertNotEqual(
+                        ERIN.owner_key.key_public, ERIN.active_key.key_public)
+        self.assertIs(ERIN.verify(), ERIN)
+
+    def test_sessions_isolated(self):
+        results = {}
+
+        def scenario(url):
+            with setup.Session(url) as session:
+                # Both nodes are the in-process chain:
+                session.is_local_address = True
+                master = create_master_account("MASTER")
+                alice = create_account("ALICE", master)
+                results[url] = (session, alice, alice.verify())
+
+        threads = [threading.Thread(target=scenario, args=(url,)) \
+                for url in ["http://127.0.0.1:7777", "http://127.0.0.1:9999"]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        (first, alice_1, _), (second, alice_2, _) = results.values()
+        self.assertIsNot(alice_1, alice_2)
+        self.assertNotEqual(alice_1.name, alice_2.name)
+        self.assertIs(first.accounts["ALICE"], alice_1)
+        self.assertIs(second.accounts["ALICE"], alice_2)
+        # The default session keeps its own account objects:
+        self.assertIsNot(ALICE, alice_1)
+        self.assertIsNot(ALICE, alice_2)
+
+    def test_deploy(self):
+        self.assertTrue(HOST.is_code())
+        self.assertFalse(ALICE.is_code())
+        abi = cleos_get.GetAbi(HOST, is_verbose=False).abi
+        self.assertEqual(abi["tables"], ABI["tables"])
+
+    def test_push_action_and_table(self):
+        for amount in [3, 1, 2]:
+            HOST.push_action(
+                "put", {"user": ALICE, "amount": amount}, permission=ALICE)
+        self.assertIn("put " + ALICE.name, HOST.action.console)
+        self.assertEqual(
+            [row["amount"] for row in self.rows(ALICE)], [1, 2, 3])
+        self.assertEqual(self.rows(CAROL), [])
+
+    def test_missing_authority(self):
+        with self.assertRaises(MissingRequiredAuthorityError):
+            HOST.push_action(
+                "put", {"user": CAROL, "amount": 1}, permission=ALICE)
+        self.assertEqual(self.rows(CAROL), [])
+
+    def test_rollback(self):
+        with self.assertRaises(Error) as context:
+            HOST.push_action("fail", {"user": HOST}, permission=HOST)
+        self.assertIn("failed on purpose", str(context.exception))
+        self.assertNotIn(999, [row["amount"] for row in self.rows(HOST)])
+
+    def test_table_paging(self):
+        for amount in range(10, 17):
+            HOST.push_action(
+                "put", {"user": CAROL, "amount": amount}, permission=CAROL)
+        page = HOST.table("accounts", CAROL, limit=3).json
+        self.assertEqual([row["amount"] for row in page["rows"]], [10, 11, 12])
+        self.assertTrue(page["more"])
+        self.assertEqual(page["next_key"], "13")
+
+        page = HOST.table(
+            "accounts", CAROL, limit=3, lower=page["next_key"]).json
+        self.assertEqual([row["amount"] for row in page["rows"]], [13, 14, 15])
+        page = HOST.table("accounts", CAROL, limit=3, lower="16").json
+        self.assertEqual([row["amount"] for row in page["rows"]], [16])
+        self.assertFalse(page["more"])
+
+    def test_get_actions_windows(self):
+        for amount in range(20, 25):
+            HOST.push_action(
+                "put", {"user": HOST, "amount": amount}, permission=HOST)
+        last = cleos_get.GetActions(
+                    HOST, -1, -1, json=True, is_verbose=False).json["actions"]
+        last_seq = last[-1]["account_action_seq"]
+
+        actions = cleos_get.GetActions(
+            HOST, last_seq - 4, 4, json=True, is_verbose=False).json["actions"]
+        self.assertEqual(
+            [action["account_action_seq"] for action in actions],
+            list(range(last_seq - 4, last_seq + 1)))
+        self.assertEqual(
+            [action["action_trace"]["act"]["data"]["amount"] \
+                                for action in actions], list(range(20, 25)))
+
+        actions = cleos_get.GetActions(
+            HOST, last_seq, -2, json=True, is_verbose=False).json["actions"]
+        self.assertEqual(
+            [action["account_action_seq"] for action in actions],
+            list(range(last_seq - 2, last_seq + 1)))
+
+    def test_history_crawl(self):
+        for amount in range(30, 35):
+            HOST.push_action(
+                "put", {"user": HOST, "amount": amount}, permission=HOST)
+        crawler = history.HistoryCrawler(HOST, window=2, concurrency=3)
+        actions = list(crawler)
+        self.assertEqual(
+            [action["seq"] for action in actions],
+            list(range(0, crawler.end + 1)))
+        self.assertEqual(
+            [action["data"]["amount"] for action in actions[-5:]],
+            list(range(30, 35)))
+        self.assertEqual(actions[-1]["authorization"], [HOST.name + "@active"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+'''Tests of the read cache, see :mod:`eosfactory.core.read_cache`, on the
+in-process chain, see :mod:`eosfactory.core.mock_chain`.
+'''
+import time
+import unittest
+from unittest import mock
+
+from eosfactory.eosf import *
+import eosfactory.core.cleos as cleos
+import eosfactory.core.cleos_get as cleos_get
+import eosfactory.core.read_cache as read_cache
+import eosfactory.core.setup as setup
+import eosfactory.core.mock_chain as mock_chain
+
+verbosity([])
+
+CHAIN = mock_chain.MockChain()
+INTERVAL = 0.01
+OTHER_ADDRESS = "http://127.0.0.1:7777"
+
+
+class Recorder():
+
+    def __init__(self):
+        self.commands = []
+
+    def record(self, command_group, command, args, out, err):
+        self.commands.append((command_group, command))
+
+
+def wait_for(condition, timeout=5):
+    start = time.time()
+    while not condition():
+        if time.time() - start > timeout:
+            raise AssertionError("Timed out.")
+        time.sleep(INTERVAL)
+
+
+class Test(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        CHAIN.install()
+        reset()
+        create_master_account("MASTER")
+
+    @classmethod
+    def tearDownClass(cls):
+        stop()
+        CHAIN.uninstall()
+
+    def setUp(self):
+        self.recorder = Recorder()
+        cleos.set_recorder(self.recorder)
+
+    def tearDown(self):
+        read_cache.stop()
+        cleos.set_recorder(None)
+
+    def test_follower_not_recorded(self):
+        read_cache.start(INTERVAL)
+        address = setup.nodeos_address()
+        cleos_get.GetInfo(is_verbose=False)
+        wait_for(lambda: read_cache.head_block(address) is not None)
+        for _ in range(3):
+            cleos_get.GetInfo(is_verbose=False)
+        time.sleep(10 * INTERVAL)
+
+        # The queries are issued until the head block is known, then they
+        # are cached; the follower queries are not seen:
+        self.assertEqual(self.recorder.commands, [("get", "info")] * 2)
+
+    def test_head_block_per_address(self):
+        head_blocks = {setup.nodeos_address(): 10, OTHER_ADDRESS: 20}
+        def head_block_num(address):
+            return head_blocks.get(address)
+
+        def query_both():
+            cleos_get.GetInfo(is_verbose=False)
+            with setup.Session(OTHER_ADDRESS) as session:
+                session.is_local_address = True
+                cleos_get.GetInfo(is_verbose=False)
+
+        with mock.patch.object(
+                            read_cache, "head_block_num", head_block_num):
+            read_cache.start(INTERVAL)
+            query_both()
+            wait_for(lambda: read_cache.head_block(OTHER_ADDRESS) == 20)
+            wait_for(lambda: read_cache.head_block() == 10)
+            # The responses are stored as soon as the head blocks are known:
+            query_both()
+            self.assertEqual(len(self.recorder.commands), 4)
+            query_both()
+            self.assertEqual(len(self.recorder.commands), 4)
+
+            # Only the entries of the node that advanced are cleared:
+            head_blocks[OTHER_ADDRESS] = 21
+            wait_for(lambda: read_cache.head_block(OTHER_ADDRESS) == 21)
+            query_both()
+            self.assertEqual(len(self.recorder.commands), 5)
+            query_both()
+            self.assertEqual(len(self.recorder.commands), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
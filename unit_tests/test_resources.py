@@ -0,0 +1,111 @@
+'''Statistics of the costs of actions, the report at exit, and the check
+against a baseline.
+'''
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import unittest
+
+import eosfactory.core.errors as errors
+import eosfactory.core.resources as resources
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXIT_SCRIPT = '''
+import json
+import atexit
+import eosfactory.core.resources as resources
+
+# A handler registered before, which runs after the report:
+atexit.register(lambda: open("handler.txt", "w").close())
+with open("baseline.json", "w") as f:
+    json.dump({"host::put": {"cpu_mean": 100, "net_mean": 96}}, f)
+resources.collect(baseline="baseline.json", save="costs.json")
+resources.record("host", "put", {
+    "receipt": {"cpu_usage_us": 150, "net_usage_words": 12},
+    "action_traces": [{"elapsed": 40}]})
+'''
+
+
+def processed(cpu, net_words, elapsed=10):
+    return {
+        "receipt": {"cpu_usage_us": cpu, "net_usage_words": net_words},
+        "action_traces": [{"elapsed": elapsed}, {}]
+    }
+
+
+class Test(unittest.TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(resources.percentile(values, 50), 50)
+        self.assertEqual(resources.percentile(values, 95), 95)
+        self.assertEqual(resources.percentile(values, 99), 99)
+        self.assertEqual(resources.percentile([7], 99), 7)
+        self.assertEqual(resources.percentile([1, 2, 3], 50), 2)
+        self.assertIsNone(resources.percentile([], 50))
+
+    def test_summary(self):
+        costs = resources.ActionCosts()
+        for cpu in [100, 200, 300, 400]:
+            costs.record("host", "put", processed(cpu, 12))
+        costs.record("host", "erase", processed(50, 10, 5))
+
+        summary = costs.summary()
+        self.assertEqual(list(summary), ["host::erase", "host::put"])
+        put = summary["host::put"]
+        self.assertEqual(put["count"], 4)
+        self.assertEqual(put["cpu_mean"], 250)
+        self.assertEqual(put["cpu_p50"], 200)
+        self.assertEqual(put["cpu_p99"], 400)
+        self.assertEqual(put["net_mean"], 96)
+        self.assertEqual(put["elapsed_mean"], 10)
+        self.assertIn("host::erase", costs.report(summary))
+
+    def test_compare(self):
+        costs = resources.ActionCosts()
+        costs.record("host", "put", processed(110, 12))
+        costs.record("host", "erase", processed(50, 10))
+        baseline = {
+            "host::put": {"cpu_mean": 100, "net_mean": 96},
+            "host::erase": {"cpu_mean": 40, "net_mean": 80}
+        }
+        self.assertEqual(costs.compare(baseline, 0.1), [
+            "host::erase cpu_mean: 50 against the baseline 40"])
+        self.assertEqual(len(costs.compare(baseline, 0.05)), 2)
+        self.assertEqual(costs.compare({}, 0.1), [])
+
+    def test_check(self):
+        directory = tempfile.mkdtemp()
+        baseline = os.path.join(directory, "baseline.json")
+        with open(baseline, "w") as f:
+            json.dump({"host::put": {"cpu_mean": 100, "net_mean": 96}}, f)
+        costs = resources.collect(baseline=baseline, threshold=0.1)
+        self.addCleanup(costs.costs.clear)
+        costs.record("host", "put", processed(150, 12))
+
+        with self.assertRaises(errors.CostRegressionError) as context:
+            resources.check()
+        self.assertEqual(context.exception.regressions, [
+            "host::put cpu_mean: 150 against the baseline 100"])
+        self.assertEqual(resources.check(threshold=1.0), [])
+        self.assertEqual(resources.check(baseline=os.path.join(
+                                            directory, "missing.json")), [])
+
+    def test_exit_report(self):
+        directory = tempfile.mkdtemp()
+        env = dict(os.environ)
+        env["PYTHONPATH"] = ROOT
+        process = subprocess.run(
+            [sys.executable, "-c", EXIT_SCRIPT], cwd=directory, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.assertEqual(process.returncode, 0, process.stderr.decode())
+        self.assertTrue(
+                    os.path.exists(os.path.join(directory, "handler.txt")))
+        with open(os.path.join(directory, "costs.json")) as f:
+            self.assertEqual(json.load(f)["host::put"]["cpu_mean"], 150)
+
+
+if __name__ == '__main__':
+    unittest.main()
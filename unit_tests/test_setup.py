@@ -0,0 +1,84 @@
+'''The sessions of :mod:`eosfactory.core.setup`, and the former module 
+variables, now attributes of the current session.
+'''
+import os
+import sys
+import tempfile
+import subprocess
+import unittest
+
+import eosfactory.core.setup as setup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Below Python 3.7, module attributes are not looked up with the function 
+# __getattr__ of the module:
+MIRROR_SCRIPT = '''
+import sys
+from unittest import mock
+
+with mock.patch.object(sys, "version_info", (3, 6)):
+    import eosfactory.core.setup as setup
+    attributes = setup.__dict__
+    assert attributes["account_map"] == "accounts.json"
+    with setup.Session("http://127.0.0.1:8888"):
+        assert attributes["account_map"] == "_127_0_0_1_8888_accounts.json"
+        setup.session().is_local_address = True
+        assert attributes["is_local_address"]
+    assert attributes["account_map"] == "accounts.json"
+    assert not attributes["is_local_address"]
+    setup.set_nodeos_address("http://127.0.0.1:8889")
+    assert attributes["account_map"] == "_127_0_0_1_8889_accounts.json"
+'''
+
+CRASH_SCRIPT = '''
+import os
+import eosfactory.core.setup as setup
+
+setup.save_command_lines()
+setup.add_to__command_line_file("cleos get info")
+os._exit(1)
+'''
+
+
+class Test(unittest.TestCase):
+
+    def test_session_attributes(self):
+        default = setup.session()
+        with setup.Session("http://127.0.0.1:8888", "test") as session:
+            self.assertIs(setup.session(), session)
+            self.assertEqual(
+                setup.account_map, "test__127_0_0_1_8888_accounts.json")
+            self.assertEqual(setup.nodeos_address(), "http://127.0.0.1:8888")
+        self.assertIs(setup.session(), default)
+        self.assertEqual(setup.account_map, default.account_map)
+
+    def test_reboot_keeps_bound_node(self):
+        with setup.Session("http://127.0.0.1:8888") as session:
+            setup.reboot()
+            self.assertEqual(setup.nodeos_address(), "http://127.0.0.1:8888")
+            self.assertEqual(session.file_prefix, "_127_0_0_1_8888_")
+        session = setup.Session()
+        session.set_nodeos_address("http://127.0.0.1:8888")
+        session.reboot()
+        self.assertIsNone(session.nodeos_address)
+
+    def test_mirrored_attributes(self):
+        env = dict(os.environ)
+        env["PYTHONPATH"] = ROOT
+        process = subprocess.run(
+            [sys.executable, "-c", MIRROR_SCRIPT], env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.assertEqual(process.returncode, 0, process.stderr.decode())
+
+    def test_command_lines_kept_on_crash(self):
+        directory = tempfile.mkdtemp()
+        env = dict(os.environ)
+        env["PYTHONPATH"] = ROOT
+        subprocess.run(
+            [sys.executable, "-c", CRASH_SCRIPT], cwd=directory, env=env)
+        with open(os.path.join(directory, setup.command_line_file)) as f:
+            self.assertEqual(f.read(), "cleos get info\n\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
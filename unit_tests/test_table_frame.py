@@ -0,0 +1,169 @@
+'''Tests of the table frames, see :mod:`eosfactory.core.table_frame`, loaded
+from the in-process chain of :mod:`eosfactory.core.mock_chain`.
+
+The tests run with the *NumPy* columns, if the ``numpy`` package is
+installed, and with the list columns.
+'''
+import unittest
+from unittest import mock
+
+from eosfactory.eosf import *
+import eosfactory.core.mock_chain as mock_chain
+import eosfactory.core.table_frame as table_frame
+
+verbosity([])
+
+ABI = {
+    "version": "eosio::abi/1.1",
+    "types": [{"new_type_name": "balance_t", "type": "int64"}],
+    "structs": [
+        {"name": "keyed", "base": "", "fields": [
+            {"name": "id", "type": "uint64"}]},
+        {"name": "account", "base": "keyed", "fields": [
+            {"name": "owner", "type": "name"},
+            {"name": "balance", "type": "balance_t"},
+            {"name": "ratio", "type": "float64"},
+            {"name": "active", "type": "bool"}]},
+        {"name": "profile", "base": "", "fields": [
+            {"name": "owner", "type": "name"},
+            {"name": "nick", "type": "string"},
+            {"name": "balance", "type": "int64"}]},
+        {"name": "put", "base": "account", "fields": [
+            {"name": "scope", "type": "name"}]}
+    ],
+    "actions": [{"name": "put", "type": "put"}],
+    "tables": [
+        {"name": "accounts", "type": "account"},
+        {"name": "profiles", "type": "profile"}]
+}
+
+CHAIN = mock_chain.MockChain()
+
+
+@CHAIN.action("framed", "put")
+def put(context, data):
+    row = dict(data)
+    scope = row.pop("scope")
+    context.table("accounts", scope).emplace(row["id"], row)
+    if row["id"] == 1:
+        context.table("profiles", "framed").emplace(row["id"], {
+            "owner": row["owner"], "nick": "first", "balance": -1})
+
+
+# Actors of the test:
+MASTER = MasterAccount()
+HOST = Account()
+ALICE = Account()
+CAROL = Account()
+
+
+class Test(unittest.TestCase):
+
+    is_numpy = True
+
+    @classmethod
+    def setUpClass(cls):
+        CHAIN.install()
+        reset()
+        create_master_account("MASTER")
+        create_account("HOST", MASTER)
+        create_account("ALICE", MASTER)
+        create_account("CAROL", MASTER)
+        Contract(HOST, mock_chain.contract_dir("framed", ABI)).deploy()
+
+        # ALICE has the rows 1, 2, 3, CAROL has the rows 4, 5:
+        for id, owner in enumerate([ALICE, ALICE, ALICE, CAROL, CAROL], 1):
+            HOST.push_action("put", {
+                "scope": owner, "id": id, "owner": owner,
+                "balance": 100 * id, "ratio": id / 4, "active": id % 2},
+                permission=HOST)
+
+    @classmethod
+    def tearDownClass(cls):
+        stop()
+        CHAIN.uninstall()
+
+    def setUp(self):
+        if self.is_numpy and not table_frame.numpy_module():
+            self.skipTest("The numpy package is not installed.")
+        if not self.is_numpy:
+            patch = mock.patch.object(
+                            table_frame, "numpy_module", return_value=False)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def frame(self):
+        return HOST.table_frame("accounts", scope=[ALICE, CAROL])
+
+    def test_typed_columns(self):
+        frame = self.frame()
+        self.assertEqual(len(frame), 5)
+        self.assertEqual(
+            frame.names,
+            ["id", "owner", "balance", "ratio", "active", table_frame.SCOPE])
+        self.assertEqual(frame.types["balance"], "int64")
+        if self.is_numpy:
+            self.assertEqual(str(frame["id"].dtype), "uint64")
+            self.assertEqual(str(frame["balance"].dtype), "int64")
+            self.assertEqual(str(frame["ratio"].dtype), "float64")
+            self.assertEqual(str(frame["active"].dtype), "bool")
+            self.assertEqual(str(frame["owner"].dtype), "object")
+        else:
+            self.assertIsInstance(frame["balance"], list)
+
+        row = frame.rows()[0]
+        self.assertEqual(row, {
+            "id": 1, "owner": ALICE.name, "balance": 100, "ratio": 0.25,
+            "active": True, "scope": ALICE.name})
+        for name, type_ in [("id", int), ("balance", int), ("ratio", float),
+                                                        ("active", bool)]:
+            self.assertIs(type(row[name]), type_)
+
+    def test_where(self):
+        frame = self.frame()
+        mask = frame.mask("balance", ">", 150)
+        self.assertEqual(list(frame.where(mask)["id"]), [2, 3, 4, 5])
+
+        # Equality with and without an index select the same rows:
+        self.assertEqual(
+            list(frame.where(mask, owner=CAROL.name)["id"]), [4, 5])
+        self.assertNotIn("owner", frame.indexes)
+        frame.index("owner")
+        self.assertEqual(
+            list(frame.where(mask, owner=CAROL.name)["id"]), [4, 5])
+        self.assertEqual(list(frame.where(owner=ALICE.name)["id"]), [1, 2, 3])
+        self.assertEqual(len(frame.where(owner="nobody")), 0)
+
+    def test_join_left(self):
+        frame = self.frame()
+        profiles = HOST.table_frame("profiles", scope="framed")
+
+        joined = frame.join(profiles, "owner", how="left")
+        self.assertEqual(list(joined["id"]), [1, 2, 3, 4, 5])
+        self.assertEqual(
+            list(joined["nick"]), ["first"] * 3 + [None] * 2)
+        self.assertEqual(list(joined["balance_right"]), [-1] * 3 + [None] * 2)
+        # The types of the columns with missing values are not kept:
+        self.assertNotIn("balance_right", joined.types)
+
+        joined = frame.join(profiles, "owner")
+        self.assertEqual(list(joined["id"]), [1, 2, 3])
+        self.assertEqual(joined.types["balance_right"], "int64")
+
+    def test_group_by(self):
+        totals = self.frame().group_by(table_frame.SCOPE, {
+                "balance": "sum", "id": "count", "ratio": "mean"})
+        self.assertEqual(
+            sorted(totals.rows(), key=lambda row: row["balance"]), [
+                {"scope": ALICE.name, "balance": 600, "id": 3, "ratio": 0.5},
+                {"scope": CAROL.name, "balance": 900, "id": 2,
+                                                        "ratio": 1.125}])
+
+
+class TestWithoutNumPy(Test):
+
+    is_numpy = False
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+'''The command line of the local *nodeos*, see :func:`eosfactory.core.teos.args`.
+'''
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import eosfactory.core.config as config
+import eosfactory.core.teos as teos
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAMDISK = "/dev/shm"
+
+
+class Test(unittest.TestCase):
+
+    def test_nodeos_options(self):
+        with mock.patch.object(
+                config, "config_value", return_value="--max-clients 10"):
+            self.assertEqual(config.nodeos_options(), ["--max-clients 10"])
+        with mock.patch.object(
+                config, "config_value", return_value=["-e", "--max-clients 10"]):
+            self.assertEqual(
+                config.nodeos_options(), ["-e", "--max-clients 10"])
+        with mock.patch.object(config, "config_value", return_value=None):
+            self.assertEqual(config.nodeos_options(), [])
+
+    def test_options_string(self):
+        with mock.patch.object(
+                config, "config_value", return_value="--max-clients 10"):
+            options = config.nodeos_options()
+        with mock.patch.object(config, "nodeos_options", return_value=options):
+            self.assertEqual(teos.args()[-1], "--max-clients 10")
+
+    def test_profiles(self):
+        bench = teos.args(profile_name="bench")
+        self.assertNotIn("--contracts-console", bench)
+        self.assertEqual(
+            [arg for arg in bench if arg.startswith("--plugin")],
+            ["--plugin " + plugin for plugin in teos.MINIMAL_PLUGINS])
+        debug = teos.args(profile_name="debug")
+        self.assertIn("--plugin eosio::history_api_plugin", debug)
+        with self.assertRaises(teos.errors.Error):
+            teos.args(profile_name="nothing")
+
+    @unittest.skipIf(
+        teos.mount_type(RAMDISK) not in teos.RAMDISK_TYPES,
+                                            "No tmpfs at {}.".format(RAMDISK))
+    def test_ramdisk(self):
+        directory = tempfile.mkdtemp(dir=RAMDISK)
+        self.addCleanup(shutil.rmtree, directory)
+        with mock.patch.object(
+                    config, "nodeos_ramdisk_dir", return_value=directory):
+            args = teos.args(profile_name="ramdisk")
+        data_dir = os.path.join(directory, "data")
+        self.assertEqual(args[args.index("--data-dir") + 1], data_dir)
+        self.assertTrue(os.path.isdir(data_dir))
+
+    @unittest.skipIf(
+        teos.mount_type(ROOT) in teos.RAMDISK_TYPES, "The tree is on tmpfs.")
+    def test_ramdisk_not_on_tmpfs(self):
+        directory = tempfile.mkdtemp(dir=ROOT)
+        self.addCleanup(shutil.rmtree, directory)
+        with mock.patch.object(
+                    config, "nodeos_ramdisk_dir", return_value=directory):
+            with self.assertRaises(teos.errors.Error) as context:
+                teos.args(profile_name="ramdisk")
+        self.assertIn("is not on tmpfs", str(context.exception))
+        self.assertFalse(os.path.exists(os.path.join(directory, "data")))
+
+
+if __name__ == '__main__':
+    unittest.main()
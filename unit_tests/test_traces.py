@@ -0,0 +1,66 @@
+'''Trace trees, see :mod:`eosfactory.core.traces`, of a transaction where the
+action *host::pay* sends the inline action *token::transfer*, which notifies
+*alice*, in both trace layouts.
+'''
+import unittest
+
+import eosfactory.core.traces as traces
+
+
+def trace(receiver, account, name, data, console="", **kwargs):
+    result = {
+        "receiver": receiver,
+        "act": {"account": account, "name": name, "data": data},
+        "console": console
+    }
+    result.update(kwargs)
+    return result
+
+
+PAY = {"to": "alice"}
+TRANSFER = {"from": "host", "to": "alice", "quantity": "1.0000 SYS"}
+
+NESTED = [
+    trace("host", "host", "pay", PAY, "paid", inline_traces=[
+        trace("token", "token", "transfer", TRANSFER, inline_traces=[
+            trace("alice", "token", "transfer", TRANSFER, "received",
+                                                        inline_traces=[])])])]
+
+FLAT = [
+    trace("host", "host", "pay", PAY, "paid",
+                            action_ordinal=1, creator_action_ordinal=0),
+    trace("token", "token", "transfer", TRANSFER,
+                            action_ordinal=2, creator_action_ordinal=1),
+    trace("alice", "token", "transfer", TRANSFER, "received",
+                            action_ordinal=3, creator_action_ordinal=2)]
+
+
+class Test(unittest.TestCase):
+
+    def test_tree(self):
+        for layout in [NESTED, FLAT]:
+            tree = traces.TraceTree(layout)
+            self.assertEqual(len(tree.roots), 1)
+            self.assertEqual(
+                [str(node.receiver) for node in tree.walk()],
+                ["host", "token", "alice"])
+            self.assertEqual(
+                [node.depth for node in tree.find(name="transfer")], [1, 2])
+            self.assertEqual(
+                tree.console,
+                "host@pay:\npaid\n    token@transfer:\n    received")
+
+    def test_act(self):
+        # The nested layout lists the action of the transaction:
+        self.assertEqual(
+            traces.TraceTree(NESTED).act, "host <= host::pay {}".format(PAY))
+
+        # The flat layout lists the inline action and the notification, too:
+        self.assertEqual(traces.TraceTree(FLAT).act, "\n".join([
+            "host <= host::pay {}".format(PAY),
+            "token <= token::transfer {}".format(TRANSFER),
+            "token <= token::transfer {}".format(TRANSFER)]))
+
+
+if __name__ == '__main__':
+    unittest.main()